@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+动画导出模块
+将多时段数据文件（见 flow_series）逐时段或按滑动窗口绘制为动画（GIF 或 MP4）。
+
+- 所有帧使用同一比例尺（全部帧中的最大流向流量），流线宽度在帧之间可直接比较
+- 每个工作进程只创建一次 Figure、坐标轴、进口名称和各进口的进口/出口流量线（含箭头）；
+  流量线的形状只取决于方位角，每帧只按该帧的进口/出口总量更新宽度（原地修改顶点）。
+  转向路径的形状随流量变化，每帧重新计算，只替换这一组图形的路径；
+  流量数字是矢量字形（见 drawing_utils.draw_text），没有 Text 对象可以 set_text，
+  每帧复用同一组标注图形，只替换字形路径（字形排版有缓存）
+- 帧按 CPU 核数分配到多个进程并行绘制，按顺序以原始 RGB 数据直接送入编码器
+  （GIF 由 Pillow 编码，MP4 通过管道写入 ffmpeg 的标准输入），不写中间 PNG 文件
+
+用法:
+    python animation_export.py 多时段.txt -o 全天.gif --fps 4
+    python animation_export.py 多时段.txt -o 全天.mp4 --window 4 --workers 4
+"""
+import os
+import sys
+import shutil
+import argparse
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 支持的动画格式（扩展名 -> 编码器）
+ANIMATION_FORMATS = {
+    '.gif': 'gif',
+    '.mp4': 'mp4',
+}
+# 默认帧率（帧/秒）
+DEFAULT_FPS = 4
+# 文字标注的绘制层级（在流量图形之上；进口名称再高一层）
+LABEL_ZORDER = 2
+# 每个工作进程最多预先提交的帧数（限制等待编码的帧占用的内存）
+FRAMES_IN_FLIGHT_PER_WORKER = 2
+
+_worker_renderer = None  # 工作进程中的 FrameRenderer（每个进程初始化一次）
+
+
+def build_frames(series, window=1, step=1):
+    """
+    由多时段数据生成动画帧的流量
+
+    参数:
+        series: flow_series.FlowSeries
+        window: 每帧合计的连续时段数（1 为逐时段，4 为15分钟数据的滑动小时）
+        step: 相邻两帧的起始时段间隔
+
+    返回:
+        (frames, labels)，frames 形如 (帧数, N, N)，即每帧的 by_order[flow_idx, entry_idx]
+    """
+    window = max(1, int(window))
+    step = max(1, int(step))
+    starts = range(0, series.num_periods - window + 1, step)
+    frames = series.rolling(window)[::step]
+    labels = [series.window_label(start, window) for start in starts]
+    return frames, labels
+
+
+def global_max_volume(frames, traffic_rule='right'):
+    """全部帧中的最大流向流量（所有帧共用的线宽比例尺）"""
+    import flow_model
+
+    flows = flow_model.build_flow_matrix(frames, traffic_rule)
+    return float(flow_model.compute_totals(flows)[2].max())
+
+
+def frame_size(dpi):
+    """帧的像素尺寸 (宽, 高)，与 Agg 画布一致"""
+    from drawing_utils import FIGURE_SIZE
+
+    return int(FIGURE_SIZE[0] * dpi), int(FIGURE_SIZE[1] * dpi)
+
+
+class FrameRenderer:
+    """在同一个 Figure 上逐帧绘制（画布、坐标轴、进口名称和进口/出口流量线只创建一次）"""
+
+    def __init__(self, names, angles, frames, labels, traffic_rule='right', max_volume=None,
+                 road_font_size=None, flow_font_size=None, font_file=None, dpi=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        import render_engine
+        from matplotlib.path import Path
+        from matplotlib.patches import PathPatch
+        from drawing_utils import entry_colors, PLOT_XLIM, PLOT_YLIM, FIGURE_SIZE, FIGURE_DPI
+
+        self.frames = np.asarray(frames, dtype=float)
+        self.labels = list(labels)
+        self.names = list(names)
+        self.angles = list(angles)
+        self.num_entries = self.frames.shape[-1]
+        self.traffic_rule = traffic_rule
+        self.max_volume = max_volume
+        self.road_font_size = render_engine.clamp_font_size(
+            road_font_size, render_engine.DEFAULT_ROAD_LABEL_FONT_SIZE)
+        self.flow_font_size = render_engine.clamp_font_size(
+            flow_font_size, render_engine.DEFAULT_FLOW_LABEL_FONT_SIZE)
+        self.font_file = render_engine.resolve_font(font_file)
+
+        self.fig = Figure(figsize=FIGURE_SIZE, dpi=dpi or FIGURE_DPI)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        self.ax.set_aspect('equal')
+        self.ax.set_xlim(PLOT_XLIM[0], PLOT_XLIM[1])
+        self.ax.set_ylim(PLOT_YLIM[0], PLOT_YLIM[1])
+        self.ax.set_axis_off()
+        self.fig.tight_layout()
+        self.fig.set_facecolor('white')
+
+        # 进口名称的位置只取决于方位角，所有帧共用（画在流量图形之上）
+        model = render_engine.prepare_intersection(self.names, self.angles, self.frames[0],
+                                                   self.num_entries, traffic_rule)
+        for artist in render_engine.draw_name_labels(self.ax, model, self.road_font_size,
+                                                     fontname=self.font_file):
+            artist.set_zorder(LABEL_ZORDER + 1)
+        # 进口/出口流量线和箭头：每个进口一个 patch，之后每帧只改写顶点（宽度）
+        self._stub_paths = []
+        for color, vertices in zip(entry_colors(self.num_entries), render_engine.road_stub_vertices(model)):
+            path = Path(vertices, render_engine.ROAD_STUB_CODES)
+            self.ax.add_artist(PathPatch(path, edgecolor=color, facecolor=color, lw=0))
+            self._stub_paths.append(path)
+        # 逐帧更新的图形：转向路径（在流量线之上）、流量数字和时段名称
+        self._turns = []
+        self._labels = []
+        self._period = []
+
+    def render(self, index):
+        """
+        绘制第 index 帧
+
+        返回:
+            RGB 原始像素字节（尺寸见 frame_size）
+        """
+        import render_engine
+        from drawing_utils import PatchCollector, draw_text, PLOT_YLIM
+
+        model = render_engine.prepare_intersection(self.names, self.angles, self.frames[index],
+                                                   self.num_entries, self.traffic_rule,
+                                                   max_volume=self.max_volume)
+        for path, vertices in zip(self._stub_paths, render_engine.road_stub_vertices(model)):
+            path.vertices = vertices
+        self._turns = render_engine.draw_geometry(self.ax, model, include_stubs=False, reuse=self._turns)
+        self._labels = render_engine.draw_labels(self.ax, model, self.road_font_size, self.flow_font_size,
+                                                 fontname=self.font_file, include_names=False,
+                                                 reuse=self._labels)
+        # 时段名称标注在图形上方
+        collector = PatchCollector(normalize_orientation=False)
+        draw_text(collector, self.labels[index], self.road_font_size, (0, PLOT_YLIM[1] - 25), 0,
+                  "black", fontname=self.font_file)
+        self._period = collector.flush(self.ax, update_limits=False, reuse=self._period)
+        for artist in self._labels + self._period:
+            artist.set_zorder(LABEL_ZORDER)
+
+        self.fig.canvas.draw()
+        rgba = np.asarray(self.fig.canvas.buffer_rgba())
+        return np.ascontiguousarray(rgba[..., :3]).tobytes()
+
+
+def _init_worker(renderer_kwargs):
+    """工作进程初始化：创建该进程共用的 FrameRenderer"""
+    global _worker_renderer
+    _worker_renderer = FrameRenderer(**renderer_kwargs)
+
+
+def _render_worker_frame(index):
+    return _worker_renderer.render(index)
+
+
+def iter_frames(renderer_kwargs, num_frames, max_workers=1):
+    """
+    按顺序逐帧生成 RGB 数据（max_workers > 1 时在多个进程中并行绘制）
+
+    同时等待的帧数限制为 max_workers * FRAMES_IN_FLIGHT_PER_WORKER，编码器消费一帧再提交下一帧。
+    """
+    if max_workers <= 1 or num_frames <= 1:
+        renderer = FrameRenderer(**renderer_kwargs)
+        for index in range(num_frames):
+            yield renderer.render(index)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(renderer_kwargs,)) as executor:
+        pending = deque()
+        next_index = 0
+        limit = max_workers * FRAMES_IN_FLIGHT_PER_WORKER
+        while next_index < num_frames or pending:
+            while next_index < num_frames and len(pending) < limit:
+                pending.append(executor.submit(_render_worker_frame, next_index))
+                next_index += 1
+            yield pending.popleft().result()
+
+
+def write_gif(frames, size, output, fps=DEFAULT_FPS):
+    """用 Pillow 将 RGB 帧编码为循环播放的 GIF"""
+    from PIL import Image
+
+    images = (Image.frombytes('RGB', size, data) for data in frames)
+    first = next(images, None)
+    if first is None:
+        raise ValueError('没有可导出的帧')
+    first.save(output, format='GIF', save_all=True, append_images=images,
+               duration=int(round(1000 / fps)), loop=0)
+
+
+def write_mp4(frames, size, output, fps=DEFAULT_FPS, ffmpeg=None):
+    """通过管道将 RGB 帧写入 ffmpeg 的标准输入，编码为 H.264 MP4"""
+    ffmpeg = ffmpeg or shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise RuntimeError('未找到 ffmpeg，无法导出 MP4（可导出 GIF，或用 --ffmpeg 指定路径）')
+    width, height = size
+    command = [
+        ffmpeg, '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+        # H.264 要求宽高为偶数
+        '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', output,
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for data in frames:
+            process.stdin.write(data)
+    except BrokenPipeError:
+        pass
+    finally:
+        process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f'ffmpeg 编码失败（退出码 {process.returncode}）')
+
+
+def export_animation(file_name, output, window=1, step=1, fps=DEFAULT_FPS, dpi=None, max_workers=None,
+                     road_font_size=None, flow_font_size=None, font_file=None, ffmpeg=None, progress=None):
+    """
+    将多时段数据文件导出为动画
+
+    参数:
+        file_name: 多时段数据文件
+        output: 导出文件（.gif 或 .mp4）
+        window / step: 见 build_frames
+        fps: 帧率
+        dpi: 帧分辨率，None 表示使用 FIGURE_DPI
+        max_workers: 工作进程数，None 表示每个CPU核一个进程
+        road_font_size / flow_font_size: 标注字号，None 表示使用默认值
+        font_file: 字体文件路径，None 时自动查找
+        ffmpeg: ffmpeg 可执行文件路径（导出 MP4 时使用），None 时在 PATH 中查找
+        progress: 可选回调 progress(已完成帧数, 总帧数)
+
+    返回:
+        导出的帧数
+    """
+    import data_parser
+    from drawing_utils import FIGURE_DPI
+
+    encoder = ANIMATION_FORMATS.get(os.path.splitext(output)[1].lower())
+    if encoder is None:
+        raise ValueError(f'不支持的动画格式: {output}')
+
+    loaded = data_parser.load_flow_series(file_name)
+    if loaded is None:
+        raise ValueError(f'文件无法解析: {file_name}')
+    num_entries, traffic_rule, names, angles, _, series = loaded
+    if series is None:
+        raise ValueError(f'数据文件没有时段数据: {file_name}')
+    if window > series.num_periods:
+        raise ValueError(f'窗口长度超过时段数 {series.num_periods}')
+
+    frames, labels = build_frames(series, window, step)
+    dpi = dpi or FIGURE_DPI
+    renderer_kwargs = {
+        'names': names,
+        'angles': angles,
+        'frames': frames,
+        'labels': labels,
+        'traffic_rule': traffic_rule,
+        'max_volume': global_max_volume(frames, traffic_rule),
+        'road_font_size': road_font_size,
+        'flow_font_size': flow_font_size,
+        'font_file': font_file,
+        'dpi': dpi,
+    }
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(frames)))
+
+    def counted(frame_iter):
+        for done, data in enumerate(frame_iter, start=1):
+            yield data
+            if progress:
+                progress(done, len(frames))
+
+    frame_iter = counted(iter_frames(renderer_kwargs, len(frames), max_workers))
+    if encoder == 'gif':
+        write_gif(frame_iter, frame_size(dpi), output, fps)
+    else:
+        write_mp4(frame_iter, frame_size(dpi), output, fps, ffmpeg)
+    return len(frames)
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='导出多时段流量动画 / Export an animation over time periods')
+    parser.add_argument('input', help='多时段数据文件 / Multi-period data file')
+    parser.add_argument('-o', '--output', default=None,
+                        help='导出文件（.gif 或 .mp4），默认与数据文件同名的 GIF / Output file')
+    parser.add_argument('--window', type=int, default=1,
+                        help='每帧合计的连续时段数 / Periods summed per frame')
+    parser.add_argument('--step', type=int, default=1, help='相邻帧的时段间隔 / Periods between frames')
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS, help='帧率 / Frames per second')
+    parser.add_argument('--dpi', type=int, default=None, help='帧分辨率 / Frame DPI')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数 / Worker processes')
+    parser.add_argument('--road-font-size', type=int, default=None, help='路名标注字号 / Road label font size')
+    parser.add_argument('--flow-font-size', type=int, default=None, help='流量标注字号 / Flow label font size')
+    parser.add_argument('--font', default=None, help='字体文件 / Font file')
+    parser.add_argument('--ffmpeg', default=None, help='ffmpeg 路径（MP4） / Path to ffmpeg')
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.input)[0] + '.gif'
+
+    def report(done, total):
+        print(f'\r[{done}/{total}]', end='', flush=True)
+
+    try:
+        count = export_animation(args.input, output, window=args.window, step=args.step, fps=args.fps,
+                                 dpi=args.dpi, max_workers=args.workers,
+                                 road_font_size=args.road_font_size, flow_font_size=args.flow_font_size,
+                                 font_file=args.font, ffmpeg=args.ffmpeg, progress=report)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f'导出失败 / Export failed: {e}', file=sys.stderr)
+        return 1
+    print(f'\n{output}（{count} 帧）')
+    return 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+批量导出模块
+将目录中的交叉口数据文件（如 测试数据_N路.txt）批量绘制并导出为 SVG/PNG/PDF 等格式，
+按 CPU 核数分配到多个进程并行处理（单张图的绘制是CPU密集的matplotlib工作）。
+
+用法:
+    python batch_export.py 输入目录 输出目录 --format svg png pdf --dpi 300
+    python batch_export.py 输入目录 输出目录 --profile svg,png@300,png@600,pdf
+"""
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 默认导出格式
+DEFAULT_FORMATS = ('svg',)
+
+
+def find_data_files(input_dir, pattern='*.txt'):
+    """查找目录中的数据文件（按文件名排序）"""
+    return sorted(
+        path for path in glob.glob(os.path.join(input_dir, pattern))
+        if os.path.isfile(path)
+    )
+
+
+def load_intersection(file_name):
+    """
+    解析数据文件（多时段文件取快照流量，见 intersection.load）
+
+    返回:
+        intersection.Intersection；无法解析时返回 None
+    """
+    import intersection
+
+    loaded = intersection.load(file_name)
+    return loaded[0] if loaded else None
+
+
+def export_file(file_name, output_dir, formats=DEFAULT_FORMATS, dpi=None,
+                road_font_size=None, flow_font_size=None, profile=None):
+    """
+    绘制单个数据文件并按指定格式导出（在工作进程中执行）
+    指定 profile（导出方案，如 'svg,png@300,pdf'）时忽略 formats，各格式可使用不同分辨率
+
+    返回:
+        (file_name, 导出文件路径列表, 错误信息或None)
+    """
+    try:
+        import render_engine
+
+        data = load_intersection(file_name)
+        if data is None:
+            return file_name, [], '文件无法解析'
+
+        kwargs = {}
+        if road_font_size is not None:
+            kwargs['road_font_size'] = road_font_size
+        if flow_font_size is not None:
+            kwargs['flow_font_size'] = flow_font_size
+
+        dpi = dpi if dpi else render_engine.FIGURE_DPI
+        if profile:
+            try:
+                targets = render_engine.parse_export_profile(profile, dpi)
+            except ValueError as e:
+                return file_name, [], str(e)
+        else:
+            targets = []
+            for ext in formats:
+                ext = ext.lower().lstrip('.')
+                format = render_engine.format_from_extension(f'output.{ext}')
+                if format is None:
+                    return file_name, [], f'不支持的导出格式: {ext}'
+                targets.append((ext, format, dpi))
+        base_name = os.path.splitext(os.path.basename(file_name))[0]
+        output_paths = render_engine.profile_file_names(os.path.join(output_dir, base_name), targets)
+
+        # 相同内容已导出过时直接取渲染缓存，否则只绘制一次图形再导出各格式
+        # （已按文件分配到多个进程，单个文件内不再另开栅格化进程）
+        rendered = render_engine.render_targets(
+            data.names, data.angles, data.by_order, traffic_rule=data.traffic_rule,
+            targets=[(format, target_dpi) for _, format, target_dpi in targets],
+            num_entries=data.num_entries, max_workers=0, **kwargs)
+        outputs = []
+        for (_, format, target_dpi), output_path in zip(targets, output_paths):
+            with open(output_path, 'wb') as f:
+                f.write(rendered[(format, target_dpi)])
+            outputs.append(output_path)
+        return file_name, outputs, None
+    except Exception as e:
+        return file_name, [], str(e)
+
+
+def export_directory(input_dir, output_dir, formats=DEFAULT_FORMATS, dpi=None, pattern='*.txt',
+                     max_workers=None, road_font_size=None, flow_font_size=None, progress=None,
+                     profile=None):
+    """
+    批量导出目录中的所有数据文件
+
+    参数:
+        input_dir: 数据文件所在目录
+        output_dir: 导出目录（不存在时自动创建）
+        formats: 导出格式（扩展名）列表，如 ('svg', 'png', 'pdf')
+        dpi: 导出分辨率，None 表示使用 FIGURE_DPI
+        pattern: 数据文件匹配模式
+        max_workers: 工作进程数，None 表示每个CPU核一个进程
+        road_font_size / flow_font_size: 标注字号，None 表示使用默认值
+        progress: 可选回调 progress(已完成数, 总数, 结果)
+        profile: 导出方案（如 'svg,png@300,pdf'），指定时代替 formats
+
+    返回:
+        结果列表 [(file_name, 导出文件路径列表, 错误信息或None), ...]（按文件名排序）
+    """
+    files = find_data_files(input_dir, pattern)
+    if not files:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(files)))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(export_file, file_name, output_dir, tuple(formats), dpi,
+                            road_font_size, flow_font_size, profile)
+            for file_name in files
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            if progress:
+                progress(done, len(files), result)
+
+    results.sort(key=lambda r: r[0])
+    return results
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='批量导出交叉口流量流向图 / Batch export intersection diagrams')
+    parser.add_argument('input_dir', help='数据文件目录 / Directory of data files')
+    parser.add_argument('output_dir', help='导出目录 / Output directory')
+    parser.add_argument('--format', nargs='+', default=list(DEFAULT_FORMATS),
+                        help='导出格式，如 svg png pdf / Output formats')
+    parser.add_argument('--dpi', type=int, default=None, help='导出分辨率 / Output DPI')
+    parser.add_argument('--profile', default=None,
+                        help='导出方案，如 svg,png@300,png@600,pdf（代替 --format） / '
+                             'Export profile, e.g. svg,png@300,png@600,pdf (overrides --format)')
+    parser.add_argument('--pattern', default='*.txt', help='数据文件匹配模式 / File pattern')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数 / Worker processes')
+    args = parser.parse_args(argv)
+
+    def report(done, total, result):
+        file_name, outputs, error = result
+        status = '失败: ' + error if error else '完成'
+        print(f'[{done}/{total}] {os.path.basename(file_name)} {status}')
+
+    results = export_directory(args.input_dir, args.output_dir, formats=args.format, dpi=args.dpi,
+                               pattern=args.pattern, max_workers=args.workers, progress=report,
+                               profile=args.profile)
+    failed = [r for r in results if r[2]]
+    print(f'共 {len(results)} 个文件，成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+绘图流水线基准测试
+生成 3-12 路的合成交叉口数据，覆盖左/右行规则和多种流量分布
+（均匀、偏态、大量零流量），分别计时流水线的每个阶段：
+流量矩阵构建、车道偏移计算、几何图形生成、文字排版、canvas.draw 以及各格式 savefig。
+结果写入 JSON，可与上一版本的结果对比以发现性能回退。
+交互重绘耗时（几何图形 + 文字排版（缓存命中）+ canvas.draw）可设上限，超过时返回非零退出码。
+
+用法:
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --legs 3 4 5 6 --repeat 5 --baseline last.json --threshold 0.2
+    python benchmarks/bench_pipeline.py --legs 12 --formats png --budget 100
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+# 允许直接以脚本方式运行（项目模块位于上一级目录）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import drawing_utils
+import flow_model
+import render_engine
+
+# 默认测试的路数、交通规则、流量分布和导出格式
+DEFAULT_LEGS = (3, 4, 5, 6, 8, 12)
+TRAFFIC_RULES = ('right', 'left')
+FLOW_PROFILES = ('uniform', 'skewed', 'zero_heavy')
+DEFAULT_FORMATS = ('svg', 'pdf', 'png')
+# 交互重绘包含的阶段（修改数据或字号后绘图窗口重新绘制的耗时）
+INTERACTIVE_STAGES = ('geometry', 'text_layout_warm', 'canvas_draw')
+# 默认的交互重绘耗时上限（毫秒）
+DEFAULT_INTERACTIVE_BUDGET_MS = 100.0
+
+
+def synthetic_intersection(num_entries, profile='uniform', seed=0):
+    """
+    生成合成交叉口数据
+
+    参数:
+        num_entries: 路数
+        profile: 流量分布，'uniform'（均匀）、'skewed'（对数正态长尾）、'zero_heavy'（约70%为零）
+        seed: 随机种子
+
+    返回:
+        (names, angles, old_flows)，old_flows[flow_idx][entry_idx] 与数据文件格式一致
+    """
+    rng = np.random.default_rng(seed)
+    names = [f'Road {i + 1}' for i in range(num_entries)]
+    # 方位角在均匀分布的基础上加入抖动，覆盖非正交交叉口
+    spacing = 360.0 / num_entries
+    angles = [round((i * spacing + rng.uniform(-0.2, 0.2) * spacing) % 360, 1) for i in range(num_entries)]
+
+    shape = (num_entries, num_entries)
+    if profile == 'skewed':
+        flows = rng.lognormal(mean=5.0, sigma=1.2, size=shape)
+    elif profile == 'zero_heavy':
+        flows = rng.uniform(50, 800, size=shape) * (rng.random(shape) > 0.7)
+    else:
+        flows = rng.uniform(50, 800, size=shape)
+    flows = np.round(flows)
+    return names, angles, flows.tolist()
+
+
+def _time(func, repeat):
+    """重复执行 func，返回 (耗时列表[ms], 最后一次的返回值)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def _summary(timings):
+    """耗时统计（毫秒）"""
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def bench_case(num_entries, traffic_rule, profile, repeat=5, formats=DEFAULT_FORMATS, font_file=None, seed=0):
+    """
+    对一个合成交叉口逐阶段计时
+
+    返回:
+        {'legs', 'traffic_rule', 'profile', 'stages': {阶段名: 统计}, 'output_bytes': {格式: 字节数}}
+    """
+    names, angles, old_flows = synthetic_intersection(num_entries, profile, seed)
+    by_order = np.asarray(old_flows, dtype=float)
+    stages = {}
+
+    def build_matrix():
+        flows = flow_model.build_flow_matrix(by_order, traffic_rule)
+        flow_model.compute_totals(flows)
+        return flows
+
+    timings, flows = _time(build_matrix, repeat)
+    stages['flow_matrix'] = _summary(timings)
+
+    timings, _ = _time(lambda: flow_model.compute_lane_offsets(flows, traffic_rule), repeat)
+    stages['lane_offsets'] = _summary(timings)
+
+    model = render_engine.prepare_intersection(names, angles, old_flows, num_entries, traffic_rule)
+
+    def new_axes():
+        fig = Figure(figsize=drawing_utils.FIGURE_SIZE, dpi=drawing_utils.FIGURE_DPI)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
+        ax.set_aspect('equal')
+        ax.set_xlim(*drawing_utils.PLOT_XLIM)
+        ax.set_ylim(*drawing_utils.PLOT_YLIM)
+        ax.set_axis_off()
+        return fig, ax
+
+    geometry_timings = []
+    for _ in range(repeat):
+        fig, ax = new_axes()
+        start = time.perf_counter()
+        render_engine.draw_geometry(ax, model)
+        geometry_timings.append((time.perf_counter() - start) * 1000)
+    stages['geometry'] = _summary(geometry_timings)
+
+    # 文字排版：冷启动（清空字形缓存）与缓存命中两种情况
+    cold_timings = []
+    warm_timings = []
+    for _ in range(repeat):
+        drawing_utils._layout_text.cache_clear()
+        drawing_utils._font_properties.cache_clear()
+        start = time.perf_counter()
+        labels = render_engine.draw_labels(ax, model, fontname=font_file)
+        cold_timings.append((time.perf_counter() - start) * 1000)
+        for artist in labels:
+            artist.remove()
+        start = time.perf_counter()
+        labels = render_engine.draw_labels(ax, model, fontname=font_file)
+        warm_timings.append((time.perf_counter() - start) * 1000)
+        for artist in labels:
+            artist.remove()
+    stages['text_layout_cold'] = _summary(cold_timings)
+    stages['text_layout_warm'] = _summary(warm_timings)
+    render_engine.draw_labels(ax, model, fontname=font_file)
+    fig.tight_layout()
+
+    timings, _ = _time(fig.canvas.draw, repeat)
+    stages['canvas_draw'] = _summary(timings)
+
+    output_bytes = {}
+    for format in formats:
+        def save():
+            buffer = io.BytesIO()
+            render_engine.save_figure(fig, buffer, format=format)
+            return buffer.getbuffer().nbytes
+        timings, size = _time(save, repeat)
+        stages[f'savefig_{format}'] = _summary(timings)
+        output_bytes[format] = size
+
+    return {
+        'legs': num_entries,
+        'traffic_rule': traffic_rule,
+        'profile': profile,
+        'stages': stages,
+        'interactive_ms': round(sum(stages[name]['median_ms'] for name in INTERACTIVE_STAGES), 3),
+        'output_bytes': output_bytes,
+    }
+
+
+def environment_info():
+    """记录运行环境，便于比较不同机器/版本的结果"""
+    try:
+        import update_checker
+        app_version = update_checker.get_current_version()
+    except Exception:
+        app_version = None
+    return {
+        'app_version': app_version,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run(legs=DEFAULT_LEGS, rules=TRAFFIC_RULES, profiles=FLOW_PROFILES, repeat=5,
+        formats=DEFAULT_FORMATS, progress=None):
+    """运行全部基准测试，返回可直接写入 JSON 的结果"""
+    font_file = render_engine.find_font_file()
+    results = []
+    for num_entries in legs:
+        for traffic_rule in rules:
+            for profile in profiles:
+                result = bench_case(num_entries, traffic_rule, profile, repeat=repeat,
+                                    formats=formats, font_file=font_file)
+                results.append(result)
+                if progress:
+                    progress(result)
+    return {'environment': environment_info(), 'repeat': repeat, 'results': results}
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    与基线结果比较中位耗时
+
+    返回:
+        回退列表 [(用例名, 阶段, 基线ms, 当前ms), ...]（当前值超过基线 threshold 比例）
+    """
+    def key(result):
+        return (result['legs'], result['traffic_rule'], result['profile'])
+
+    baseline_cases = {key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        base = baseline_cases.get(key(result))
+        if base is None:
+            continue
+        for stage, stats in result['stages'].items():
+            base_stats = base['stages'].get(stage)
+            if not base_stats:
+                continue
+            if stats['median_ms'] > base_stats['median_ms'] * (1 + threshold):
+                name = '{}路/{}/{}'.format(*key(result))
+                regressions.append((name, stage, base_stats['median_ms'], stats['median_ms']))
+    return regressions
+
+
+def over_budget(results, budget_ms):
+    """
+    交互重绘耗时超过上限的用例
+
+    返回:
+        [(用例名, 耗时ms), ...]
+    """
+    return [('{}路/{}/{}'.format(r['legs'], r['traffic_rule'], r['profile']), r['interactive_ms'])
+            for r in results['results'] if r['interactive_ms'] > budget_ms]
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='绘图流水线基准测试 / Drawing pipeline benchmarks')
+    parser.add_argument('--legs', type=int, nargs='+', default=list(DEFAULT_LEGS), help='路数 / Leg counts')
+    parser.add_argument('--rules', nargs='+', choices=TRAFFIC_RULES, default=list(TRAFFIC_RULES),
+                        help='交通规则 / Traffic rules')
+    parser.add_argument('--profiles', nargs='+', choices=FLOW_PROFILES, default=list(FLOW_PROFILES),
+                        help='流量分布 / Flow profiles')
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS), help='导出格式 / Output formats')
+    parser.add_argument('--repeat', type=int, default=5, help='每个阶段重复次数 / Repeats per stage')
+    parser.add_argument('--output', default=None, help='结果 JSON 文件 / Result JSON file')
+    parser.add_argument('--baseline', default=None, help='基线结果 JSON / Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='判定回退的中位耗时增幅 / Allowed median slowdown ratio')
+    parser.add_argument('--budget', type=float, default=None, nargs='?', const=DEFAULT_INTERACTIVE_BUDGET_MS,
+                        help=f'交互重绘耗时上限（毫秒，默认 {DEFAULT_INTERACTIVE_BUDGET_MS:g}） / '
+                             f'Interactive redraw budget in ms')
+    args = parser.parse_args(argv)
+
+    def report(result):
+        stages = result['stages']
+        total = sum(s['median_ms'] for name, s in stages.items() if name != 'text_layout_cold')
+        print(f"{result['legs']}路 {result['traffic_rule']:5s} {result['profile']:10s} "
+              f"geometry {stages['geometry']['median_ms']:7.2f} ms  "
+              f"draw {stages['canvas_draw']['median_ms']:7.2f} ms  "
+              f"interactive {result['interactive_ms']:7.2f} ms  total {total:8.2f} ms")
+
+    results = run(args.legs, args.rules, args.profiles, args.repeat, args.formats, progress=report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'结果已写入 {args.output}')
+
+    exit_code = 0
+    if args.budget is not None:
+        slow_cases = over_budget(results, args.budget)
+        for name, interactive_ms in slow_cases:
+            print(f'超过交互重绘上限: {name} {interactive_ms:.2f} ms > {args.budget:.2f} ms')
+        if slow_cases:
+            exit_code = 1
+        else:
+            print(f'交互重绘均在 {args.budget:.2f} ms 以内')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, stage, base_ms, current_ms in regressions:
+            print(f'回退: {name} {stage} {base_ms:.2f} ms -> {current_ms:.2f} ms')
+        if regressions:
+            return 1
+        print('未发现性能回退')
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+命令行渲染模块
+不创建窗口、不导入 tkinter / ttkbootstrap / 更新模块，直接把数据文件渲染为图片，
+供流水线逐个调用。
+
+用法:
+    python main.py --input 测试数据_4路.txt --output 4路.png --dpi 300
+    python cli.py -i 测试数据_4路.txt -o 4路.svg --traffic-rule left --road-font-size 18
+    python cli.py -i 多时段.txt -o 高峰小时.svg --peak-hour
+    python cli.py -i 多时段.txt -o 早高峰.svg --period 07:00-07:15 --window 4
+    python cli.py -i 测试数据_4路.txt -o 4路 --profile svg,png@300,png@600,pdf
+"""
+import os
+import sys
+import argparse
+
+
+def is_cli_invocation(argv):
+    """
+    判断启动参数是否要求命令行模式（存在以 - 开头的参数）
+    macOS 从 Finder 启动时会附带 -psn_ 参数，不视为命令行模式
+    """
+    return any(arg.startswith('-') and not arg.startswith('-psn') for arg in argv)
+
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='渲染交叉口流量流向图（不启动图形界面） / Render an intersection diagram without the GUI',
+    )
+    parser.add_argument('-i', '--input', required=True, help='数据文件 / Data file')
+    parser.add_argument('-o', '--output',
+                        help='导出文件，默认与数据文件同名 / Output file (defaults to the input name)')
+    parser.add_argument('-f', '--format',
+                        help='导出格式，默认取导出文件扩展名，否则为 svg / Output format')
+    parser.add_argument('--dpi', type=int, default=None, help='导出分辨率 / Output DPI')
+    parser.add_argument('--profile', default=None,
+                        help='导出方案，如 svg,png@300,pdf，一次绘制导出多个文件（--output 为不含扩展名的路径） / '
+                             'Export profile, e.g. svg,png@300,pdf (--output is the path without extension)')
+    parser.add_argument('--traffic-rule', choices=('right', 'left'), default=None,
+                        help='交通规则，默认取数据文件中的声明 / Traffic rule (defaults to the file)')
+    parser.add_argument('--road-font-size', type=int, default=None, help='路名标注字号 / Road label font size')
+    parser.add_argument('--flow-font-size', type=int, default=None, help='流量标注字号 / Flow label font size')
+    parser.add_argument('--font', default=None, help='字体文件 / Font file')
+    period_group = parser.add_mutually_exclusive_group()
+    period_group.add_argument('--period', default=None,
+                              help='多时段文件：绘制的时段名称或序号（从1开始） / Period label or 1-based index')
+    period_group.add_argument('--peak-hour', action='store_true',
+                              help='多时段文件：绘制高峰小时合计 / Render the peak-hour total')
+    parser.add_argument('--window', type=int, default=1,
+                        help='与 --period 一起使用：合计的连续时段数 / Number of periods to sum from --period')
+    return parser
+
+
+def resolve_output(input_file, output, format):
+    """
+    确定导出文件路径和格式
+
+    返回:
+        (output_path, format)；格式不受支持时 format 为 None
+    """
+    import render_engine
+
+    if format:
+        format = format.lower().lstrip('.')
+        if not output:
+            output = os.path.splitext(input_file)[0] + '.' + format
+        format = render_engine.format_from_extension('output.' + format)
+        return output, format
+
+    if not output:
+        output = os.path.splitext(input_file)[0] + '.svg'
+    return output, render_engine.format_from_extension(output)
+
+
+def select_flows(series, period=None, window=1, peak_hour=False):
+    """
+    从多时段数据中取出要绘制的流量
+
+    返回:
+        (old_flows, 时段说明)；时段不存在时抛出 ValueError
+    """
+    if peak_hour:
+        start, length, by_order = series.peak_hour()
+        return by_order.tolist(), series.window_label(start, length)
+    start = series.find_period(period)
+    if start is None:
+        raise ValueError(f'时段不存在 / No such period: {period}')
+    try:
+        by_order = series.aggregate(start, window)
+    except IndexError as e:
+        raise ValueError(str(e))
+    return by_order.tolist(), series.window_label(start, window)
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码"""
+    args = build_parser().parse_args(argv)
+
+    import data_parser
+    import render_engine
+
+    try:
+        loaded = data_parser.load_flow_series(args.input)
+    except OSError as e:
+        print(f'无法读取数据文件 / Cannot read data file: {e}', file=sys.stderr)
+        return 1
+    if loaded is None:
+        print(f'无法解析数据文件 / Cannot parse data file: {args.input}', file=sys.stderr)
+        return 1
+    num_entries, traffic_rule, names, angles, old_flows, series = loaded
+    if args.period is not None or args.peak_hour:
+        if series is None:
+            print(f'数据文件没有时段数据 / No period data in file: {args.input}', file=sys.stderr)
+            return 1
+        try:
+            old_flows, period_label = select_flows(series, args.period, args.window, args.peak_hour)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        print(f'时段 / Period: {period_label}', file=sys.stderr)
+    if args.traffic_rule:
+        traffic_rule = args.traffic_rule
+
+    kwargs = {}
+    if args.road_font_size is not None:
+        kwargs['road_font_size'] = args.road_font_size
+    if args.flow_font_size is not None:
+        kwargs['flow_font_size'] = args.flow_font_size
+    dpi = args.dpi if args.dpi else render_engine.FIGURE_DPI
+
+    if args.profile:
+        return export_profile(args, names, angles, old_flows, traffic_rule, num_entries, dpi, kwargs)
+
+    output, format = resolve_output(args.input, args.output, args.format)
+    if format is None:
+        print(f'不支持的导出格式 / Unsupported format: {args.format or output}', file=sys.stderr)
+        return 2
+
+    try:
+        # 相同内容已导出过时直接取渲染缓存
+        data = render_engine.render_to_bytes(names, angles, old_flows, traffic_rule=traffic_rule,
+                                             format=format, dpi=dpi, font_file=args.font,
+                                             num_entries=num_entries, **kwargs)
+        with open(output, 'wb') as f:
+            f.write(data)
+    except Exception as e:
+        print(f'导出失败 / Export failed: {e}', file=sys.stderr)
+        return 1
+
+    print(output)
+    import profiling
+    profiling.flush(args.input, file=sys.stderr)
+    return 0
+
+
+def export_profile(args, names, angles, old_flows, traffic_rule, num_entries, dpi, kwargs):
+    """按导出方案绘制一次图形并写出全部文件，返回进程退出码"""
+    import render_engine
+
+    try:
+        targets = render_engine.parse_export_profile(args.profile, dpi)
+    except ValueError as e:
+        print(f'无效的导出方案 / Invalid export profile: {e}', file=sys.stderr)
+        return 2
+    base_path = args.output or os.path.splitext(args.input)[0]
+    if render_engine.format_from_extension(base_path) is not None:
+        base_path = os.path.splitext(base_path)[0]
+    output_paths = render_engine.profile_file_names(base_path, targets)
+
+    try:
+        rendered = render_engine.render_targets(names, angles, old_flows, traffic_rule=traffic_rule,
+                                                targets=[(format, dpi) for _, format, dpi in targets],
+                                                font_file=args.font, num_entries=num_entries, **kwargs)
+        for (_, format, target_dpi), output in zip(targets, output_paths):
+            with open(output, 'wb') as f:
+                f.write(rendered[(format, target_dpi)])
+    except Exception as e:
+        print(f'导出失败 / Export failed: {e}', file=sys.stderr)
+        return 1
+
+    for output in output_paths:
+        print(output)
+    import profiling
+    profiling.flush(args.input, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,24 @@
 # -*- coding: utf-8 -*-
-"""配置管理模块"""
+"""
+配置管理模块
+配置读取一次后缓存在内存中（文件被外部修改时自动重新读取）；
+保存时只更新内存，短时间内的多次保存合并为一次写入，程序退出前调用 flush_config 写入。
+"""
 import os
 import sys
+import atexit
+import threading
 
 # ==================== 配置文件管理 ====================
 CONFIG_FILE = 'config.txt'
+# 用户缓存目录名（渲染缓存、字体缓存等可随时删除的数据，见 get_cache_dir）
+CACHE_DIR_NAME = 'IntersectionTrafficFlow'
+# 保存配置的合并写入延迟（秒）
+SAVE_DELAY_SECONDS = 1.0
+
+# 内存中的配置：文件路径、配置内容、读取时的文件标记、是否有未写入的修改、延迟写入定时器
+_state = {'path': None, 'config': None, 'stamp': None, 'dirty': False, 'timer': None}
+_lock = threading.RLock()
 
 def get_config_path():
     """获取配置文件路径"""
@@ -16,17 +30,46 @@ def get_config_path():
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, CONFIG_FILE)
 
-def load_config():
-    """加载配置文件"""
-    config_path = get_config_path()
-    default_config = {
+def get_cache_dir():
+    """
+    获取当前用户的缓存目录（不保证已存在，写入前由调用方创建）
+    Windows: %LOCALAPPDATA%\\IntersectionTrafficFlow
+    macOS: ~/Library/Caches/IntersectionTrafficFlow
+    其他: $XDG_CACHE_HOME/IntersectionTrafficFlow（默认 ~/.cache/IntersectionTrafficFlow）
+    """
+    if sys.platform == 'win32':
+        base_path = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base_path = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base_path = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_path, CACHE_DIR_NAME)
+
+def default_config():
+    """默认配置"""
+    return {
         'language': 'zh_CN',
         'traffic_rule': 'right',
         # 绘图文字默认字号（与 drawing_utils 中的默认值保持一致）
         'road_label_font_size': 15,
         'flow_label_font_size': 12,
+        # 性能分析（见 profiling 模块），默认关闭
+        'profiling': False,
+        # 批量导出方案（见 render_engine.parse_export_profile），一次绘制导出多种格式和分辨率
+        'export_profile': 'svg,png@300,pdf',
     }
-    
+
+def _file_stamp(config_path):
+    """配置文件的修改时间和大小，用于判断缓存是否失效；文件不存在时返回 None"""
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _parse_config(config_path):
+    """解析配置文件，无效或缺失的字段使用默认值"""
+    cfg = default_config()
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
@@ -50,84 +93,149 @@ def load_config():
                         try:
                             import i18n
                             if value in i18n.LANGUAGES:
-                                default_config['language'] = value
+                                cfg['language'] = value
                         except:
                             if value in ['zh_CN', 'en_US']:
-                                default_config['language'] = value
+                                cfg['language'] = value
                     elif key == 'traffic_rule' and value in ['left', 'right']:
-                        default_config['traffic_rule'] = value
+                        cfg['traffic_rule'] = value
                     elif key == 'road_label_font_size':
                         try:
                             size = int(value)
                             if 6 <= size <= 30:
-                                default_config['road_label_font_size'] = size
+                                cfg['road_label_font_size'] = size
                         except:
                             pass
                     elif key == 'flow_label_font_size':
                         try:
                             size = int(value)
                             if 6 <= size <= 30:
-                                default_config['flow_label_font_size'] = size
+                                cfg['flow_label_font_size'] = size
                         except:
                             pass
+                    elif key == 'profiling':
+                        cfg['profiling'] = value.lower() in ('on', 'true', '1', 'yes')
+                    elif key == 'export_profile' and value:
+                        cfg['export_profile'] = value
         except Exception as e:
             # 如果读取失败，使用默认值
             print(f"加载配置文件失败: {e}")
-    
-    return default_config
+    return cfg
+
+def _format_config(cfg):
+    """生成配置文件内容（带中英文说明）"""
+    lines = [
+        "# 交叉口交通流量流向可视化工具配置文件 / Intersection Traffic Flow Visualization Tool Config File",
+        "# 此文件由程序自动生成，可以手动编辑 / This file is auto-generated and can be manually edited",
+        "#",
+        "# 语言设置 / Language Setting:",
+        "#   zh_CN - 简体中文 (Simplified Chinese)",
+        "#   en_US - English (英语)",
+        "#",
+        "# 通行规则 / Traffic Rule:",
+        "#   left  - 左行 (Left-hand traffic)",
+        "#   right - 右行 (Right-hand traffic)",
+        "#",
+        "# 绘图文字字号 / Plot Text Sizes:",
+        "#   road_label_font_size  - 路名标注字号 / Road name label size",
+        "#   flow_label_font_size  - 流量标注字号 / Flow value label size",
+        "#",
+        "# 性能分析 / Profiling (on/off):",
+        "#   on - 记录各绘图阶段耗时并写入 profile_trace.json / Record per-stage timings to profile_trace.json",
+        "#",
+        "# 批量导出方案 / Export Profile:",
+        "#   逗号分隔的格式，@ 后为分辨率，如 svg,png@300,png@600,pdf",
+        "#   Comma-separated formats with optional @dpi, e.g. svg,png@300,png@600,pdf",
+        "#",
+        f"language={cfg['language']}",
+        f"traffic_rule={cfg['traffic_rule']}",
+        f"road_label_font_size={cfg['road_label_font_size']}",
+        f"flow_label_font_size={cfg['flow_label_font_size']}",
+        f"profiling={'on' if cfg['profiling'] else 'off'}",
+        f"export_profile={cfg['export_profile']}",
+    ]
+    return '\n'.join(lines) + '\n'
+
+def load_config():
+    """
+    加载配置（返回副本，修改后需通过 save_config 保存）
+    首次调用时读取配置文件，之后使用内存中的配置；文件被外部修改（修改时间或大小变化）时重新读取。
+    有尚未写入的修改时以内存中的配置为准。
+    """
+    config_path = get_config_path()
+    with _lock:
+        if _state['path'] != config_path:
+            _state.update(path=config_path, config=None, stamp=None, dirty=False)
+        if not _state['dirty']:
+            stamp = _file_stamp(config_path)
+            if _state['config'] is None or stamp != _state['stamp']:
+                _state['config'] = _parse_config(config_path)
+                _state['stamp'] = stamp
+        return dict(_state['config'])
 
 def save_config(table=None, road_label_font_size=None, flow_label_font_size=None):
-    """保存配置文件
+    """保存配置（先更新内存中的配置，SAVE_DELAY_SECONDS 内的多次保存合并为一次写入）
     
     参数:
-        table: Table对象，用于获取traffic_rule。如果为None，使用默认值'right'
+        table: Table对象，用于获取traffic_rule。如果为None，保持现有配置
     """
-    config_path = get_config_path()
     # 先加载现有配置，保证未指定的字段保持不变
     current = load_config()
     # 延迟导入i18n模块，避免循环依赖
     try:
         import i18n
-        language = i18n.CURRENT_LANGUAGE
+        current['language'] = i18n.CURRENT_LANGUAGE
     except:
-        language = 'zh_CN'
+        pass
     
     # 获取traffic_rule
     if table and hasattr(table, 'traffic_rule'):
-        traffic_rule = table.traffic_rule
-    else:
-        traffic_rule = current.get('traffic_rule', 'right')  # 默认值或现有配置
+        current['traffic_rule'] = table.traffic_rule
 
     # 处理字号配置
-    if road_label_font_size is None:
-        road_label_font_size = current.get('road_label_font_size', 15)
-    if flow_label_font_size is None:
-        flow_label_font_size = current.get('flow_label_font_size', 12)
-    
-    try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            f.write("# 交叉口交通流量流向可视化工具配置文件 / Intersection Traffic Flow Visualization Tool Config File\n")
-            f.write("# 此文件由程序自动生成，可以手动编辑 / This file is auto-generated and can be manually edited\n")
-            f.write("#\n")
-            f.write("# 语言设置 / Language Setting:\n")
-            f.write("#   zh_CN - 简体中文 (Simplified Chinese)\n")
-            f.write("#   en_US - English (英语)\n")
-            f.write("#\n")
-            f.write("# 通行规则 / Traffic Rule:\n")
-            f.write("#   left  - 左行 (Left-hand traffic)\n")
-            f.write("#   right - 右行 (Right-hand traffic)\n")
-            f.write("#\n")
-            f.write("# 绘图文字字号 / Plot Text Sizes:\n")
-            f.write("#   road_label_font_size  - 路名标注字号 / Road name label size\n")
-            f.write("#   flow_label_font_size  - 流量标注字号 / Flow value label size\n")
-            f.write("#\n")
-            f.write(f"language={language}\n")
-            f.write(f"traffic_rule={traffic_rule}\n")
-            f.write(f"road_label_font_size={road_label_font_size}\n")
-            f.write(f"flow_label_font_size={flow_label_font_size}\n")
-    except Exception as e:
-        print(f"保存配置文件失败: {e}")
+    if road_label_font_size is not None:
+        current['road_label_font_size'] = road_label_font_size
+    if flow_label_font_size is not None:
+        current['flow_label_font_size'] = flow_label_font_size
+
+    with _lock:
+        if current == _state['config'] and _state['stamp'] is not None:
+            # 内容未变化且文件已存在，无需写入
+            return
+        _state['config'] = current
+        _state['dirty'] = True
+        if _state['timer'] is not None:
+            _state['timer'].cancel()
+        timer = threading.Timer(SAVE_DELAY_SECONDS, flush_config)
+        timer.daemon = True
+        _state['timer'] = timer
+        timer.start()
 
+def flush_config():
+    """立即写入尚未保存的配置（先写临时文件再替换，写入中途退出不会损坏原文件）"""
+    with _lock:
+        if _state['timer'] is not None:
+            _state['timer'].cancel()
+            _state['timer'] = None
+        if not _state['dirty']:
+            return
+        config_path = _state['path']
+        temp_path = config_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(_format_config(_state['config']))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, config_path)
+            _state['stamp'] = _file_stamp(config_path)
+        except Exception as e:
+            print(f"保存配置文件失败: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        # 写入失败时不再重试，内存中的配置仍然有效
+        _state['dirty'] = False
 
 # 获取当前table对象的traffic_rule（供外部调用）
 def get_traffic_rule():
@@ -135,3 +243,7 @@ def get_traffic_rule():
     # 这个函数需要从外部传入table对象，或者使用全局变量
     # 暂时返回默认值
     return 'right'
+
+
+# 正常退出时写入尚未保存的配置（os._exit 退出前需手动调用 flush_config）
+atexit.register(flush_config)
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+流量档案模块（列式二进制存储，基于 NumPy memmap）
+多年的交叉口计数如果逐个读取文本文件、逐值转换字符串，解析开销和内存占用都很大。
+档案是一个目录，每一列是一个原始二进制文件，读取时用 np.memmap 映射，
+取某个交叉口、某个时间范围只是映射区域上的切片，不会读取整个档案。
+
+目录结构:
+    meta.json     档案信息、名称字典、交叉口表（每个交叉口的路数、交通规则和各列中的起始位置）
+    flows.f32     全部记录的流量（float32），每个交叉口连续存放，形如 (记录数, N, N) 的 by_order
+    time.i64      每条记录的时间（int64，单位由调用方约定，默认为时段序号）
+    angles.f32    各交叉口的进口方位角（float32）
+    name_ids.i32  各交叉口的进口名称在名称字典中的序号（int32）
+
+用法:
+    python count_archive.py import 档案目录 测试数据_4路.txt 多时段.txt
+    python count_archive.py info 档案目录
+    python count_archive.py render 档案目录 多时段 -o 高峰.svg --start 0 --stop 4
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+
+import numpy as np
+
+# 档案格式版本
+ARCHIVE_VERSION = 1
+# 档案信息文件名
+META_FILE = 'meta.json'
+# 各列的文件名和数据类型
+COLUMNS = {
+    'flows': ('flows.f32', np.float32),
+    'time': ('time.i64', np.int64),
+    'angles': ('angles.f32', np.float32),
+    'name_ids': ('name_ids.i32', np.int32),
+}
+# 写入过程中使用的临时目录、替换时旧档案暂存目录的后缀（与档案目录同级）
+BUILD_SUFFIX = '.building'
+OLD_SUFFIX = '.old'
+
+
+def _column_path(path, column):
+    return os.path.join(path, COLUMNS[column][0])
+
+
+def _is_archive_dir(path):
+    """目录不存在、为空或只包含档案文件时返回 True（这样的目录可以整体替换）"""
+    if not os.path.exists(path):
+        return True
+    if not os.path.isdir(path):
+        return False
+    archive_files = {META_FILE} | {file_name for file_name, _ in COLUMNS.values()}
+    return set(os.listdir(path)) <= archive_files
+
+
+class ArchiveWriter:
+    """
+    流式写入档案（每个交叉口的全部记录一次追加，保证在各列中连续存放）
+
+    数据先写入同级的临时目录，with 块正常结束（或调用 close）时才整体替换原有档案；
+    with 块中抛出异常时丢弃临时目录，原有档案保持不变。
+
+    用法:
+        with ArchiveWriter('counts.tfa') as writer:
+            writer.add_intersection('路口A', names, angles, by_order_series, times)
+    """
+
+    def __init__(self, path, interval_minutes=None):
+        self.path = os.path.normpath(path)
+        if not _is_archive_dir(self.path):
+            raise ValueError(f'目录中有档案以外的文件，不能作为档案目录: {path}')
+        self._build_path = self.path + BUILD_SUFFIX
+        shutil.rmtree(self._build_path, ignore_errors=True)  # 上次中断留下的临时目录
+        os.makedirs(self._build_path)
+        self.meta = {
+            'version': ARCHIVE_VERSION,
+            'interval_minutes': interval_minutes,
+            'names': [],
+            'intersections': [],
+            'num_records': 0,
+            'num_flow_values': 0,
+            'num_legs': 0,
+        }
+        self._name_index = {}
+        self._keys = set()
+        self._files = {column: open(_column_path(self._build_path, column), 'wb') for column in COLUMNS}
+
+    def _name_id(self, name):
+        name = str(name)
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = len(self.meta['names'])
+            self._name_index[name] = name_id
+            self.meta['names'].append(name)
+        return name_id
+
+    def add_intersection(self, key, names, angles, by_order, times=None, traffic_rule='right',
+                         interval_minutes=None):
+        """
+        追加一个交叉口的全部记录
+
+        参数:
+            key: 交叉口标识（如数据文件名），档案内唯一
+            names: 进口名称列表
+            angles: 进口方位角列表
+            by_order: 形如 (记录数, N, N) 的流量 by_order[record_idx, flow_idx, entry_idx]，
+                      单个快照可传 (N, N)
+            times: 每条记录的时间（严格升序，读取时按时间二分查找），None 时为 0, 1, 2, ...
+            traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+            interval_minutes: 记录的时段长度（分钟），None 表示不限定；
+                              档案内所有交叉口共用一个时段长度
+
+        标识重复、数据形状不一致、时间不是严格升序或时段长度与档案不一致时抛出 ValueError（不写入任何数据）
+        """
+        key = str(key)
+        if key in self._keys:
+            raise ValueError(f'档案中已有交叉口: {key}')
+        archive_interval = self.meta['interval_minutes']
+        if interval_minutes is not None and archive_interval is not None and interval_minutes != archive_interval:
+            raise ValueError(f'交叉口 {key} 的时段长度 {interval_minutes:g} 分钟与档案的 {archive_interval:g} 分钟不一致')
+        by_order = np.asarray(by_order, dtype=np.float32)
+        if by_order.ndim == 2:
+            by_order = by_order[None]
+        num_records, num_legs = by_order.shape[0], by_order.shape[-1]
+        if by_order.shape[1:] != (num_legs, num_legs) or len(names) < num_legs or len(angles) < num_legs:
+            raise ValueError(f'交叉口 {key} 的数据形状不一致: {by_order.shape}')
+        if times is None:
+            times = np.arange(num_records, dtype=np.int64)
+        times = np.asarray(times, dtype=np.int64)
+        if times.shape != (num_records,):
+            raise ValueError(f'交叉口 {key} 的时间列长度与记录数不一致')
+        if np.any(np.diff(times) <= 0):
+            raise ValueError(f'交叉口 {key} 的时间列不是严格升序')
+
+        if interval_minutes is not None:
+            self.meta['interval_minutes'] = interval_minutes
+        self._keys.add(key)
+        self.meta['intersections'].append({
+            'key': key,
+            'legs': num_legs,
+            'traffic_rule': traffic_rule,
+            'record_start': self.meta['num_records'],
+            'record_count': num_records,
+            'flow_start': self.meta['num_flow_values'],
+            'leg_start': self.meta['num_legs'],
+        })
+        self._files['flows'].write(np.ascontiguousarray(by_order).tobytes())
+        self._files['time'].write(times.tobytes())
+        self._files['angles'].write(np.asarray(angles[:num_legs], dtype=np.float32).tobytes())
+        name_ids = np.array([self._name_id(name) for name in names[:num_legs]], dtype=np.int32)
+        self._files['name_ids'].write(name_ids.tobytes())
+        self.meta['num_records'] += num_records
+        self.meta['num_flow_values'] += by_order.size
+        self.meta['num_legs'] += num_legs
+
+    def close(self):
+        """关闭列文件，写入档案信息，并用临时目录替换原有档案"""
+        for f in self._files.values():
+            f.close()
+        with open(os.path.join(self._build_path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+
+        # 目录不能直接覆盖非空目录：先把原档案移开，新档案就位后再删除原档案
+        old_path = None
+        if os.path.exists(self.path):
+            old_path = self.path + OLD_SUFFIX
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(self.path, old_path)
+        try:
+            os.replace(self._build_path, self.path)
+        except OSError:
+            if old_path:
+                os.replace(old_path, self.path)
+            raise
+        if old_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    def discard(self):
+        """关闭列文件并删除临时目录（原有档案保持不变）"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._build_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class CountArchive:
+    """只读访问档案（各列按需映射，切片不复制数据）"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f'不支持的档案版本: {self.meta.get("version")}')
+        self.names = self.meta['names']
+        self.intersections = self.meta['intersections']
+        self._index = {item['key']: idx for idx, item in enumerate(self.intersections)}
+        self._columns = {}
+
+    def _column(self, column):
+        """按需映射一列（空列返回空数组，np.memmap 不能映射长度为0的文件）"""
+        array = self._columns.get(column)
+        if array is None:
+            dtype = COLUMNS[column][1]
+            path = _column_path(self.path, column)
+            if os.path.getsize(path) == 0:
+                array = np.empty(0, dtype=dtype)
+            else:
+                array = np.memmap(path, dtype=dtype, mode='r')
+            self._columns[column] = array
+        return array
+
+    def __len__(self):
+        return len(self.intersections)
+
+    def keys(self):
+        """全部交叉口标识"""
+        return [item['key'] for item in self.intersections]
+
+    def _info(self, key):
+        """按标识或序号取交叉口信息"""
+        if isinstance(key, (int, np.integer)):
+            return self.intersections[key]
+        try:
+            return self.intersections[self._index[key]]
+        except KeyError:
+            raise KeyError(f'档案中没有交叉口: {key}')
+
+    def times(self, key):
+        """交叉口全部记录的时间（memmap 切片）"""
+        info = self._info(key)
+        start = info['record_start']
+        return self._column('time')[start:start + info['record_count']]
+
+    def record_range(self, key, start_time=None, stop_time=None):
+        """
+        时间范围 [start_time, stop_time) 对应的记录范围（时间列升序，二分查找）
+
+        返回:
+            (起始记录, 结束记录)，相对于该交叉口
+        """
+        times = self.times(key)
+        first = 0 if start_time is None else int(np.searchsorted(times, start_time, side='left'))
+        last = len(times) if stop_time is None else int(np.searchsorted(times, stop_time, side='left'))
+        return first, max(first, last)
+
+    def flows(self, key, start_time=None, stop_time=None):
+        """
+        交叉口在时间范围内的流量
+
+        返回:
+            float32 memmap 视图，形如 (记录数, N, N) 的 by_order（不复制数据）
+        """
+        info = self._info(key)
+        legs = info['legs']
+        first, last = self.record_range(key, start_time, stop_time)
+        size = legs * legs
+        begin = info['flow_start'] + first * size
+        end = info['flow_start'] + last * size
+        return self._column('flows')[begin:end].reshape(last - first, legs, legs)
+
+    def entry_info(self, key):
+        """
+        交叉口的进口信息
+
+        返回:
+            (num_entries, traffic_rule, names, angles)
+        """
+        info = self._info(key)
+        legs = info['legs']
+        start = info['leg_start']
+        name_ids = self._column('name_ids')[start:start + legs]
+        names = [self.names[name_id] for name_id in name_ids]
+        angles = [float(angle) for angle in self._column('angles')[start:start + legs]]
+        return legs, info['traffic_rule'], names, angles
+
+    def flow_matrices(self, key, start_time=None, stop_time=None):
+        """时间范围内各记录的进口→出口流量矩阵，形如 (记录数, N, N)"""
+        import flow_model
+
+        info = self._info(key)
+        return flow_model.build_flow_matrix(self.flows(key, start_time, stop_time), info['traffic_rule'])
+
+    def series(self, key, start_time=None, stop_time=None):
+        """时间范围内的记录转换为 flow_series.FlowSeries（只读取该范围）"""
+        import flow_series
+
+        first, last = self.record_range(key, start_time, stop_time)
+        labels = [str(t) for t in self.times(key)[first:last]]
+        interval = self.meta.get('interval_minutes') or flow_series.DEFAULT_INTERVAL_MINUTES
+        return flow_series.FlowSeries(self.flows(key, start_time, stop_time), labels, interval)
+
+    def load_intersection(self, key, start_time=None, stop_time=None):
+        """
+        时间范围内的流量合计，返回值与 data_parser.load_intersection 相同，可直接用于绘图
+
+        返回:
+            (num_entries, traffic_rule, names, angles, old_flows)
+        """
+        num_entries, traffic_rule, names, angles = self.entry_info(key)
+        old_flows = self.flows(key, start_time, stop_time).sum(axis=0, dtype=np.float64)
+        return num_entries, traffic_rule, names, angles, old_flows.tolist()
+
+
+def import_files(path, file_names, progress=None):
+    """
+    将数据文件写入档案（多时段文件写入全部时段，普通文件写入一条快照记录）
+
+    参数:
+        path: 档案目录（全部文件写入成功后才替换已存在的档案，失败时原档案保持不变）
+        file_names: 数据文件列表，交叉口标识取文件名（不含扩展名）
+        progress: 可选回调 progress(文件名, 错误信息或None)
+
+    返回:
+        写入的交叉口数
+
+    两个文件的交叉口标识相同（文件名相同）或多时段文件的时段长度不一致时抛出 ValueError
+    """
+    import data_parser
+
+    count = 0
+    with ArchiveWriter(path) as writer:
+        for file_name in file_names:
+            loaded = data_parser.load_flow_series(file_name)
+            if loaded is None:
+                if progress:
+                    progress(file_name, '文件无法解析')
+                continue
+            num_entries, traffic_rule, names, angles, old_flows, series = loaded
+            by_order = series.by_order if series is not None else old_flows
+            interval = series.interval_minutes if series is not None else None
+            key = os.path.splitext(os.path.basename(file_name))[0]
+            writer.add_intersection(key, names, angles, by_order, traffic_rule=traffic_rule,
+                                    interval_minutes=interval)
+            count += 1
+            if progress:
+                progress(file_name, None)
+    return count
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='流量档案 / Count archive')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='由数据文件创建档案 / Build an archive from data files')
+    import_parser.add_argument('archive', help='档案目录 / Archive directory')
+    import_parser.add_argument('files', nargs='+', help='数据文件 / Data files')
+
+    info_parser = commands.add_parser('info', help='列出档案中的交叉口 / List intersections')
+    info_parser.add_argument('archive', help='档案目录 / Archive directory')
+
+    render_parser = commands.add_parser('render', help='绘制档案中的一个交叉口 / Render one intersection')
+    render_parser.add_argument('archive', help='档案目录 / Archive directory')
+    render_parser.add_argument('key', help='交叉口标识 / Intersection key')
+    render_parser.add_argument('-o', '--output', required=True, help='导出文件 / Output file')
+    render_parser.add_argument('--start', type=int, default=None, help='起始时间（含） / Start time')
+    render_parser.add_argument('--stop', type=int, default=None, help='结束时间（不含） / Stop time')
+    render_parser.add_argument('--dpi', type=int, default=None, help='导出分辨率 / Output DPI')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        def report(file_name, error):
+            print(f'{os.path.basename(file_name)} {"失败: " + error if error else "完成"}')
+        try:
+            count = import_files(args.archive, args.files, progress=report)
+        except ValueError as e:
+            print(f'导入失败 / Import failed: {e}', file=sys.stderr)
+            return 1
+        print(f'共写入 {count} 个交叉口')
+        return 0 if count else 1
+
+    try:
+        archive = CountArchive(args.archive)
+    except (OSError, ValueError) as e:
+        print(f'无法打开档案 / Cannot open archive: {e}', file=sys.stderr)
+        return 1
+
+    if args.command == 'info':
+        for key in archive.keys():
+            info = archive._info(key)
+            times = archive.times(key)
+            span = f'{times[0]}..{times[-1]}' if len(times) else '-'
+            print(f"{key}\t{info['legs']}路\t{info['traffic_rule']}\t{info['record_count']} 条记录\t{span}")
+        return 0
+
+    import render_engine
+
+    format = render_engine.format_from_extension(args.output)
+    if format is None:
+        print(f'不支持的导出格式 / Unsupported format: {args.output}', file=sys.stderr)
+        return 2
+    try:
+        num_entries, traffic_rule, names, angles, old_flows = archive.load_intersection(
+            args.key, args.start, args.stop)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+    data = render_engine.render_to_bytes(names, angles, old_flows, traffic_rule=traffic_rule, format=format,
+                                         dpi=args.dpi if args.dpi else render_engine.FIGURE_DPI,
+                                         num_entries=num_entries)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    print(args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""
+数据文件解析模块
+不依赖 tkinter，供图形界面（file_operations）、批量导出和命令行共用。
+
+文件只读取一次（二进制），编码由 BOM 或文件开头的有限字节判断；
+各行由 tokenize_lines 逐行转换为记号，parse_intersection_file 直接构建带数值数组的 FlowRecord。
+"""
+import re
+import codecs
+from collections import namedtuple
+
+# 多时段数据块的关键字（见 flow_series 模块）
+PERIOD_KEY = 'period'
+INTERVAL_KEY = 'interval'
+
+# 支持的路数范围
+MIN_ENTRIES = 3
+MAX_ENTRIES = 12
+
+# 按 BOM 判断的编码（UTF-32 的 BOM 以 UTF-16 的 BOM 开头，需先判断）
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# 没有 BOM 时依次试探的编码（gb18030 兼容 gbk/gb2312，latin1 总能解码）
+FALLBACK_ENCODINGS = ('utf-8', 'gbk', 'gb18030', 'latin1')
+# 试探编码时读取的字节数
+SNIFF_BYTES = 64 * 1024
+
+# 旧格式的流向 key
+LEGACY_KEYS = {
+    'u_turns': 'flow_0',
+    'left_turns': 'flow_1',
+    'straights': 'flow_2',
+    'right_turns': 'flow_3',
+}
+
+_DECLARATION_RE = re.compile(r'本交叉口为(\d+)路交叉口')
+_RULE_RE = re.compile(r'实行([左右])行通行规则')
+_OLD_RULE_RE = re.compile(r'交通规则[：:]\s*([左右])行')
+
+FlowRecord = namedtuple('FlowRecord', ['num_entries', 'traffic_rule', 'names', 'angles', 'flows', 'series'])
+FlowRecord.__doc__ = """\
+解析后的交叉口数据
+    num_entries: 路数
+    traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+    names: 进口名称列表
+    angles: 进口方位角列表（浮点数）
+    flows: 快照流量，形如 (N, N) 的 NumPy 数组 flows[flow_idx, entry_idx]（即 old_flows）
+    series: 多时段数据 flow_series.FlowSeries，没有时为 None
+"""
+
+
+def convert_to_float_list(string_list):
+    """将字符串列表转换为浮点数列表，处理空值和无效值"""
+    result = []
+    for elem in string_list:
+        if elem and elem.strip():
+            try:
+                result.append(float(elem))
+            except (ValueError, TypeError):
+                result.append(0.0)
+        else:
+            result.append(0.0)
+    return result
+
+
+def detect_encoding(raw):
+    """
+    检测数据文件的编码：有 BOM 时按 BOM 判断，否则只用文件开头的 SNIFF_BYTES 字节试探解码
+
+    参数:
+        raw: 文件内容（bytes）
+
+    返回:
+        编码名称
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if raw.startswith(bom):
+            return encoding
+    sample = raw[:SNIFF_BYTES]
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            # 增量解码且不作为结尾，样本末尾被截断的多字节字符不算解码失败
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=len(raw) <= SNIFF_BYTES)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return FALLBACK_ENCODINGS[-1]
+
+
+def decode_data(raw):
+    """
+    将数据文件内容解码为文本（按 detect_encoding 的结果解码，失败时依次尝试后面的候选编码）
+
+    返回:
+        文本；无法解码时返回 None
+    """
+    encoding = detect_encoding(raw)
+    candidates = [encoding] + [e for e in FALLBACK_ENCODINGS if e != encoding]
+    for encoding in candidates:
+        try:
+            return raw.decode(encoding)
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+    return None
+
+
+def read_data_text(file_name):
+    """一次读取数据文件并解码，返回文本；无法解码时返回 None"""
+    with open(file_name, 'rb') as file:
+        raw = file.read()
+    return decode_data(raw)
+
+
+def read_data_lines(file_name):
+    """
+    读取数据文件的所有行（一次二进制读取，编码见 detect_encoding）
+    
+    返回:
+        行列表；解码失败时返回 None
+    """
+    text = read_data_text(file_name)
+    if text is None:
+        return None
+    return text.splitlines(keepends=True)
+
+
+def _split_values(values_str, num_entries):
+    """按逗号拆分一行的值：缺失数据视为'0'，超出数据截断，不足补'0'"""
+    values = [v.strip() for v in values_str.split(',')]
+    values = [v if v else '0' for v in values[:num_entries]]
+    while len(values) < num_entries:
+        values.append('0')
+    return values
+
+
+def detect_layout(lines):
+    """
+    根据文件开头几行确定路数、交通规则和数据行的起始位置
+
+    返回:
+        (num_entries, traffic_rule, 数据行起始索引)；无法确定时返回 None
+    """
+    if not lines:
+        return None
+    
+    # 解析第一行，获取路数声明和交通规则
+    first_line = lines[0].strip()
+    traffic_rule = 'right'  # 默认为右行规则
+    
+    # 新格式：本交叉口为X路交叉口，实行左/右行通行规则。
+    match = _DECLARATION_RE.search(first_line)
+    if match:
+        num_entries = int(match.group(1))
+        # 尝试提取交通规则（新格式：实行左/右行通行规则；向后兼容旧格式：交通规则：左/右行）
+        rule_match = _RULE_RE.search(first_line) or _OLD_RULE_RE.search(first_line)
+        if rule_match:
+            traffic_rule = 'left' if rule_match.group(1) == '左' else 'right'
+        # 跳过第一行声明
+        start = 1
+    # 向后兼容：旧格式（u_turns/left_turns 等）固定为4路
+    elif any('u_turns' in line or 'left_turns' in line for line in lines[:6]):
+        num_entries = 4
+        start = 0
+    # 未声明路数，从数据长度推断
+    elif len(lines) > 1:
+        if first_line and ',' in first_line:
+            # 第一行就是数据（至少包含names、angles或flow数据）
+            num_entries = len(first_line.split(','))
+            if num_entries < 3:
+                return None
+            start = 0
+        else:
+            # 第一行不是数据，从第二行开始
+            second_line = lines[1].strip()
+            if not (second_line and ',' in second_line):
+                return None
+            num_entries = len(second_line.split(','))
+            start = 1
+    else:
+        return None
+    
+    if num_entries < MIN_ENTRIES or num_entries > MAX_ENTRIES:
+        return None
+    return num_entries, traffic_rule, start
+
+
+def tokenize_lines(lines, num_entries):
+    """
+    逐行生成数据记号（生成器，只遍历一次）
+
+    记号:
+        (字段, 值列表)，字段为 'names'、'angles' 或 'flow_i'，值为补齐到 num_entries 的字符串；
+        多时段部分另有 ('period', 时段名称) 和 ('interval', 时段长度字符串) 两种标记，
+        之后的 flow_i 记号属于最近的时段
+    """
+    in_periods = False
+    row_idx = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        # 可能是 "key: value1,value2,..." 或直接是 "value1,value2,..."
+        if ':' in line:
+            key, values_str = line.split(':', 1)
+            key = key.strip()
+            lower_key = key.lower()
+            if lower_key == PERIOD_KEY:
+                in_periods = True
+                row_idx = 0
+                yield PERIOD_KEY, values_str.strip()
+                continue
+            if lower_key == INTERVAL_KEY:
+                in_periods = True
+                yield INTERVAL_KEY, values_str.strip()
+                continue
+            field = LEGACY_KEYS.get(key, key)
+        else:
+            # 不带 key 的行按顺序对应：快照部分为 names, angles, flow_0, ...；时段内为 flow_0, flow_1, ...
+            values_str = line
+            if in_periods:
+                field = f'flow_{row_idx}'
+            else:
+                field = ('names', 'angles')[row_idx] if row_idx < 2 else f'flow_{row_idx - 2}'
+            row_idx += 1
+        
+        if field.startswith('flow_'):
+            try:
+                if int(field[5:]) >= num_entries:
+                    continue
+            except ValueError:
+                continue
+        elif in_periods or field not in ('names', 'angles'):
+            continue
+        yield field, _split_values(values_str, num_entries)
+
+
+def parse_data_lines(lines):
+    """
+    解析数据文件内容（不依赖界面，可供批量处理调用）
+    
+    参数:
+        lines: 数据文件的行列表
+    
+    返回:
+        (num_entries, traffic_rule, data)，data 为 {'names': [...], 'angles': [...], 'flow_0': [...], ...}
+        （值均为字符串，只包含快照部分，时段数据见 parse_intersection_lines）；无法解析时返回 None
+    """
+    layout = detect_layout(lines)
+    if layout is None:
+        return None
+    num_entries, traffic_rule, start = layout
+    
+    data = {'names': [], 'angles': []}
+    for i in range(num_entries):
+        data[f'flow_{i}'] = []
+    for field, values in tokenize_lines(lines[start:], num_entries):
+        if field in (PERIOD_KEY, INTERVAL_KEY):
+            break
+        data[field] = values
+    
+    # 确保所有数据都有足够的长度
+    for key in data:
+        if len(data[key]) < num_entries:
+            data[key] = data[key] + ['0'] * (num_entries - len(data[key]))
+    
+    return num_entries, traffic_rule, data
+
+
+def _to_floats(values):
+    """字符串列表转换为浮点数列表（全部合法时走快速路径，否则按 convert_to_float_list 处理）"""
+    try:
+        return [float(v) for v in values]
+    except ValueError:
+        return convert_to_float_list(values)
+
+
+def _build_record(num_entries, traffic_rule, tokens):
+    """由记号流构建 FlowRecord（只遍历一次记号）"""
+    import numpy as np
+
+    names = ['0'] * num_entries
+    angles = [0.0] * num_entries
+    snapshot = np.zeros((num_entries, num_entries))
+    current = snapshot  # 当前写入的流量矩阵（快照或最近的时段）
+    labels = []
+    periods = []
+    interval = None
+    for field, values in tokens:
+        if field == PERIOD_KEY:
+            labels.append(values or str(len(labels) + 1))
+            current = np.zeros((num_entries, num_entries))
+            periods.append(current)
+        elif field == INTERVAL_KEY:
+            interval = convert_to_float_list([values])[0] or None
+            if not periods:
+                current = None  # interval 行之后、第一个 period 之前的流量行不属于任何时段
+        elif field == 'names':
+            names = values
+        elif field == 'angles':
+            angles = _to_floats(values)
+        elif current is not None:
+            current[int(field[5:])] = _to_floats(values)
+
+    series = None
+    if periods:
+        import flow_series
+        series = flow_series.FlowSeries(np.array(periods), labels,
+                                        interval or flow_series.DEFAULT_INTERVAL_MINUTES)
+        # 只有时段数据、没有快照流量时，快照取高峰小时合计
+        if not snapshot.any():
+            snapshot = series.peak_hour()[2]
+    return FlowRecord(num_entries, traffic_rule, names, angles, snapshot, series)
+
+
+def parse_intersection_lines(lines):
+    """
+    解析数据文件内容为 FlowRecord（数值直接转换为浮点数，不经过字符串字典）
+
+    返回:
+        FlowRecord；无法解析时返回 None
+    """
+    layout = detect_layout(lines)
+    if layout is None:
+        return None
+    num_entries, traffic_rule, start = layout
+    return _build_record(num_entries, traffic_rule, tokenize_lines(lines[start:], num_entries))
+
+
+def parse_intersection_file(file_name):
+    """
+    读取并解析数据文件（不依赖 Tk，供批量导出、命令行等批处理工具调用）
+
+    返回:
+        FlowRecord；文件无法解码或解析时返回 None（文件无法读取时抛出 OSError）
+    """
+    text = read_data_text(file_name)
+    if not text:
+        return None
+    return parse_intersection_lines(text.splitlines())
+
+
+def load_flow_series(file_name):
+    """
+    读取并解析数据文件（包括多时段数据）
+
+    文件只有时段数据、没有快照流量（或快照流量全为0）时，快照取高峰小时合计。
+
+    返回:
+        (num_entries, traffic_rule, names, angles, old_flows, series)，
+        series 为 flow_series.FlowSeries，文件没有时段数据时为 None；无法解析时返回 None
+    """
+    record = parse_intersection_file(file_name)
+    if record is None:
+        return None
+    return (record.num_entries, record.traffic_rule, record.names, record.angles,
+            record.flows.tolist(), record.series)
+
+
+def load_intersection(file_name):
+    """
+    读取并解析数据文件，返回绘图所需的数据（多时段文件取快照流量，见 load_flow_series）
+
+    返回:
+        (num_entries, traffic_rule, names, angles, old_flows)；无法解析时返回 None
+    """
+    loaded = load_flow_series(file_name)
+    if loaded is None:
+        return None
+    return loaded[:5]
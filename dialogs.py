@@ -98,6 +98,30 @@ def get_i18n():
             'update_ui_language': update_ui_language
         }
 
+# 选择按钮之外可输入的最少路数（3-6路有单独的按钮）
+MORE_ENTRIES_MIN = 7
+
+
+def ask_num_entries(parent=None):
+    """
+    输入更多路数（MORE_ENTRIES_MIN 至 data_parser.MAX_ENTRIES 路）
+
+    返回:
+        路数；取消时返回 None
+    """
+    from tkinter import simpledialog
+    import data_parser
+
+    return simpledialog.askinteger(
+        t('ask_num_entries_title'),
+        t('ask_num_entries_prompt', min=MORE_ENTRIES_MIN, max=data_parser.MAX_ENTRIES),
+        parent=parent,
+        initialvalue=MORE_ENTRIES_MIN + 1,
+        minvalue=MORE_ENTRIES_MIN,
+        maxvalue=data_parser.MAX_ENTRIES,
+    )
+
+
 def select_intersection_type():
     """选择交叉口类型或读取文件"""
     # 获取ui工具函数
@@ -206,6 +230,7 @@ def select_intersection_type():
         'btn2': None,
         'btn3': None,
         'btn4': None,
+        'btn_more': None,
         'btn5': None,
         'toolbar': None,
         'help_btn': None,
@@ -430,6 +455,15 @@ def select_intersection_type():
     btn4.pack(pady=8)
     dialog_components['btn4'] = btn4
     
+    def on_more_choice():
+        num_entries = ask_num_entries(dialog)
+        if num_entries is not None:
+            on_choice(num_entries)
+    
+    btn_more = create_rounded_button(button_frame, t('btn_more_ways'), on_more_choice, width=MAIN_BTN_WIDTH)
+    btn_more.pack(pady=8)
+    dialog_components['btn_more'] = btn_more
+    
     btn5 = create_rounded_button(button_frame, t('btn_load_file'), lambda: on_choice('load_file'), width=MAIN_BTN_WIDTH)
     btn5.pack(pady=8)
     dialog_components['btn5'] = btn5
@@ -1356,18 +1390,3 @@ def show_help():
                 messagebox.showerror(t('file_load_error'), t('help_file_error', error=str(e), error2=str(e2), file=help_file))
     else:
         messagebox.showerror(t('file_load_error'), t('help_file_not_found', file=help_file))
-
-def convert_to_float_list(string_list):
-    """将字符串列表转换为浮点数列表，处理空值和无效值"""
-    result = []
-    for elem in string_list:
-        if elem and elem.strip():  # 检查是否为空
-            try:
-                result.append(float(elem))
-            except (ValueError, TypeError):
-                result.append(0.0)  # 无效值默认为0
-        else:
-            result.append(0.0)  # 空值默认为0
-    return result
-
-
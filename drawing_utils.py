@@ -4,7 +4,6 @@
 包含所有绘图相关的辅助函数和常量
 """
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.text import TextPath
 from matplotlib.path import Path
 from matplotlib.patches import PathPatch
@@ -13,6 +12,10 @@ import matplotlib.patches as patches
 from matplotlib.patches import Polygon
 import matplotlib.font_manager as fm
 import os
+from functools import lru_cache
+
+import flow_model
+import profiling
 
 # ==================== 几何参数常量 ====================
 # 以下常量是经过调试得出的经验值，用于控制交叉口绘图的几何形状
@@ -22,11 +25,8 @@ CENTER_OFFSET = 25  # 中心偏移量
 ROAD_WIDTH_OFFSET = 25  # 道路宽度偏移量
 MIDDLE_RADIUS_COEFF = 75 * np.sqrt(35)  # 中间半径系数（用于路径计算）
 
-# 标注位置偏移量（相对于进口道中心线）
-LABEL_OFFSET_U_TURN = 18  # 掉头标注偏移
-LABEL_OFFSET_LEFT = 6     # 左转标注偏移
-LABEL_OFFSET_STRAIGHT = -6  # 直行标注偏移
-LABEL_OFFSET_RIGHT = -18    # 右转标注偏移
+# 相邻流向标注的间距（默认字号时；随字号同比例缩放，非0标注以进口道中心线为中心对称排列）
+FLOW_LABEL_SPACING = 12
 
 # 名称标注偏移
 NAME_LABEL_OFFSET = 20
@@ -44,12 +44,71 @@ PLOT_YLIM = (-375, 375)  # 绘图Y轴范围
 FIGURE_SIZE = (10, 10)  # 图形尺寸
 FIGURE_DPI = 100  # 图形分辨率
 
-# 颜色配置（扩展到6种颜色以支持3-6路交叉口）
+# 圆弧离散化参数
+ARC_CHORD_TOLERANCE = 0.05  # 弦高误差上限（数据单位，约为300dpi导出时像素的1/5）
+ARC_MIN_POINTS = 3  # 每段圆弧最少点数
+ARC_MAX_POINTS = 200  # 每段圆弧最多点数
+
+# 颜色配置（前6个进口使用固定颜色，更多进口的颜色见 entry_colors）
 ENTRY_COLORS = ['red', '#27a5d6', '#d161a3', 'orange', 'green', 'purple']
+# 超过6路时生成颜色的色相起点、饱和度和明度（色相按黄金角递增）
+GENERATED_COLOR_HUE_START = 0.47
+GENERATED_COLOR_SATURATION = (0.75, 0.55)
+GENERATED_COLOR_VALUE = (0.75, 0.9)
+
+# 流向标注的最小缩放比例（相邻进口过近时缩小行距和字号，但不小于该比例）
+MIN_FLOW_LABEL_SCALE = 0.5
 
 
 # ==================== 绘图工具函数 ====================
 
+@lru_cache(maxsize=None)
+def entry_colors(num_entries):
+    """
+    各进口的颜色
+
+    前 len(ENTRY_COLORS) 个进口使用固定颜色；更多进口按黄金角（约137.5°）在色相环上依次取色，
+    并交替使用两档饱和度/明度，相邻生成的颜色区分明显，任意路数都不重复使用颜色。
+
+    返回:
+        颜色元组（长度为 num_entries）
+    """
+    from matplotlib.colors import hsv_to_rgb, to_hex
+
+    colors = list(ENTRY_COLORS[:num_entries])
+    golden_ratio = (np.sqrt(5) - 1) / 2
+    for k in range(num_entries - len(colors)):
+        hue = (GENERATED_COLOR_HUE_START + k * golden_ratio) % 1.0
+        saturation = GENERATED_COLOR_SATURATION[k % 2]
+        value = GENERATED_COLOR_VALUE[k % 2]
+        colors.append(to_hex(hsv_to_rgb((hue, saturation, value))))
+    return tuple(colors)
+
+
+def flow_label_widths(angles):
+    """
+    各进口流向标注可用的排列宽度
+
+    一个进口的流向标注横跨进口道排列，宽度不能超过与相邻进口之间的距离：
+    取与两侧相邻进口方位角差的较小值在 INNER_RADIUS_COEFF 处对应的弦长。
+    排序后一次计算全部进口，路数多时也只是 O(N log N)。
+
+    返回:
+        形如 (N,) 的数组；只有一个进口时为 inf
+    """
+    angles = np.mod(np.asarray(angles, dtype=float), 360.0)
+    num_entries = len(angles)
+    if num_entries < 2:
+        return np.full(num_entries, np.inf)
+    order = np.argsort(angles, kind='stable')
+    sorted_angles = angles[order]
+    next_gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 360.0))
+    gaps = np.minimum(next_gaps, np.roll(next_gaps, 1))
+    widths = np.empty(num_entries)
+    widths[order] = 2 * INNER_RADIUS_COEFF * np.sin(np.radians(np.minimum(gaps, 180.0)) / 2)
+    return widths
+
+
 def normalize_index(idx, num_entries):
     """
     规整化索引：如果idx < 1，则加上num_entries
@@ -176,25 +235,55 @@ def find_intersection(line1, line2):
     return np.array([x, y])
 
 
-def arc_points(center, radius, start_angle, end_angle, num_points=100):
-    """生成圆弧上的点"""
+def arc_segment_count(radius, sweep, tolerance=ARC_CHORD_TOLERANCE):
+    """
+    按弦高误差计算圆弧离散化所需的点数
+
+    参数:
+        radius: 圆弧半径（取带宽圆弧的外半径，误差最大）
+        sweep: 圆弧扫过的角度（弧度）
+        tolerance: 允许的最大弦高误差（数据单位）
+
+    返回:
+        点数（含两个端点），限制在 ARC_MIN_POINTS 到 ARC_MAX_POINTS 之间
+    """
+    radius = abs(float(radius))
+    sweep = abs(float(sweep))
+    if radius <= tolerance:
+        return ARC_MIN_POINTS
+    # 每段弦对应的最大圆心角：r * (1 - cos(θ/2)) <= tolerance
+    max_step = 2 * np.arccos(1 - tolerance / radius)
+    num_points = int(np.ceil(sweep / max_step)) + 1
+    return min(max(num_points, ARC_MIN_POINTS), ARC_MAX_POINTS)
+
+
+def arc_points(center, radius, start_angle, end_angle, num_points=None):
+    """生成圆弧上的点（num_points 为 None 时按弦高误差自适应确定点数）"""
     start_angle = start_angle % 360
     end_angle = end_angle % 360
 
     if end_angle <= start_angle:
         end_angle += 360
 
+    if num_points is None:
+        num_points = arc_segment_count(radius, np.radians(end_angle - start_angle))
     angles = np.linspace(np.radians(start_angle), np.radians(end_angle), num_points)
     x = center[0] + radius * np.cos(angles)
     y = center[1] + radius * np.sin(angles)
     return np.column_stack((x, y))
 
 
-def transfor_arc_to_width_bar(arc, width, color='blue', ax=None, num_points=100):
-    """将圆弧转换为宽度条"""
+def transfor_arc_to_width_bar(arc, width, color='blue', ax=None, num_points=None):
+    """将圆弧转换为宽度条（num_points 为 None 时按外侧圆弧的弦高误差自适应确定点数）"""
     if ax is None:
+        import matplotlib.pyplot as plt
         ax = plt.gca()
 
+    # 内外两侧圆弧使用相同点数，保证宽度条两侧顶点一一对应
+    if num_points is None:
+        sweep = (arc["end_angle"] % 360 - arc["start_angle"] % 360) % 360 or 360
+        num_points = arc_segment_count(arc["radius"] + 0.5 * width, np.radians(sweep))
+
     # 计算圆弧的点集
     arc_points_outer = arc_points(arc["center"], arc["radius"] + 0.5 * width, arc["start_angle"], arc["end_angle"], num_points=num_points)
     arc_points_inner = arc_points(arc["center"], arc["radius"] - 0.5 * width, arc["start_angle"], arc["end_angle"], num_points=num_points)
@@ -434,9 +523,11 @@ def create_wide_line_with_arc(ax, p1, p2, p3, p4, start_angle, end_angle, line_w
     if inner_radius <= 0:
         inner_radius = line_width / 4  # 使用一个小的正值
     if start_angle < end_angle:
-        theta = np.linspace(np.radians(start_angle), np.radians(end_angle), 100)
+        sweep = np.radians(end_angle - start_angle)
     else:
-        theta = np.linspace(np.radians(start_angle), np.radians(end_angle) + 2 * np.pi, 100)
+        sweep = np.radians(end_angle - start_angle) + 2 * np.pi
+    theta = np.linspace(np.radians(start_angle), np.radians(start_angle) + sweep,
+                        arc_segment_count(outer_radius, sweep))
     inner_points = np.column_stack((arc_center[0] + inner_radius * np.cos(theta), arc_center[1] + inner_radius * np.sin(theta)))
     outer_points = np.column_stack((arc_center[0] + outer_radius * np.cos(theta[::-1]), arc_center[1] + outer_radius * np.sin(theta[::-1])))
 
@@ -450,6 +541,7 @@ def create_wide_line_with_arc(ax, p1, p2, p3, p4, start_angle, end_angle, line_w
     ax.add_patch(patch)
 
 
+@profiling.timed()
 def draw_arc_with_width(ax, center, radius, start_angle, end_angle, width, color):
     """画圆弧宽度条"""
     # 检查半径是否有效
@@ -469,9 +561,11 @@ def draw_arc_with_width(ax, center, radius, start_angle, end_angle, width, color
     end_angle = end_angle % 360
 
     if start_angle < end_angle:
-        theta = np.linspace(np.radians(start_angle), np.radians(end_angle), 100)
+        sweep = np.radians(end_angle - start_angle)
     else:
-        theta = np.linspace(np.radians(start_angle), np.radians(end_angle) + 2 * np.pi, 100)
+        sweep = np.radians(end_angle - start_angle) + 2 * np.pi
+    theta = np.linspace(np.radians(start_angle), np.radians(start_angle) + sweep,
+                        arc_segment_count(outer_radius, sweep))
 
     inner_points = np.column_stack((center[0] + inner_radius * np.cos(theta), center[1] + inner_radius * np.sin(theta)))
     outer_points = np.column_stack((center[0] + outer_radius * np.cos(theta[::-1]), center[1] + outer_radius * np.sin(theta[::-1])))
@@ -562,9 +656,10 @@ def draw_turn_path(ax, entry_index, exit_index, entry_angles, exit_angles,
         create_wide_line_with_arc(ax, p1, p2, p3, p4, start_angle, end_angle, path_width, color)
 
 
+@profiling.timed()
 def draw_turn_path_generic(ax, entry_index, exit_index, entry_angles, exit_angles, 
                            entry_volumes, exit_volumes, turn_volume, line_width_multiplier, 
-                           max_volume, color, flows, num_entries, traffic_rule='right'):
+                           max_volume, color, flows, num_entries, traffic_rule='right', lane_offsets=None):
     """
     通用的转向路径绘制函数（支持任意路数）
     
@@ -583,6 +678,8 @@ def draw_turn_path_generic(ax, entry_index, exit_index, entry_angles, exit_angle
         flows: 所有流向数据列表 flows[entry_idx][exit_idx]
         num_entries: 交叉口路数
         traffic_rule: 交通规则，'right'（右行）或'left'（左行），默认为'right'
+        lane_offsets: flow_model.compute_lane_offsets 的结果（进口/出口处的累积流量表），
+                      None 时按 flows 现场计算
     """
     entry_angle = entry_angles[entry_index]
     exit_angle = exit_angles[exit_index]
@@ -591,88 +688,13 @@ def draw_turn_path_generic(ax, entry_index, exit_index, entry_angles, exit_angle
     
     volume_ratio = line_width_multiplier / max_volume
     
-    entry_num = entry_index + 1  # 进口编号（1-based）
-    exit_num = exit_index + 1    # 出口编号（1-based）
-    
-    # 根据交通规则计算流线顺序
-    if traffic_rule == 'left':
-        # 左行规则：流线顺序是顺时针方向
-        # 在进口X处，从左到右依次是：流线X_X, 流线X_X+1, 流线X_X+2, ..., 流线X_1（顺时针递增）
-        entry_order = 0
-        for order in range(num_entries):
-            target_exit_num = normalize_index(entry_num + order, num_entries)
-            if target_exit_num == exit_num:
-                entry_order = order
-                break
-        
-        # 在出口X处，从左到右依次是：流线X+1_X, 流线X+2_X, ..., 流线X_X（顺时针递增）
-        exit_order = 0
-        for order in range(num_entries):
-            # 从exit_num+1开始，顺时针递增：exit_num+1, exit_num+2, ..., exit_num
-            target_entry_num = normalize_index(exit_num + 1 + order, num_entries)
-            if target_entry_num == entry_num:
-                exit_order = order
-                break
-        
-        # 计算已绘制的前面流线的累积影响（在进口处）
-        previous_flows_sum_entry = 0.0
-        for order in range(entry_order):
-            target_exit_num = normalize_index(entry_num + order, num_entries)
-            target_exit_idx = target_exit_num - 1
-            previous_flows_sum_entry += flows[entry_index][target_exit_idx]
-        
-        # 计算已绘制的前面流线的累积影响（在出口处）
-        previous_flows_sum_exit = 0.0
-        # 计算 order > exit_order 的流线（后面的流线，从右到左）
-        for order in range(exit_order + 1, num_entries):
-            # 从exit_num+1开始，顺时针递增：exit_num+1, exit_num+2, ..., exit_num
-            target_entry_num = normalize_index(exit_num + 1 + order, num_entries)
-            target_entry_idx = target_entry_num - 1
-            previous_flows_sum_exit += flows[target_entry_idx][exit_index]
-    else:
-        # 右行规则（默认）：流线顺序是逆时针方向
-        # 在进口X处，从左到右依次是：流线X_X, 流线X_X-1, 流线X_X-2, ..., 流线X_1
-        # 流线X_Y在进口X处的顺序位置是：从X开始逆时针数到Y的位置
-        entry_order = 0
-        for order in range(num_entries):
-            target_exit_num = normalize_index(entry_num - order, num_entries)
-            if target_exit_num == exit_num:
-                entry_order = order
-                break
-        
-        # 计算在出口处的顺序位置
-        # 在出口X处，从左到右依次是：流线X-1_X, 流线X-2_X, ..., 流线X_X
-        # 流线Y_X在出口X处的顺序位置是：从X-1开始逆时针数到Y的位置
-        # 注意：顺序是从X-1, X-2, ..., 最后是X（掉头在最右边）
-        exit_order = 0
-        for order in range(num_entries):
-            # 从exit_num-1开始，逆时针递减：exit_num-1, exit_num-2, ..., exit_num
-            target_entry_num = normalize_index(exit_num - 1 - order, num_entries)
-            if target_entry_num == entry_num:
-                exit_order = order
-                break
-        
-        # 计算已绘制的前面流线的累积影响（在进口处）
-        previous_flows_sum_entry = 0.0
-        for order in range(entry_order):
-            target_exit_num = normalize_index(entry_num - order, num_entries)
-            target_exit_idx = target_exit_num - 1
-            previous_flows_sum_entry += flows[entry_index][target_exit_idx]
-        
-        # 计算已绘制的前面流线的累积影响（在出口处）
-        # 在出口X处，从左到右依次是：流线X-1_X, 流线X-2_X, ..., 流线X_X
-        # 我们需要计算"从右到左"的累积，即计算后面流线的累积
-        # exit_order 表示当前流线在从左到右的顺序（0是最左边，num_entries-1是最右边）
-        previous_flows_sum_exit = 0.0
-        # 计算 order > exit_order 的流线（后面的流线，从右到左）
-        for order in range(exit_order + 1, num_entries):
-            # 从exit_num-1开始，逆时针递减：exit_num-1, exit_num-2, ..., exit_num
-            target_entry_num = normalize_index(exit_num - 1 - order, num_entries)
-            target_entry_idx = target_entry_num - 1
-            previous_flows_sum_exit += flows[target_entry_idx][exit_index]
-    
-    # 对于非掉头流线，不需要额外加上掉头流线，因为掉头流线已经在上面循环中计算了
-    # （掉头流线的order=num_entries-1，如果当前流线的order < num_entries-1，掉头流线会在循环中计算）
+    # 已绘制的前面流线的累积影响（进口处为左侧流线之和，出口处为右侧流线之和）
+    # 由 flow_model.compute_lane_offsets 按交叉口一次性算出，这里只做查表
+    if lane_offsets is None:
+        lane_offsets = flow_model.compute_lane_offsets(flows, traffic_rule)
+    entry_previous, exit_previous = lane_offsets
+    previous_flows_sum_entry = entry_previous[entry_index][exit_index]
+    previous_flows_sum_exit = exit_previous[entry_index][exit_index]
     
     # 计算偏移量
     entry_offset = 0.5 * (entry_volumes[entry_index] - turn_volume - 2 * previous_flows_sum_entry) * volume_ratio
@@ -742,6 +764,8 @@ def draw_traffic_volume_labels(
     num_entries,
     traffic_rule='right',
     flow_font_size=DEFAULT_FLOW_LABEL_FONT_SIZE,
+    fontname=None,
+    max_width=None,
 ):
     """
     统一绘制单个进口的所有转向交通量标注
@@ -754,64 +778,34 @@ def draw_traffic_volume_labels(
         flow_volumes: 流向交通量列表 [flow_0, flow_1, ..., flow_{N-1}]
         num_entries: 交叉口路数
         traffic_rule: 交通规则，'right'（右行）或'left'（左行），默认为'right'
+        flow_font_size: 流量标注字号
+        fontname: 字体文件路径或字体名称，None 表示使用全局字体设置
+        max_width: 标注可用的排列宽度（见 flow_label_widths），None 表示不限制
     """
-    # 定义偏移量映射（4路使用传统偏移，其他路数使用均匀分布）
-    if num_entries == 4:
-        offset_map = {
-            0: LABEL_OFFSET_U_TURN,    # 掉头
-            1: LABEL_OFFSET_LEFT,      # 左转
-            2: LABEL_OFFSET_STRAIGHT,  # 直行
-            3: LABEL_OFFSET_RIGHT      # 右转
-        }
-    else:
-        # 其他路数：均匀分布在-18到18之间
-        offset_map = {}
-        if num_entries > 1:
-            spacing = 36.0 / (num_entries - 1)
-            for i in range(num_entries):
-                offset_map[i] = 18 - i * spacing
-    
-    # 收集所有非0转向及其原始偏移量
-    non_zero_labels = []
-    for flow_idx, volume in enumerate(flow_volumes):
-        if volume != 0 and flow_idx in offset_map:
-            non_zero_labels.append((flow_idx, volume, offset_map[flow_idx]))
+    # 收集所有非0转向（按流向顺序：掉头、再依次向右/向左的各流向）
+    non_zero_labels = [(flow_idx, volume) for flow_idx, volume in enumerate(flow_volumes) if volume != 0]
     
     # 如果所有转向都为0，不绘制任何标注
     if len(non_zero_labels) == 0:
         return
     
-    # 计算非0标注的新位置（保持间距12，重新排列消除空位）
+    # 计算非0标注的新位置（保持间距 FLOW_LABEL_SPACING，重新排列消除空位）
     # 行间距随字号同比例缩放
-    base_spacing = 12.0
     # 避免除零
     size_scale = flow_font_size / DEFAULT_FLOW_LABEL_FONT_SIZE if DEFAULT_FLOW_LABEL_FONT_SIZE > 0 else 1.0
-    spacing = base_spacing * size_scale
-
-    if len(non_zero_labels) == 1:
-        # 只有一个非0标注，将其放在中心位置（偏移为0）
-        adjusted_labels = [(flow_idx, volume, 0) for flow_idx, volume, _ in non_zero_labels]
-    else:
-        # 按原始偏移量从大到小排序（保持原始顺序）
-        sorted_labels = sorted(non_zero_labels, key=lambda x: x[2], reverse=True)
-        
-        # 计算需要重新排列的位置
-        # 保持间距spacing，以0为中心对称分布
-        num_labels = len(sorted_labels)
-        
-        # 计算起始位置：如果有奇数个，最中间的为0；如果有偶数个，从-spacing/2开始
-        if num_labels % 2 == 1:
-            # 奇数个：中心位置为0，向两侧扩展
-            start_offset = spacing * (num_labels // 2)
-        else:
-            # 偶数个：从spacing/2开始，向两侧扩展
-            start_offset = spacing * (num_labels // 2) - spacing / 2
-        
-        # 重新分配位置，保持间距12，消除空位
-        adjusted_labels = []
-        for i, (flow_idx, volume, original_offset) in enumerate(sorted_labels):
-            new_offset = start_offset - i * spacing
-            adjusted_labels.append((flow_idx, volume, new_offset))
+    spacing = float(FLOW_LABEL_SPACING) * size_scale
+    num_labels = len(non_zero_labels)
+
+    # 路数多、相邻进口较近时，标注总宽度不超过可用宽度：同比例缩小行距和字号（不小于 MIN_FLOW_LABEL_SCALE）
+    if max_width is not None and num_labels * spacing > max_width:
+        fit_scale = max(max_width / (num_labels * spacing), MIN_FLOW_LABEL_SCALE)
+        spacing *= fit_scale
+        flow_font_size *= fit_scale
+
+    # 保持间距spacing，以0为中心对称分布（只有一个非0标注时位于中心）
+    start_offset = spacing * (num_labels - 1) / 2
+    adjusted_labels = [(flow_idx, volume, start_offset - i * spacing)
+                       for i, (flow_idx, volume) in enumerate(non_zero_labels)]
     
     # 绘制标注
     entry_angle_rad = entry_angle * np.pi / 180
@@ -837,57 +831,172 @@ def draw_traffic_volume_labels(
             # 右行规则（默认）
             label_x = base_x + offset * np.sin(entry_angle_rad)
             label_y = base_y - offset * np.cos(entry_angle_rad)
-        draw_text(ax, str(int(volume)), flow_font_size, (label_x, label_y), label_angle, "black")
+        draw_text(ax, str(int(volume)), flow_font_size, (label_x, label_y), label_angle, "black", fontname=fontname)
 
 
-def draw_text(ax, text, fontsize, center, angle, color, fontname=None):
-    """创建矢量图文字"""
-    # 延迟导入i18n模块以获取字体
-    try:
-        import i18n
-        # 尝试从i18n获取全局字体
-        if hasattr(i18n, 'font'):
-            font_prop = i18n.font
+class PatchCollector:
+    """
+    图形收集器（可代替 ax 传给各个宽度条/箭头/文字绘制函数）
+
+    各绘制函数照常调用 add_patch()，收集器只记录路径；flush() 时把连续的同色图形合并成
+    一个复合路径（每段颜色一个 PathPatch）添加到轴上，大幅减少 Agg 绘制次数和
+    SVG/PDF 中的元素数量。合并按添加顺序分段，不改变不同颜色之间的遮挡关系。
+
+    参数:
+        normalize_orientation: 是否把多边形统一为逆时针方向。几何宽度条之间会互相重叠，
+            统一方向后非零环绕填充不会在重叠处镂空；文字字形依靠内外轮廓方向相反形成
+            镂空（如“0”“8”），且标注之间互不重叠，应设为 False 保留原始路径。
+    """
+
+    def __init__(self, normalize_orientation=True):
+        self.normalize_orientation = normalize_orientation
+        self._runs = []  # [(facecolor, [Path, ...]), ...]
+
+    def add_patch(self, patch):
+        """记录图形的路径（数据坐标）"""
+        color = patch.get_facecolor()
+        path = patch.get_path()
+        if self.normalize_orientation:
+            paths = []
+            for polygon in path.to_polygons(closed_only=True):
+                if len(polygon) < 4:
+                    continue
+                x = polygon[:-1, 0]
+                y = polygon[:-1, 1]
+                signed_area = np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))
+                if signed_area < 0:
+                    polygon = polygon[::-1]
+                paths.append(Path(polygon, closed=True))
         else:
-            # 如果没有全局字体，使用默认字体
-            font_prop = None
-    except:
-        font_prop = None
-    
+            paths = [path]
+        if not paths:
+            return
+        if self._runs and self._runs[-1][0] == color:
+            self._runs[-1][1].extend(paths)
+        else:
+            self._runs.append((color, paths))
+
+    def flush(self, ax, update_limits=True, reuse=None):
+        """
+        将收集的图形按颜色段合并后添加到轴上，并清空收集器
+
+        参数:
+            ax: matplotlib轴对象
+            update_limits: 是否按图形更新轴的数据范围。轴范围固定（PLOT_XLIM/PLOT_YLIM）时设为 False，
+                省去逐段计算文字字形贝塞尔曲线极值的开销（路数多、标注多时占文字绘制的大部分时间）
+            reuse: 上一次 flush 返回的 patch 列表。传入时按顺序复用这些 patch，只替换路径和颜色，
+                多余的从轴上移除，不足时再新建（动画逐帧更新同一组图形，见 animation_export）
+
+        返回:
+            本次的 patch 列表（复用的和新添加的）
+        """
+        reuse = list(reuse or ())
+        added = []
+        for idx, (color, paths) in enumerate(self._runs):
+            path = Path.make_compound_path(*paths)
+            if idx < len(reuse):
+                patch = reuse[idx]
+                set_patch_path(patch, path)
+                patch.set_facecolor(color)
+                patch.set_edgecolor(color)
+            else:
+                patch = PathPatch(path, edgecolor=color, facecolor=color, lw=0)
+                if update_limits:
+                    ax.add_patch(patch)
+                else:
+                    ax.add_artist(patch)
+            added.append(patch)
+        for patch in reuse[len(self._runs):]:
+            patch.remove()
+        self._runs = []
+        return added
+
+
+def set_patch_path(patch, path):
+    """替换 PathPatch 的路径（较早的 matplotlib 版本没有 PathPatch.set_path）"""
+    if hasattr(patch, 'set_path'):
+        patch.set_path(path)
+    else:
+        patch._path = path
+    patch.stale = True
+
+
+def _resolve_font_source(fontname=None):
+    """
+    确定文字使用的字体来源（可哈希，用作字形缓存的键）
+
+    返回:
+        ('file', 字体文件路径) / ('family', 字体族名称) / ('props', 字体文件, 字体名称) / ('default', None)
+    """
     # 如果没有指定字体，使用全局字体设置
     if fontname is None:
+        # 延迟导入i18n模块以获取字体
+        try:
+            import i18n
+            # 尝试从i18n获取全局字体
+            font_prop = getattr(i18n, 'font', None)
+        except:
+            font_prop = None
+
         if font_prop is None:
             # 尝试从ui_utils获取字体（优先使用项目字体文件）
             try:
                 import ui_utils
-                # 优先使用项目字体文件（如果存在）
                 font_file = ui_utils.get_font_file()
                 if font_file:
-                    font_prop = fm.FontProperties(fname=font_file, size=fontsize)
-                else:
-                    # 使用安全的字体获取函数，避免使用不存在的字体
-                    safe_font_family = ui_utils.get_font_family()
-                    font_prop = fm.FontProperties(family=safe_font_family, size=fontsize)
+                    return ('file', font_file)
+                # 使用安全的字体获取函数，避免使用不存在的字体
+                return ('family', ui_utils.get_font_family())
             except:
                 # 如果获取字体失败，使用默认字体（不指定family，让matplotlib自动选择）
-                font_prop = fm.FontProperties(size=fontsize)
-        else:
-            # 使用全局字体，但调整大小
-            font_prop = fm.FontProperties(fname=font_prop.get_file() if hasattr(font_prop, 'get_file') else None,
-                                         family=font_prop.get_name() if hasattr(font_prop, 'get_name') else None,
-                                         size=fontsize)
-    elif os.path.exists(fontname):
-        font_prop = fm.FontProperties(fname=fontname, size=fontsize)
-    else:
-        # 如果路径不存在，尝试使用字体名称（使用安全的字体获取方法）
-        try:
-            import ui_utils
-            # 验证字体是否存在，如果不存在则使用安全字体
-            safe_font_family = ui_utils.get_safe_font_family(default=fontname)
-            font_prop = fm.FontProperties(family=safe_font_family, size=fontsize)
-        except:
-            # 如果获取字体失败，使用默认字体
-            font_prop = fm.FontProperties(size=fontsize)
+                return ('default', None)
+        # 使用全局字体，但调整大小
+        return ('props',
+                font_prop.get_file() if hasattr(font_prop, 'get_file') else None,
+                font_prop.get_name() if hasattr(font_prop, 'get_name') else None)
+    if os.path.exists(fontname):
+        return ('file', fontname)
+    # 如果路径不存在，尝试使用字体名称（使用安全的字体获取方法）
+    try:
+        import ui_utils
+        return ('family', ui_utils.get_safe_font_family(default=fontname))
+    except:
+        return ('default', None)
+
+
+@lru_cache(maxsize=128)
+def _font_properties(font_source, fontsize):
+    """按字体来源和字号创建 FontProperties（缓存，避免每个标注重复创建）"""
+    kind = font_source[0]
+    try:
+        if kind == 'file':
+            return fm.FontProperties(fname=font_source[1], size=fontsize)
+        if kind == 'family':
+            return fm.FontProperties(family=font_source[1], size=fontsize)
+        if kind == 'props':
+            return fm.FontProperties(fname=font_source[1], family=font_source[2], size=fontsize)
+    except:
+        pass
+    return fm.FontProperties(size=fontsize)
+
+
+@lru_cache(maxsize=2048)
+def _layout_text(font_source, fontsize, text):
+    """
+    排版文字并缓存结果（键为字体来源、字号和文字内容）
+
+    返回:
+        (TextPath, 文本宽度, 文本高度)；路径在原点排版，调用方只需施加仿射变换
+    """
+    text_path = TextPath((0, 0), text, size=fontsize, prop=_font_properties(font_source, fontsize))
+    extent = text_path.get_extents()
+    return text_path, extent.width, extent.height
+
+
+@profiling.timed()
+def draw_text(ax, text, fontsize, center, angle, color, fontname=None):
+    """创建矢量图文字"""
+    font_source = _resolve_font_source(fontname)
     
     # 确保center是numpy数组或可以转换为标量的值
     if isinstance(center, (list, tuple)):
@@ -902,19 +1011,14 @@ def draw_text(ax, text, fontsize, center, angle, color, fontname=None):
     center_x = float(center[0])
     center_y = float(center[1])
     
-    # 创建一个TextPath对象并指定字体
-    text_path = TextPath((0, 0), text, size=fontsize, prop=font_prop)
-    
-    # 计算文本的宽度和高度
-    extent = text_path.get_extents()
-    text_width, text_height = extent.width, extent.height
+    # 获取排版好的TextPath对象及其宽度和高度（同一字体、字号和文字只排版一次）
+    text_path, text_width, text_height = _layout_text(font_source, fontsize, str(text))
 
     # 创建旋转和平移矩阵（使用标量值）
     transform = Affine2D().translate(-text_width / 2, -0.45*text_height).rotate_deg(angle).translate(center_x, center_y)
 
-    # 将TextPath对象转换为PathPatch对象
-    text_patch = PathPatch(text_path, lw=0, edgecolor=None, facecolor=color, transform=transform + ax.transData)
+    # 将TextPath对象变换到数据坐标后转换为PathPatch对象（ax 也可以是 PatchCollector）
+    text_patch = PathPatch(transform.transform_path(text_path), lw=0, edgecolor=None, facecolor=color)
 
     # 将PathPatch对象添加到轴上
     ax.add_patch(text_patch)
-
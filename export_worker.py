@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+后台导出模块
+在独立进程中按绘图窗口的数据快照无界面重新绘制并导出（见 render_engine），
+大尺寸 PDF/TIF 或文字很多的 SVG 导出时绘图窗口不会卡住，导出过程中可以继续修改字号。
+一次导出可以包含多种格式和分辨率（导出方案），图形只绘制一次。
+进程通过队列汇报进度；取消导出时直接终止进程，并删除未写完的临时文件。
+
+使用 spawn 方式启动进程（不复制 Tk 主进程的状态），打包后的程序需在入口调用
+multiprocessing.freeze_support()。
+"""
+import os
+import queue
+import multiprocessing
+
+# 进度消息类型
+MESSAGE_STAGE = 'stage'
+MESSAGE_DONE = 'done'
+MESSAGE_ERROR = 'error'
+
+# 导出阶段
+STAGE_RENDER = 'render'
+STAGE_ENCODE = 'encode'
+STAGE_WRITE = 'write'
+
+# 未写完的导出文件后缀（写完后替换为目标文件，取消或失败时删除）
+PARTIAL_SUFFIX = '.part'
+
+
+def make_snapshot(names, angles, old_flows, traffic_rule, road_font_size, flow_font_size, font_file, num_entries):
+    """
+    记录导出所需的绘图数据（只包含可序列化的值，发送到导出进程）
+
+    返回:
+        dict，键与 render_engine.render_formats 的参数一致
+    """
+    return {
+        'names': [str(name) for name in names],
+        'angles': [float(angle) for angle in angles],
+        'old_flows': [[float(value) for value in row] for row in old_flows],
+        'traffic_rule': traffic_rule,
+        'road_font_size': road_font_size,
+        'flow_font_size': flow_font_size,
+        'font_file': font_file,  # 字体文件路径或字体名称，None 时由导出进程自动查找
+        'num_entries': num_entries,
+    }
+
+
+def _export_process(snapshot, targets, messages):
+    """导出进程入口：绘制一次图形，导出全部目标（见 render_engine.export_targets），写入临时文件后替换为目标文件"""
+    partials = [filename + PARTIAL_SUFFIX for filename, _, _ in targets]
+    try:
+        messages.put((MESSAGE_STAGE, STAGE_RENDER))
+        import render_engine
+        import render_cache
+
+        font_file = render_engine.resolve_font(snapshot['font_file'])
+        model = render_engine.prepare_intersection(snapshot['names'], snapshot['angles'], snapshot['old_flows'],
+                                                   snapshot['num_entries'], snapshot['traffic_rule'])
+        fig = render_engine.figure_from_model(model, snapshot['road_font_size'], snapshot['flow_font_size'],
+                                              font_file)
+
+        messages.put((MESSAGE_STAGE, STAGE_ENCODE))
+        # 导出进程是守护进程，不能再启动工作进程（见 render_engine.export_targets），在本进程内依次导出
+        outputs = render_engine.export_targets(fig, [(format, dpi) for _, format, dpi in targets], max_workers=0)
+        cache = render_cache.get_default_cache()
+        if cache:
+            for (format, dpi), data in outputs.items():
+                key = render_cache.make_key(model, format, dpi, snapshot['road_font_size'],
+                                            snapshot['flow_font_size'], font_file)
+                cache.put(key, format, data)
+
+        messages.put((MESSAGE_STAGE, STAGE_WRITE))
+        for (filename, format, dpi), partial in zip(targets, partials):
+            with open(partial, 'wb') as f:
+                f.write(outputs[(format, dpi)])
+        for (filename, _, _), partial in zip(targets, partials):
+            os.replace(partial, filename)
+        messages.put((MESSAGE_DONE, [filename for filename, _, _ in targets]))
+
+        # 输出导出进程的性能分析结果（未开启时不做任何事）
+        import profiling
+        profiling.flush(targets[0][0])
+    except Exception as e:
+        _remove_files(partials)
+        messages.put((MESSAGE_ERROR, str(e)))
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ExportJob:
+    """
+    一次后台导出（start 启动，poll 读取进度，cancel 取消）
+
+    参数:
+        snapshot: make_snapshot() 的结果
+        targets: [(文件路径, matplotlib 格式名, 分辨率), ...]，全部由同一个图形导出
+    """
+
+    def __init__(self, snapshot, targets):
+        self.snapshot = snapshot
+        self.targets = list(targets)
+        self.finished = False
+        self._process = None
+        self._messages = None
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self._messages = context.Queue()
+        self._process = context.Process(
+            target=_export_process,
+            args=(self.snapshot, self.targets, self._messages),
+            daemon=True,
+        )
+        self._process.start()
+
+    def poll(self):
+        """
+        读取已到达的进度消息（不阻塞）
+
+        返回:
+            [(消息类型, 内容), ...]；进程异常退出且没有结果时返回一条错误消息
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                break
+        if any(kind in (MESSAGE_DONE, MESSAGE_ERROR) for kind, _ in messages):
+            self._finish()
+        elif not self._process.is_alive():
+            # 进程已退出时队列中可能还有刚写入的消息，全部读出
+            while True:
+                try:
+                    messages.append(self._messages.get(timeout=0.2))
+                except queue.Empty:
+                    break
+            if not any(kind in (MESSAGE_DONE, MESSAGE_ERROR) for kind, _ in messages):
+                messages.append((MESSAGE_ERROR, f'导出进程意外退出（退出码 {self._process.exitcode}）'))
+            self._finish()
+        return messages
+
+    def cancel(self):
+        """终止导出进程并删除未写完的文件"""
+        if self.finished:
+            return
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+        self._finish()
+        _remove_files(filename + PARTIAL_SUFFIX for filename, _, _ in self.targets)
+
+    def _finish(self):
+        self.finished = True
+        if self._process is not None:
+            self._process.join(timeout=1)
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 """文件操作模块"""
 import os
-import re
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 
+# 数据文件解析（不依赖界面，见 data_parser 模块）
+from data_parser import read_data_lines, parse_intersection_lines
+from intersection import Intersection
+
 # 延迟导入模块，避免循环依赖
 def t(key, **kwargs):
     """翻译函数（延迟导入i18n）"""
@@ -15,19 +18,6 @@ def t(key, **kwargs):
     except:
         return key
 
-def convert_to_float_list(string_list):
-    """将字符串列表转换为浮点数列表，处理空值和无效值"""
-    result = []
-    for elem in string_list:
-        if elem and elem.strip():
-            try:
-                result.append(float(elem))
-            except (ValueError, TypeError):
-                result.append(0.0)
-        else:
-            result.append(0.0)
-    return result
-
 # 模块级别的update_window_title函数，用于存储root引用
 def update_window_title():
     """更新窗口标题（延迟导入i18n）"""
@@ -101,6 +91,27 @@ def finalize_table_creation(table_instance, root_instance, keep_position=False):
     
     root_instance.after(250, adjust_size_after_alignment)  # 250ms，略大于提示框的200ms延迟
 
+def _write_period_lines(file, table):
+    """写入多时段数据块（表格从多时段文件加载时）"""
+    series = getattr(table, 'flow_series', None)
+    if series is not None and series.num_entries == table.num_entries:
+        file.write('\n'.join(series.format_lines()) + '\n')
+
+
+def write_data_file(file_name, table):
+    """将表格数据写入数据文件：声明行（包含交通规则）、路名/方位角/流向数据行和多时段数据块"""
+    # 按输入框中的文本写入（见 Table.format_lines）
+    data_lines = table.format_lines()
+    with open(file_name, 'w', encoding='utf-8') as file:
+        # 写入第一行声明（包含交通规则）
+        traffic_rule_text = t('left_hand') if table.traffic_rule == 'left' else t('right_hand')
+        file.write(t('file_declaration', num=table.num_entries, rule=traffic_rule_text) + '\n')
+        # 写入路名、方位角和流向数据（以逗号分隔）
+        file.write('\n'.join(data_lines) + '\n')
+        # 写入多时段数据
+        _write_period_lines(file, table)
+
+
 def load_data_from_file(file_name, table_instance, root_instance):
     """从文件加载数据的内部函数"""
     # 延迟导入模块，避免循环依赖
@@ -126,15 +137,7 @@ def load_data_from_file(file_name, table_instance, root_instance):
         return False, table_instance
     
     # 尝试多种编码读取文件
-    encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'latin1']
-    lines = None
-    for encoding in encodings:
-        try:
-            with open(file_name, 'r', encoding=encoding) as file:
-                lines = file.readlines()
-                break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
+    lines = read_data_lines(file_name)
     
     # 解码失败或空文件，统一由外层提示“文件无法解析”
     if lines is None:
@@ -144,147 +147,12 @@ def load_data_from_file(file_name, table_instance, root_instance):
         return False, table_instance
     
     try:
-        # 解析第一行，获取路数声明和交通规则
-        first_line = lines[0].strip()
-        num_entries = None
-        traffic_rule = 'right'  # 默认为右行规则
-        
-        # 尝试从第一行提取路数和交通规则
-        # 新格式：本交叉口为X路交叉口，实行左/右行通行规则。
-        match = re.search(r'本交叉口为(\d+)路交叉口', first_line)
-        if match:
-            num_entries = int(match.group(1))
-            if num_entries < 3 or num_entries > 6:
-                return False, table_instance
-            # 尝试提取交通规则（新格式：实行左/右行通行规则）
-            rule_match = re.search(r'实行([左右])行通行规则', first_line)
-            if rule_match:
-                if rule_match.group(1) == '左':
-                    traffic_rule = 'left'
-                else:
-                    traffic_rule = 'right'
-            else:
-                # 向后兼容：尝试旧格式（交通规则：左/右行）
-                rule_match_old = re.search(r'交通规则[：:]\s*([左右])行', first_line)
-                if rule_match_old:
-                    if rule_match_old.group(1) == '左':
-                        traffic_rule = 'left'
-                    else:
-                        traffic_rule = 'right'
-            # 跳过第一行声明
-            data_lines = lines[1:]
-        else:
-            # 如果未声明路数，尝试从数据推断
-            # 向后兼容：检查是否是旧格式
-            if any('u_turns' in line or 'left_turns' in line for line in lines[:6]):
-                num_entries = 4
-                data_lines = lines
-            else:
-                # 尝试从数据长度推断路数
-                # 跳过第一行（可能是声明或数据），从第二行开始解析
-                if len(lines) > 1:
-                    # 尝试解析第一行数据，看是否是数据行
-                    first_data_line = lines[0].strip()
-                    if first_data_line and ',' in first_data_line:
-                        # 第一行可能是数据，尝试推断路数
-                        values = [v.strip() for v in first_data_line.split(',')]
-                        if len(values) >= 3:  # 至少包含names、angles或flow数据
-                            # 从数据长度推断路数
-                            num_entries = len(values)
-                            if num_entries < 3 or num_entries > 6:
-                                return False, table_instance
-                            data_lines = lines  # 第一行也是数据
-                        else:
-                            return False, table_instance
-                    else:
-                        # 第一行不是数据，从第二行开始
-                        data_lines = lines[1:]
-                        if len(data_lines) > 0:
-                            first_data_line = data_lines[0].strip()
-                            if first_data_line and ',' in first_data_line:
-                                values = [v.strip() for v in first_data_line.split(',')]
-                                num_entries = len(values)
-                                if num_entries < 3 or num_entries > 6:
-                                    return False, table_instance
-                            else:
-                                return False, table_instance
-                        else:
-                            return False, table_instance
-                else:
-                    return False, table_instance
-        
-        # 解析数据（兼容旧格式和新格式）
-        data = {}
-        data['names'] = []
-        data['angles'] = []
-        for i in range(num_entries):
-            data[f'flow_{i}'] = []
-        
-        # 解析数据行
-        line_idx = 0
-        for line in data_lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # 尝试解析：可能是 "key: value1,value2,..." 或直接是 "value1,value2,..."
-            if ':' in line:
-                # 旧格式：key: value1,value2,...
-                parts = line.split(':', 1)
-                key = parts[0].strip()
-                values_str = parts[1] if len(parts) > 1 else ''
-            else:
-                # 新格式：直接是 value1,value2,...（按顺序：names, angles, flow_0, flow_1, ...）
-                key = None
-                values_str = line
-            
-            # 解析值（以逗号分隔）
-            values = [v.strip() for v in values_str.split(',')]
-            # 缺失数据视为0，超出数据截断
-            values = [v if v else '0' for v in values[:num_entries]]
-            # 如果数据不足，补0
-            while len(values) < num_entries:
-                values.append('0')
-            
-            # 映射到新格式
-            if key:
-                # 有key的情况（旧格式或带key的新格式）
-                if key == 'names':
-                    data['names'] = values[:num_entries]
-                elif key == 'angles':
-                    data['angles'] = values[:num_entries]
-                elif key == 'u_turns':
-                    data['flow_0'] = values[:num_entries]
-                elif key == 'left_turns':
-                    data['flow_1'] = values[:num_entries]
-                elif key == 'straights':
-                    data['flow_2'] = values[:num_entries]
-                elif key == 'right_turns':
-                    data['flow_3'] = values[:num_entries]
-                elif key.startswith('flow_'):
-                    try:
-                        flow_idx = int(key.split('_')[1])
-                        if flow_idx < num_entries:
-                            data[f'flow_{flow_idx}'] = values[:num_entries]
-                    except:
-                        pass
-            else:
-                # 没有key的情况（新格式，按顺序）
-                if line_idx == 0:
-                    data['names'] = values[:num_entries]
-                elif line_idx == 1:
-                    data['angles'] = values[:num_entries]
-                else:
-                    flow_idx = line_idx - 2
-                    if flow_idx < num_entries:
-                        data[f'flow_{flow_idx}'] = values[:num_entries]
-                line_idx += 1
-        
-        # 确保所有数据都有足够的长度
-        for key in data:
-            while len(data[key]) < num_entries:
-                data[key].append('0')
-            data[key] = data[key][:num_entries]
+        # 多时段数据：快照流量为空时取高峰小时合计（见 data_parser）
+        record = parse_intersection_lines(lines)
+        if record is None:
+            return False, table_instance
+        num_entries, traffic_rule = record.num_entries, record.traffic_rule
+        intersection = Intersection.from_record(record)
         
         # 如果当前表格路数与文件路数不一致，或者交通规则不一致，需要重新创建表格
         if table_instance.num_entries != num_entries or getattr(table_instance, 'traffic_rule', 'right') != traffic_rule:
@@ -336,8 +204,8 @@ def load_data_from_file(file_name, table_instance, root_instance):
             # 步骤6：统一处理表格创建后的所有更新操作
             finalize_table_creation(table_instance, root_instance, keep_position=True)
         
-        # 设置数据
-        table_instance.set_data(data)
+        # 设置数据（表格按方位角排序进口，时段数据按相同顺序排列）
+        table_instance.set_intersection(intersection, record.series)
         table_instance.file_name = file_name
         # 更新交通规则（即使表格已存在）
         table_instance.traffic_rule = traffic_rule
@@ -416,22 +284,9 @@ def on_save_data_click():
         messagebox.showerror(t('file_load_error'), t('file_no_save_target'))
         return
     
-    table.get()
     if hasattr(table, 'file_name') and table.file_name:
         try:
-            with open(table.file_name, 'w', encoding='utf-8') as file:
-                # 写入第一行声明（包含交通规则）
-                traffic_rule_text = t('left_hand') if table.traffic_rule == 'left' else t('right_hand')
-                file.write(t('file_declaration', num=table.num_entries, rule=traffic_rule_text) + '\n')
-                # 写入数据（以逗号分隔）
-                for key in ['names', 'angles']:
-                    if key in table.data:
-                        file.write(','.join(table.data[key]) + '\n')
-                # 写入流向数据
-                for i in range(table.num_entries):
-                    key = f'flow_{i}'
-                    if key in table.data:
-                        file.write(','.join(table.data[key]) + '\n')
+            write_data_file(table.file_name, table)
             table.is_modified = False  # 保存后清除修改标记
             try:
                 import i18n
@@ -461,26 +316,13 @@ def on_save_data_as_click():
         messagebox.showerror(t('file_load_error'), t('file_no_save_target'))
         return
     
-    table.get()
     file_name = filedialog.asksaveasfilename(
         defaultextension='.txt',
         filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
     )
     if file_name:
         try:
-            with open(file_name, 'w', encoding='utf-8') as file:
-                # 写入第一行声明（包含交通规则）
-                traffic_rule_text = t('left_hand') if table.traffic_rule == 'left' else t('right_hand')
-                file.write(t('file_declaration', num=table.num_entries, rule=traffic_rule_text) + '\n')
-                # 写入数据（以逗号分隔）
-                for key in ['names', 'angles']:
-                    if key in table.data:
-                        file.write(','.join(table.data[key]) + '\n')
-                # 写入流向数据
-                for i in range(table.num_entries):
-                    key = f'flow_{i}'
-                    if key in table.data:
-                        file.write(','.join(table.data[key]) + '\n')
+            write_data_file(file_name, table)
             table.file_name = file_name
             if not hasattr(table, 'loaded_file'):
                 table.loaded_file = file_name
@@ -516,8 +358,9 @@ def on_clear_data_click():
         for row in table._widgets:
             for widget in row:
                 widget.delete(0, tk.END)
-        # 清除文件名和修改标记
+        # 清除文件名、时段数据和修改标记
         table.file_name = None
+        table.flow_series = None
         table.is_modified = False
         try:
             import i18n
@@ -619,6 +462,7 @@ def on_new_file_click():
         'btn2': None,
         'btn3': None,
         'btn4': None,
+        'btn_more': None,
     }
     
     def update_dialog_language():
@@ -635,6 +479,8 @@ def on_new_file_click():
             dialog_components['btn3'].config(text=t('btn_5way'), width=btn_width)
         if dialog_components['btn4']:
             dialog_components['btn4'].config(text=t('btn_6way'), width=btn_width)
+        if dialog_components['btn_more']:
+            dialog_components['btn_more'].config(text=t('btn_more_ways'), width=btn_width)
         dialog.title(t('select_intersection_type'))
     
     def change_dialog_language(lang_code):
@@ -712,6 +558,17 @@ def on_new_file_click():
     btn4.pack(pady=6)
     dialog_components['btn4'] = btn4
     
+    def on_more_choice():
+        import dialogs
+        num_entries = dialogs.ask_num_entries(dialog)
+        if num_entries is not None:
+            on_choice(num_entries)
+    
+    btn_more = ttk.Button(button_frame, text=t('btn_more_ways'), width=btn_width,
+                          command=on_more_choice)
+    btn_more.pack(pady=6)
+    dialog_components['btn_more'] = btn_more
+    
     # 在隐藏状态下计算尺寸和居中位置
     dialog.update_idletasks()
     dialog_width = dialog.winfo_reqwidth()
@@ -796,6 +653,7 @@ def on_new_file_click():
                 default_angle = default_angles[row_idx]
                 widget.insert(0, str(int(default_angle)) if default_angle == int(default_angle) else str(default_angle))
     table.file_name = None
+    table.flow_series = None
     table.is_modified = False
     # 确保_ui_components中的table引用是最新的（如果表格未重新创建）
     if table.num_entries == num_entries:
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+流量矩阵模型模块（基于 NumPy）
+将数据文件/表格中的流向数据（按流向顺序存储）转换为进口→出口流量矩阵，并用轴向求和
+计算进口总量、出口总量和最大交通量。所有函数都支持前置批量维度，
+可一次处理成千上万个交叉口或时段，而不需要逐元素的 Python 循环。
+
+数据布局:
+    按流向顺序（文件格式）: by_order[..., flow_idx, entry_idx]
+    流量矩阵: flows[..., entry_idx, exit_idx]
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def exit_index_table(num_entries, traffic_rule='right'):
+    """
+    预计算流向顺序 → 出口索引表
+
+    返回:
+        只读数组 table[entry_idx, flow_idx] = exit_idx
+        右行规则：从进口X开始逆时针递减（X, X-1, ..., X+1）
+        左行规则：从进口X开始顺时针递增（X, X+1, ..., X-1）
+    """
+    entries = np.arange(num_entries)[:, None]
+    orders = np.arange(num_entries)[None, :]
+    if traffic_rule == 'left':
+        table = (entries + orders) % num_entries
+    else:
+        table = (entries - orders) % num_entries
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def flow_order_table(num_entries, traffic_rule='right'):
+    """
+    预计算出口索引 → 流向顺序表（exit_index_table 的逆置换）
+
+    返回:
+        只读数组 table[entry_idx, exit_idx] = flow_idx
+    """
+    entries = np.arange(num_entries)[:, None]
+    exits = np.arange(num_entries)[None, :]
+    if traffic_rule == 'left':
+        table = (exits - entries) % num_entries
+    else:
+        table = (entries - exits) % num_entries
+    table.setflags(write=False)
+    return table
+
+
+def build_flow_matrix(by_order, traffic_rule='right'):
+    """
+    将按流向顺序存储的流量转换为进口→出口流量矩阵
+
+    参数:
+        by_order: 形如 (..., N, N) 的数组，by_order[..., flow_idx, entry_idx]
+        traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+
+    返回:
+        float64 数组 flows[..., entry_idx, exit_idx]
+    """
+    by_order = np.asarray(by_order, dtype=float)
+    num_entries = by_order.shape[-1]
+    per_entry = np.swapaxes(by_order, -1, -2)  # [..., entry_idx, flow_idx]
+    order = flow_order_table(num_entries, traffic_rule)
+    order = np.broadcast_to(order, per_entry.shape)
+    return np.take_along_axis(per_entry, order, axis=-1)
+
+
+def to_order_layout(flows, traffic_rule='right'):
+    """build_flow_matrix 的逆变换：flows[..., entry_idx, exit_idx] → by_order[..., flow_idx, entry_idx]"""
+    flows = np.asarray(flows, dtype=float)
+    num_entries = flows.shape[-1]
+    exits = np.broadcast_to(exit_index_table(num_entries, traffic_rule), flows.shape)
+    per_entry = np.take_along_axis(flows, exits, axis=-1)  # [..., entry_idx, flow_idx]
+    return np.swapaxes(per_entry, -1, -2)
+
+
+def compute_totals(flows):
+    """
+    计算进口总量、出口总量和最大交通量（用于线宽归一化）
+
+    返回:
+        (entry_total_volumes[..., N], exit_total_volumes[..., N], max_volume[...])
+        max_volume 不大于0时取1.0，防止除零
+    """
+    flows = np.asarray(flows, dtype=float)
+    entry_total_volumes = flows.sum(axis=-1)
+    exit_total_volumes = flows.sum(axis=-2)
+    max_volume = flows.max(axis=(-2, -1))
+    max_volume = np.where(max_volume > 0, max_volume, 1.0)
+    return entry_total_volumes, exit_total_volumes, max_volume
+
+
+@lru_cache(maxsize=None)
+def exit_lane_table(num_entries, traffic_rule='right'):
+    """
+    预计算出口处的流线排列（从左到右）
+
+    返回:
+        只读数组 table[exit_idx, k] = 第k条流线的进口索引
+        右行规则：出口X处依次为流线X-1_X, X-2_X, ..., X_X（掉头在最右边）
+        左行规则：出口X处依次为流线X+1_X, X+2_X, ..., X_X（掉头在最右边）
+    """
+    exits = np.arange(num_entries)[:, None]
+    lanes = np.arange(num_entries)[None, :]
+    if traffic_rule == 'left':
+        table = (exits + 1 + lanes) % num_entries
+    else:
+        table = (exits - 1 - lanes) % num_entries
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def exit_lane_position_table(num_entries, traffic_rule='right'):
+    """exit_lane_table 的逆置换：table[exit_idx, entry_idx] = 该流线在出口处的位置k"""
+    exits = np.arange(num_entries)[:, None]
+    entries = np.arange(num_entries)[None, :]
+    if traffic_rule == 'left':
+        table = (entries - exits - 1) % num_entries
+    else:
+        table = (exits - 1 - entries) % num_entries
+    table.setflags(write=False)
+    return table
+
+
+def compute_lane_offsets(flows, traffic_rule='right'):
+    """
+    一次性计算所有流线在进口处和出口处的车道排列偏移（累积流量）
+
+    进口X处流线按流向顺序从左到右排列，出口处按 exit_lane_table 排列；
+    每条流线的偏移由排在它前面（进口处）或后面（出口处）的流线流量之和决定。
+    用累积和一次算出全部 N×N 条流线的结果，绘制时直接查表。
+
+    参数:
+        flows: 流量矩阵 flows[..., entry_idx, exit_idx]
+        traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+
+    返回:
+        (entry_previous, exit_previous)，均为 [..., entry_idx, exit_idx] 数组：
+        entry_previous: 进口处排在该流线左侧的流线流量之和
+        exit_previous: 出口处排在该流线右侧的流线流量之和
+    """
+    flows = np.asarray(flows, dtype=float)
+    num_entries = flows.shape[-1]
+
+    # 进口处：按流向顺序排列后做不含自身的前缀和
+    exits = np.broadcast_to(exit_index_table(num_entries, traffic_rule), flows.shape)
+    per_entry = np.take_along_axis(flows, exits, axis=-1)  # [..., entry_idx, flow_idx]
+    before = np.zeros_like(per_entry)
+    before[..., 1:] = np.cumsum(per_entry[..., :-1], axis=-1)
+    orders = np.broadcast_to(flow_order_table(num_entries, traffic_rule), flows.shape)
+    entry_previous = np.take_along_axis(before, orders, axis=-1)
+
+    # 出口处：按出口车道顺序排列后做不含自身的后缀和
+    per_exit_source = np.swapaxes(flows, -1, -2)  # [..., exit_idx, entry_idx]
+    lanes = np.broadcast_to(exit_lane_table(num_entries, traffic_rule), flows.shape)
+    per_exit = np.take_along_axis(per_exit_source, lanes, axis=-1)  # [..., exit_idx, k]
+    after = np.zeros_like(per_exit)
+    after[..., :-1] = np.flip(np.cumsum(np.flip(per_exit[..., 1:], axis=-1), axis=-1), axis=-1)
+    positions = np.broadcast_to(exit_lane_position_table(num_entries, traffic_rule), flows.shape)
+    exit_previous = np.swapaxes(np.take_along_axis(after, positions, axis=-1), -1, -2)
+
+    return entry_previous, exit_previous
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+多时段流量数据模块
+交通调查通常按15分钟分段计数。FlowSeries 以 NumPy 张量保存全部时段的流量，
+高峰小时、任意时段或滑动窗口的合计都是张量上的向量化运算，
+渲染某个时段时不需要重新解析数据文件。
+
+数据布局（与数据文件一致，见 flow_model）:
+    by_order[period_idx, flow_idx, entry_idx]
+
+文件格式（写在原有的 names/angles/flow_i 之后，原有流量行可省略）:
+    interval: 15
+    period: 07:00-07:15
+    flow_0: ...
+    flow_1: ...
+    period: 07:15-07:30
+    ...
+"""
+import numpy as np
+
+import flow_model
+from intersection import format_number
+
+# 默认时段长度（分钟）
+DEFAULT_INTERVAL_MINUTES = 15
+# 高峰小时长度（分钟）
+PEAK_HOUR_MINUTES = 60
+
+
+class FlowSeries:
+    """多时段流量张量（by_order[period_idx, flow_idx, entry_idx]）"""
+
+    def __init__(self, by_order, labels=None, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+        by_order = np.asarray(by_order, dtype=float)
+        if by_order.ndim != 3 or by_order.shape[1] != by_order.shape[2]:
+            raise ValueError(f'流量张量形状应为 (时段数, N, N)，实际为 {by_order.shape}')
+        self.by_order = by_order
+        num_periods = by_order.shape[0]
+        if labels is None:
+            labels = [str(i + 1) for i in range(num_periods)]
+        self.labels = [str(label) for label in labels]
+        if len(self.labels) != num_periods:
+            raise ValueError('时段名称数量与时段数不一致')
+        self.interval_minutes = interval_minutes or DEFAULT_INTERVAL_MINUTES
+
+    @property
+    def num_periods(self):
+        return self.by_order.shape[0]
+
+    @property
+    def num_entries(self):
+        return self.by_order.shape[-1]
+
+    def periods_per_hour(self):
+        """一小时包含的时段数（至少为1）"""
+        return max(1, int(round(PEAK_HOUR_MINUTES / self.interval_minutes)))
+
+    def period_totals(self):
+        """各时段的交叉口总流量，形如 (时段数,)"""
+        return self.by_order.sum(axis=(-2, -1))
+
+    def rolling(self, window):
+        """
+        滑动窗口合计（前缀和相减，不逐窗口循环）
+
+        返回:
+            形如 (时段数 - window + 1, N, N) 的数组，第 k 项为时段 k..k+window-1 的合计
+        """
+        window = int(window)
+        if window < 1 or window > self.num_periods:
+            raise ValueError(f'窗口长度应在 1..{self.num_periods} 之间: {window}')
+        cumulative = np.zeros((self.num_periods + 1,) + self.by_order.shape[1:])
+        np.cumsum(self.by_order, axis=0, out=cumulative[1:])
+        return cumulative[window:] - cumulative[:-window]
+
+    def peak_window(self, window=None):
+        """
+        总流量最大的连续窗口（默认为高峰小时）
+
+        返回:
+            (起始时段索引, 窗口长度)
+        """
+        if window is None:
+            window = min(self.periods_per_hour(), self.num_periods)
+        totals = self.period_totals()
+        cumulative = np.concatenate(([0.0], np.cumsum(totals)))
+        sums = cumulative[window:] - cumulative[:-window]
+        return int(np.argmax(sums)), int(window)
+
+    def aggregate(self, start=0, length=1):
+        """
+        时段 start..start+length-1 的流量合计
+
+        返回:
+            形如 (N, N) 的数组 by_order[flow_idx, entry_idx]，可直接作为 old_flows 绘图
+        """
+        start, length = int(start), int(length)
+        if start < 0 or length < 1 or start + length > self.num_periods:
+            raise IndexError(f'时段范围超出 1..{self.num_periods}: {start + 1}..{start + length}')
+        return self.by_order[start:start + length].sum(axis=0)
+
+    def peak_hour(self):
+        """高峰小时合计，返回 (起始时段索引, 窗口长度, by_order)"""
+        start, length = self.peak_window()
+        return start, length, self.aggregate(start, length)
+
+    def find_period(self, key):
+        """
+        按时段名称或序号（从1开始）查找时段索引
+
+        返回:
+            时段索引；找不到时返回 None
+        """
+        key = str(key).strip()
+        if key in self.labels:
+            return self.labels.index(key)
+        try:
+            index = int(key) - 1
+        except ValueError:
+            return None
+        return index if 0 <= index < self.num_periods else None
+
+    def window_label(self, start, length=1):
+        """时段范围的显示名称（如 07:00-07:15 ~ 07:45-08:00）"""
+        if length == 1:
+            return self.labels[start]
+        return f'{self.labels[start]} ~ {self.labels[start + length - 1]}'
+
+    def flow_matrices(self, traffic_rule='right'):
+        """所有时段的进口→出口流量矩阵，形如 (时段数, N, N)"""
+        return flow_model.build_flow_matrix(self.by_order, traffic_rule)
+
+    def reorder_entries(self, order):
+        """按新的进口顺序重新排列（order[k] 为新第 k 个进口的原索引），返回新的 FlowSeries"""
+        return FlowSeries(self.by_order[:, :, list(order)], self.labels, self.interval_minutes)
+
+    def format_lines(self):
+        """
+        转换为数据文件中的时段块文本行
+
+        数值按完整精度写出（整数不带小数点，见 intersection.format_number），
+        保存后再读取与原数据一致。
+
+        返回:
+            行列表（不含换行符）
+        """
+        lines = [f'interval: {format_number(self.interval_minutes)}']
+        for label, period in zip(self.labels, self.by_order):
+            lines.append(f'period: {label}')
+            for flow_idx, row in enumerate(period):
+                lines.append(f'flow_{flow_idx}: ' + ','.join(format_number(value) for value in row))
+        return lines
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+字体注册表模块
+进程内统一解析字体文件的名称表（family / PostScript 名称），每个字体文件只解析一次、
+只向 matplotlib 注册一次；解析结果按文件路径和修改时间持久化到磁盘缓存，
+后续启动无需再用 fontTools 打开字体文件。
+"""
+import os
+import json
+import threading
+
+# 磁盘缓存文件名（位于当前用户的缓存目录中，见 config.get_cache_dir）
+FONT_CACHE_FILE = 'font_cache.json'
+# 缓存格式版本（格式变化时递增，旧缓存自动失效）
+FONT_CACHE_VERSION = 1
+
+_lock = threading.Lock()
+_names_cache = None  # {字体文件路径: {'mtime': ..., 'size': ..., 'family': ..., 'postscript': ...}}
+_registered_fonts = set()  # 已注册到 matplotlib 的字体文件
+_configured_font = None  # 最近一次配置到 matplotlib rcParams 的字体文件
+
+
+def get_cache_path():
+    """获取字体缓存文件路径（当前用户的缓存目录，不写入程序目录）"""
+    import config
+    return os.path.join(config.get_cache_dir(), FONT_CACHE_FILE)
+
+
+def _load_disk_cache():
+    """读取磁盘缓存（仅在首次使用时读取一次）"""
+    global _names_cache
+    if _names_cache is not None:
+        return _names_cache
+    _names_cache = {}
+    try:
+        with open(get_cache_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == FONT_CACHE_VERSION:
+            _names_cache = data.get('fonts', {})
+    except:
+        pass
+    return _names_cache
+
+
+def _save_disk_cache():
+    """写回磁盘缓存（写入失败时忽略，例如缓存目录不可写）"""
+    try:
+        cache_path = get_cache_path()
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': FONT_CACHE_VERSION, 'fonts': _names_cache}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, cache_path)
+    except:
+        pass
+
+
+def _read_name_table(font_file):
+    """用 fontTools 读取字体名称表中的 Font Family name（nameID=1）和 PostScript name（nameID=6）"""
+    from fontTools.ttLib import TTFont
+    font = TTFont(font_file, lazy=True, fontNumber=0)
+    try:
+        family = None
+        postscript = None
+        for record in font['name'].names:
+            if record.nameID == 1 and family is None:
+                family = record.toUnicode()
+            elif record.nameID == 6 and postscript is None:
+                postscript = record.toUnicode()
+        return family, postscript
+    finally:
+        font.close()
+
+
+def get_font_names(font_file):
+    """
+    获取字体文件的名称信息（优先使用内存/磁盘缓存）
+
+    返回:
+        {'family': Font Family name 或 None, 'postscript': PostScript name 或 None}；
+        文件不存在或无法解析时返回 None
+    """
+    if not font_file:
+        return None
+    try:
+        stat = os.stat(font_file)
+    except OSError:
+        return None
+    key = os.path.abspath(font_file)
+
+    with _lock:
+        cache = _load_disk_cache()
+        entry = cache.get(key)
+        if entry and entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size:
+            return {'family': entry.get('family'), 'postscript': entry.get('postscript')}
+
+        try:
+            family, postscript = _read_name_table(font_file)
+        except:
+            return None
+        cache[key] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'family': family,
+            'postscript': postscript,
+        }
+        _save_disk_cache()
+        return {'family': family, 'postscript': postscript}
+
+
+def get_family_name(font_file, prefer='family'):
+    """
+    获取字体名称
+
+    参数:
+        font_file: 字体文件路径
+        prefer: 'family' 优先返回 Font Family name（用于 Tkinter），
+                'postscript' 优先返回 PostScript name（用于 matplotlib）
+    返回:
+        字体名称；无法获取时返回 None
+    """
+    names = get_font_names(font_file)
+    if not names:
+        return None
+    if prefer == 'postscript':
+        return names['postscript'] or names['family']
+    return names['family'] or names['postscript']
+
+
+def register_font(font_file):
+    """将字体文件注册到 matplotlib（每个文件只注册一次）"""
+    if not font_file:
+        return False
+    key = os.path.abspath(font_file)
+    if key in _registered_fonts:
+        return True
+    try:
+        import matplotlib.font_manager as fm
+        fm.fontManager.addfont(font_file)
+    except:
+        return False
+    _registered_fonts.add(key)
+    return True
+
+
+def configure_matplotlib_font(font_file):
+    """
+    配置 matplotlib 使用指定字体文件（注册字体并设置 rcParams 的无衬线字体列表）
+    同一字体文件重复调用时直接返回
+    """
+    global _configured_font
+    if not font_file:
+        return False
+    key = os.path.abspath(font_file)
+    if _configured_font == key:
+        return True
+
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.family'] = 'sans-serif'
+    register_font(font_file)
+    font_name = get_family_name(font_file, prefer='postscript')
+    if font_name:
+        plt.rcParams['font.sans-serif'] = [font_name, 'Arial', 'DejaVu Sans']
+    else:
+        plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
+    _configured_font = key
+    return True
@@ -18,6 +18,9 @@ LANGUAGES = {
         'btn_4way': '4路交叉口',
         'btn_5way': '5路交叉口',
         'btn_6way': '6路交叉口',
+        'btn_more_ways': '更多路数…',
+        'ask_num_entries_title': '交叉口路数',
+        'ask_num_entries_prompt': '请输入交叉口路数（{min}-{max}）：',
         'btn_load_file': '读取数据文件',
         
         # 表格相关
@@ -63,7 +66,7 @@ LANGUAGES = {
         'file_encoding_error': '无法读取文件 {file}，请检查文件编码。',
         'file_format_error_infer': '文件格式不正确，无法推断交叉口路数。',
         'file_num_entries_error': '交叉口路数错误，请核对数据后再读取',
-        'file_num_entries_infer_error': '无法从数据推断路数，推断结果为{num}路，不在有效范围内（3-6路）',
+        'file_num_entries_infer_error': '无法从数据推断路数，推断结果为{num}路，不在有效范围内（3-12路）',
         'file_read_error': '无法读取文件。',
         'file_cannot_parse': '文件无法解析，请重新选择数据文件。',
         
@@ -81,6 +84,12 @@ LANGUAGES = {
         'export_filetype_jpg': 'JPG 图片',
         'export_filetype_tif': 'TIF 图片',
         'export_default_filename': '交叉口交通流量流向可视化图',
+        'export_stage_render': '正在绘制…',
+        'export_stage_encode': '正在生成 {format}…',
+        'export_stage_write': '正在写入文件…',
+        'export_cancelled': '已取消导出',
+        'btn_cancel_export': '取消导出',
+        'btn_export_profile': '按方案导出',
         
         # 文件格式
         'file_declaration': '本交叉口为{num}路交叉口，实行{rule}行通行规则。',
@@ -170,6 +179,9 @@ LANGUAGES = {
         'btn_4way': '4-Way Intersection',
         'btn_5way': '5-Way Intersection',
         'btn_6way': '6-Way Intersection',
+        'btn_more_ways': 'More Legs…',
+        'ask_num_entries_title': 'Number of Legs',
+        'ask_num_entries_prompt': 'Enter the number of legs ({min}-{max}):',
         'btn_load_file': 'Load Data File',
         
         # Table related
@@ -215,7 +227,7 @@ LANGUAGES = {
         'file_encoding_error': 'Cannot read file {file}, please check file encoding.',
         'file_format_error_infer': 'Invalid file format. Cannot infer intersection type.',
         'file_num_entries_error': 'Intersection type error. Please check data before reading.',
-        'file_num_entries_infer_error': 'Cannot infer intersection type from data. Inferred result is {num}-way, not in valid range (3-6 ways)',
+        'file_num_entries_infer_error': 'Cannot infer intersection type from data. Inferred result is {num}-way, not in valid range (3-12 ways)',
         'file_read_error': 'Cannot read file.',
         'file_cannot_parse': 'The file cannot be parsed. Please select another data file.',
         
@@ -233,6 +245,12 @@ LANGUAGES = {
         'export_filetype_jpg': 'JPG Image',
         'export_filetype_tif': 'TIF Image',
         'export_default_filename': 'Intersection Traffic Flow Visualization',
+        'export_stage_render': 'Drawing…',
+        'export_stage_encode': 'Generating {format}…',
+        'export_stage_write': 'Writing file…',
+        'export_cancelled': 'Export cancelled',
+        'btn_cancel_export': 'Cancel Export',
+        'btn_export_profile': 'Export Profile',
         
         # File format
         'file_declaration': 'This intersection is a {num}-way intersection, implementing {rule}-hand traffic rule.',
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时分析模块
+相当于内置的 python -X importtime（PyInstaller 打包后无法传入 -X 参数）：
+在 sys.meta_path 最前面插入一个查找器，记录每个模块执行的自身耗时和累计耗时。
+
+用法:
+    python main.py --profile-startup
+"""
+import sys
+import time
+
+_profiler = None
+
+
+class _TimedLoader:
+    """包装原加载器，统计 exec_module 的耗时（其余属性透传给原加载器）"""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        profiler = self._profiler
+        depth = len(profiler.stack)
+        profiler.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = profiler.stack.pop()
+            if profiler.stack:
+                profiler.stack[-1] += elapsed
+            profiler.records.append((self._name, elapsed - children, elapsed, depth))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportProfiler:
+    """导入耗时记录器（meta path 查找器）"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.records = []  # [(模块名, 自身耗时, 累计耗时, 嵌套深度), ...]
+        self.stack = []
+        self._finding = set()
+
+    def find_spec(self, fullname, path=None, target=None):
+        # 防止递归：由其余查找器完成真正的查找
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def report(self, title='startup', top=25, file=None):
+        """
+        输出导入耗时报告
+
+        参数:
+            title: 报告标题（如 '首个对话框'）
+            top: 按累计耗时列出的顶层模块数
+            file: 输出流，默认 sys.stderr
+        """
+        file = file or sys.stderr
+        elapsed = time.perf_counter() - self.start_time
+        total = sum(record[1] for record in self.records)
+        print(f'[profile-startup] {title}: {elapsed * 1000:.1f} ms since start, '
+              f'{len(self.records)} modules imported in {total * 1000:.1f} ms', file=file)
+        print('import time:  self [ms] | cumulative [ms] | imported package', file=file)
+        # 只列出顶层导入（深度为0），按累计耗时排序
+        top_level = sorted((r for r in self.records if r[3] == 0), key=lambda r: r[2], reverse=True)
+        for name, self_time, cumulative, _ in top_level[:top]:
+            print(f'import time: {self_time * 1000:10.1f} | {cumulative * 1000:15.1f} | {name}', file=file)
+
+
+def install():
+    """开始记录导入耗时（重复调用只安装一次）"""
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+    return _profiler
+
+
+def report(title='startup', **kwargs):
+    """输出导入耗时报告（未安装时不输出）"""
+    if _profiler is not None:
+        _profiler.report(title, **kwargs)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+交叉口数据模型模块
+Intersection 以类型化的值保存一个交叉口：路名、方位角（浮点数组）、按流向顺序存储的流量矩阵
+（NumPy 数组，见 flow_model）和通行规则。表格、文件读写、绘图和批处理工具共用同一个对象，
+数值只在输入或读取文件时解析一次，之后不再经过字符串转换。
+
+数据布局（与数据文件一致）:
+    by_order[flow_idx, entry_idx]
+"""
+import numpy as np
+
+import flow_model
+
+
+def parse_number(text):
+    """将输入文本转换为浮点数，空值和无效值为 0.0"""
+    try:
+        return float(text)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def format_number(value):
+    """数值的显示/保存文本（整数不带小数点）"""
+    value = float(value)
+    try:
+        if value == int(value):
+            return str(int(value))
+    except (ValueError, OverflowError):
+        pass
+    return str(value)
+
+
+class Intersection:
+    """
+    交叉口数据
+
+    属性:
+        names: 进口名称列表
+        angles: 进口方位角，形如 (N,) 的浮点数组
+        by_order: 流量，形如 (N, N) 的浮点数组 by_order[flow_idx, entry_idx]
+        traffic_rule: 'right'（右行）或'left'（左行）
+        version: 数据版本号，每次修改加1（供缓存判断数据是否变化）
+    """
+    __slots__ = ('names', 'angles', 'by_order', 'traffic_rule', 'version')
+
+    def __init__(self, names, angles, by_order, traffic_rule='right'):
+        by_order = np.array(by_order, dtype=float)
+        if by_order.ndim != 2 or by_order.shape[0] != by_order.shape[1]:
+            raise ValueError(f'流量矩阵形状应为 (N, N)，实际为 {by_order.shape}')
+        num_entries = by_order.shape[0]
+        names = [str(name) for name in list(names)[:num_entries]]
+        self.names = names + [''] * (num_entries - len(names))
+        self.angles = np.zeros(num_entries)
+        angles = np.asarray(angles, dtype=float)[:num_entries]
+        self.angles[:len(angles)] = angles
+        self.by_order = by_order
+        self.traffic_rule = traffic_rule
+        self.version = 0
+
+    @classmethod
+    def empty(cls, num_entries, traffic_rule='right'):
+        """空交叉口（路名为空，方位角和流量为0）"""
+        return cls([''] * num_entries, np.zeros(num_entries), np.zeros((num_entries, num_entries)), traffic_rule)
+
+    @classmethod
+    def from_record(cls, record):
+        """由 data_parser.FlowRecord 创建"""
+        return cls(record.names, record.angles, record.flows, record.traffic_rule)
+
+    @property
+    def num_entries(self):
+        return len(self.names)
+
+    def set_name(self, entry_idx, name):
+        self.names[entry_idx] = name
+        self.version += 1
+
+    def set_angle(self, entry_idx, angle):
+        self.angles[entry_idx] = angle
+        self.version += 1
+
+    def set_flow(self, flow_idx, entry_idx, value):
+        self.by_order[flow_idx, entry_idx] = value
+        self.version += 1
+
+    def set_traffic_rule(self, traffic_rule):
+        self.traffic_rule = traffic_rule
+        self.version += 1
+
+    def normalize_angles(self):
+        """将方位角归一化到0-360度范围"""
+        np.mod(self.angles, 360.0, out=self.angles)
+        self.version += 1
+
+    def angle_order(self):
+        """按归一化方位角排列进口的顺序（稳定排序），order[k] 为第 k 个进口的原索引"""
+        return np.argsort(np.mod(self.angles, 360.0), kind='stable')
+
+    def reorder(self, order):
+        """按新的进口顺序重新排列（order[k] 为新第 k 个进口的原索引）"""
+        order = list(order)
+        self.names = [self.names[i] for i in order]
+        self.angles = self.angles[order]
+        self.by_order = self.by_order[:, order]
+        self.version += 1
+
+    def is_empty(self):
+        """所有流量都为空或为0时返回 True（空单元格和无效输入按0处理）"""
+        return not self.by_order.any()
+
+    def flows(self):
+        """进口→出口流量矩阵 flows[entry_idx, exit_idx]"""
+        return flow_model.build_flow_matrix(self.by_order, self.traffic_rule)
+
+    def format_lines(self):
+        """
+        转换为数据文件中的路名、方位角和流量行
+
+        返回:
+            行列表（不含换行符）
+        """
+        lines = [','.join(self.names), ','.join(format_number(angle) for angle in self.angles)]
+        lines.extend(','.join(format_number(value) for value in row) for row in self.by_order)
+        return lines
+
+
+def load(file_name):
+    """
+    读取并解析数据文件（不依赖 Tk，见 data_parser.parse_intersection_file）
+
+    返回:
+        (Intersection, 多时段数据 flow_series.FlowSeries 或 None)；无法解析时返回 None
+    """
+    import data_parser
+
+    record = data_parser.parse_intersection_file(file_name)
+    if record is None:
+        return None
+    return Intersection.from_record(record), record.series
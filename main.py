@@ -3,29 +3,51 @@
 主程序入口
 交叉口交通流量流向可视化工具
 """
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
 import os
 import sys
-import re
 
-# 显式导入matplotlib后端，确保PyInstaller打包时包含它们
-import matplotlib.backends.backend_pdf
-import matplotlib.backends._backend_pdf_ps
-import matplotlib.backends.backend_svg
+# 启动耗时分析参数（输出各模块导入耗时，见 import_profiler）
+PROFILE_STARTUP_FLAG = '--profile-startup'
+# 待安装更新的标记文件（与 update_checker.check_pending_update 一致）
+PENDING_UPDATE_MARKER = 'update_pending.txt'
+
+if __name__ == '__main__':
+    # 打包后的程序启动后台导出进程时，子进程在这里接管执行（见 export_worker）
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    if PROFILE_STARTUP_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_STARTUP_FLAG)
+        import import_profiler
+        import_profiler.install()
 
-plt.ioff()
+    # 命令行模式：带参数启动时直接渲染并退出，不导入 tkinter、界面和更新模块
+    import cli
+    if cli.is_cli_invocation(sys.argv[1:]):
+        exit_code = cli.main(sys.argv[1:])
+        if 'import_profiler' in sys.modules:
+            import_profiler.report('cli')
+        sys.exit(exit_code)
 
-# 导入更新检查模块
-try:
-    import update_checker
-    UPDATE_CHECKER_AVAILABLE = True
-except ImportError:
-    UPDATE_CHECKER_AVAILABLE = False
 
-# 程序启动时检查待安装的更新
-if UPDATE_CHECKER_AVAILABLE:
+def get_program_dir():
+    """获取程序目录（打包后为可执行文件所在目录）"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def run_pending_update():
+    """
+    程序启动时检查待安装的更新
+    只有存在标记文件时才导入更新模块，正常启动不加载网络相关模块
+    """
+    if not os.path.exists(os.path.join(get_program_dir(), PENDING_UPDATE_MARKER)):
+        return
+    try:
+        import update_checker
+    except ImportError:
+        return
     try:
         has_pending, new_file_path, current_exe_path, version, language = update_checker.check_pending_update()
         if has_pending:
@@ -41,15 +63,31 @@ if UPDATE_CHECKER_AVAILABLE:
         # 检查更新时出错，继续运行当前程序
         print(f"检查待安装更新时出错: {e}")
 
-# 导入项目模块
+
+def start_update_check():
+    """后台检查更新（首次需要时才导入更新模块）"""
+    try:
+        import update_manager
+    except ImportError:
+        return
+    update_manager.auto_check_update_background()
+
+
+def plot_current_table():
+    """绘制当前表格（首次绘图时才导入 matplotlib 和绘图模块）"""
+    import i18n
+    import plotting
+    plotting.plot_traffic_flow(i18n._ui_components.get('table'))
+
+
+# 导入启动界面所需的项目模块（matplotlib、导出后端、绘图和更新模块均在首次使用时加载）
+import tkinter as tk
+from tkinter import ttk, messagebox
+
 import i18n
 import config
 import ui_utils
-import table_widget
-import file_operations
-import update_manager
 import dialogs
-import plotting
 
 
 def main():
@@ -73,6 +111,8 @@ def main():
         i18n.set_language(config_data['language'])
     
     # 选择交叉口类型或读取文件
+    if 'import_profiler' in sys.modules:
+        import_profiler.report('intersection type dialog')
     try:
         choice = dialogs.select_intersection_type()
     except Exception as e:
@@ -101,6 +141,9 @@ def main():
     
     traffic_rule = config_data.get('traffic_rule', 'right')
     
+    import table_widget
+    import file_operations
+    
     # 创建表格
     table = table_widget.Table(root, num_entries=num_entries, traffic_rule=traffic_rule)
     table.pack()
@@ -140,7 +183,7 @@ def main():
         ('clear_data', i18n.t('btn_clear_data'), file_operations.on_clear_data_click),
         ('save', i18n.t('btn_save'), file_operations.on_save_data_click),
         ('save_as', i18n.t('btn_save_as'), file_operations.on_save_data_as_click),
-        ('plot', i18n.t('btn_draw'), lambda: plotting.plot_traffic_flow(i18n._ui_components.get('table'))),
+        ('plot', i18n.t('btn_draw'), plot_current_table),
         ('help', i18n.t('btn_help'), dialogs.show_help),
         ('about', i18n.t('btn_about'), on_about_click)
     ]
@@ -208,14 +251,17 @@ def main():
     root.after(50, lambda: ui_utils.set_window_icon(root))
     
     # 启动更新检查
-    if UPDATE_CHECKER_AVAILABLE:
-        root.after(3000, update_manager.auto_check_update_background)
+    root.after(3000, start_update_check)
     
     # 添加关闭事件
     def on_main_window_close():
         try:
             config.save_config(table=table)
-            plt.close('all')
+            # os._exit 不会执行 atexit，退出前立即写入尚未保存的配置
+            config.flush_config()
+            # 只有打开过绘图窗口时才需要关闭 matplotlib 图形
+            if 'matplotlib.pyplot' in sys.modules:
+                sys.modules['matplotlib.pyplot'].close('all')
             root.quit()
             root.destroy()
         except:
@@ -230,5 +276,6 @@ def main():
 
 
 if __name__ == '__main__':
+    run_pending_update()
     main()
 
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+路网/干线视图模块
+把多个交叉口按给定坐标绘制在同一张图上，便于比较相邻交叉口的流量。
+
+- 所有交叉口使用同一比例尺（全部交叉口中的最大流向流量），流线宽度可直接比较
+- 每个交叉口通过平移缩放变换放到各自的坐标上，图形本身仍按单个交叉口的坐标系绘制
+- 视口之外的交叉口不显示（视口裁剪）；按交叉口在屏幕上的大小切换细节层级：
+  远景只绘制进口/出口流量线和箭头，中景绘制完整图形，近景再加上文字标注
+- 各层级的图形在首次需要时才绘制，之后平移/缩放只切换显示状态
+
+路网文件每行一个交叉口：x, y, 数据文件（相对路径相对于路网文件所在目录），# 开头为注释。
+
+用法:
+    python network_view.py 干线.txt -o 干线.png --dpi 200
+    python network_view.py 干线.txt -o 局部.svg --viewport 0 1500 -300 300
+    python network_view.py 干线.txt --show
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+# 细节层级
+LOD_OVERVIEW = 'overview'  # 只绘制进口/出口流量线和箭头
+LOD_GEOMETRY = 'geometry'  # 完整几何图形，不含文字
+LOD_DETAIL = 'detail'      # 完整几何图形和文字标注
+# 交叉口在屏幕上的直径（像素）达到该值时切换到对应层级
+LOD_GEOMETRY_PIXELS = 150
+LOD_DETAIL_PIXELS = 400
+# 未指定交叉口大小时，取相邻交叉口最近距离的比例（图形之间留出空隙）
+NODE_SIZE_SPACING_RATIO = 0.9
+# 路网图的默认尺寸（英寸）
+NETWORK_FIGURE_SIZE = (16, 9)
+# 文字标注的图层顺序（在所有交叉口的几何图形之上）
+LABEL_ZORDER = 2
+
+
+class NetworkNode:
+    """
+    路网中的一个交叉口
+
+    属性:
+        name: 名称（默认为数据文件名）
+        intersection: intersection.Intersection
+        x, y: 交叉口中心在路网中的坐标
+    """
+    __slots__ = ('name', 'intersection', 'x', 'y')
+
+    def __init__(self, name, intersection, x, y):
+        self.name = name
+        self.intersection = intersection
+        self.x = float(x)
+        self.y = float(y)
+
+
+def load_network(file_name):
+    """
+    读取路网文件（每行 x, y, 数据文件）
+
+    返回:
+        NetworkNode 列表；格式错误或数据文件无法解析时抛出 ValueError
+    """
+    import intersection
+
+    base_dir = os.path.dirname(os.path.abspath(file_name))
+    loaded = {}
+    nodes = []
+    with open(file_name, 'r', encoding='utf-8-sig') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split(',', 2)]
+            if len(fields) != 3 or not fields[2]:
+                raise ValueError(f'第{line_number}行格式应为 x, y, 数据文件: {line}')
+            try:
+                x, y = float(fields[0]), float(fields[1])
+            except ValueError:
+                raise ValueError(f'第{line_number}行坐标无效: {line}')
+            data_file = os.path.join(base_dir, fields[2])
+            # 同一数据文件出现多次时只解析一次
+            if data_file not in loaded:
+                result = intersection.load(data_file) if os.path.isfile(data_file) else None
+                if result is None:
+                    raise ValueError(f'第{line_number}行数据文件无法读取或解析: {fields[2]}')
+                loaded[data_file] = result[0]
+            name = os.path.splitext(os.path.basename(data_file))[0]
+            nodes.append(NetworkNode(name, loaded[data_file], x, y))
+    if not nodes:
+        raise ValueError(f'路网文件中没有交叉口: {file_name}')
+    return nodes
+
+
+def global_max_volume(nodes):
+    """全部交叉口中的最大流向流量（所有交叉口共用的线宽比例尺）"""
+    import flow_model
+
+    return max(float(flow_model.compute_totals(node.intersection.flows())[2]) for node in nodes)
+
+
+def default_node_size(nodes):
+    """
+    交叉口图形的默认直径（路网坐标单位）：相邻交叉口最近距离的 NODE_SIZE_SPACING_RATIO 倍
+    只有一个交叉口或全部重合时为 1
+    """
+    positions = np.array([(node.x, node.y) for node in nodes])
+    nearest = np.inf
+    # 逐行计算到其余交叉口的距离（内存占用与交叉口数成正比）
+    for i in range(len(positions) - 1):
+        distances = np.hypot(*(positions[i + 1:] - positions[i]).T)
+        distances = distances[distances > 0]
+        if distances.size:
+            nearest = min(nearest, distances.min())
+    return float(nearest * NODE_SIZE_SPACING_RATIO) if np.isfinite(nearest) else 1.0
+
+
+def level_of_detail(pixels):
+    """按交叉口在屏幕上的直径（像素）选择细节层级"""
+    if pixels >= LOD_DETAIL_PIXELS:
+        return LOD_DETAIL
+    if pixels >= LOD_GEOMETRY_PIXELS:
+        return LOD_GEOMETRY
+    return LOD_OVERVIEW
+
+
+class NetworkView:
+    """
+    在一个坐标轴上绘制路网（统一比例尺、视口裁剪、按缩放级别切换细节）
+
+    参数:
+        ax: matplotlib轴对象（Agg 画布或交互窗口均可）
+        nodes: NetworkNode 列表
+        node_size: 每个交叉口图形的直径（路网坐标单位），None 时见 default_node_size
+        max_volume: 线宽比例尺使用的最大流向流量，None 时取全部交叉口的最大值
+        road_font_size / flow_font_size: 标注字号，None 表示使用默认值
+        font_file: 字体文件路径，None 时自动查找
+    """
+
+    def __init__(self, ax, nodes, node_size=None, max_volume=None, road_font_size=None,
+                 flow_font_size=None, font_file=None):
+        import render_engine
+
+        self.ax = ax
+        self.nodes = list(nodes)
+        self.node_size = float(node_size) if node_size else default_node_size(self.nodes)
+        self.max_volume = max_volume or global_max_volume(self.nodes)
+        self.road_font_size = render_engine.clamp_font_size(
+            road_font_size, render_engine.DEFAULT_ROAD_LABEL_FONT_SIZE)
+        self.flow_font_size = render_engine.clamp_font_size(
+            flow_font_size, render_engine.DEFAULT_FLOW_LABEL_FONT_SIZE)
+        self.font_file = render_engine.resolve_font(font_file)
+
+        self.positions = np.array([(node.x, node.y) for node in self.nodes])
+        self._models = [None] * len(self.nodes)
+        # 每个交叉口各层级已绘制的图形 {层级: [图形, ...]}，以及当前显示的层级（None 为不显示）
+        self._artists = [{} for _ in self.nodes]
+        self._shown = [None] * len(self.nodes)
+        self._connections = []
+
+    def extent(self):
+        """包含全部交叉口图形的范围 (x0, x1, y0, y1)"""
+        half = self.node_size / 2
+        x0, y0 = self.positions.min(axis=0) - half
+        x1, y1 = self.positions.max(axis=0) + half
+        return x0, x1, y0, y1
+
+    def _model(self, index):
+        import render_engine
+
+        if self._models[index] is None:
+            inter = self.nodes[index].intersection
+            self._models[index] = render_engine.prepare_intersection(
+                inter.names, inter.angles, inter.by_order, inter.num_entries, inter.traffic_rule,
+                max_volume=self.max_volume)
+        return self._models[index]
+
+    def _transform(self, index):
+        """单个交叉口坐标系 -> 路网坐标的变换（图形中心平移到交叉口坐标，直径缩放为 node_size）"""
+        from matplotlib.transforms import Affine2D
+        from drawing_utils import PLOT_XLIM, PLOT_YLIM
+
+        scale = self.node_size / max(PLOT_XLIM[1] - PLOT_XLIM[0], PLOT_YLIM[1] - PLOT_YLIM[0])
+        node = self.nodes[index]
+        return Affine2D().scale(scale).translate(node.x, node.y) + self.ax.transData
+
+    def _draw(self, index, lod):
+        """绘制交叉口某一层级的图形（已绘制时直接返回）"""
+        import render_engine
+
+        artists = self._artists[index]
+        if lod in artists:
+            return artists[lod]
+        model = self._model(index)
+        if lod == LOD_OVERVIEW:
+            drawn = render_engine.draw_geometry(self.ax, model, include_turns=False)
+        elif lod == LOD_GEOMETRY:
+            drawn = render_engine.draw_geometry(self.ax, model)
+        else:
+            # 近景复用中景的几何图形，只另外绘制文字标注
+            labels = render_engine.draw_labels(self.ax, model, self.road_font_size, self.flow_font_size,
+                                               fontname=self.font_file)
+            for artist in labels:
+                artist.set_zorder(LABEL_ZORDER)
+            drawn = self._draw(index, LOD_GEOMETRY) + labels
+        transform = self._transform(index)
+        for artist in drawn:
+            artist.set_transform(transform)
+            artist.set_visible(False)
+        artists[lod] = drawn
+        return drawn
+
+    def _set_visible(self, index, lod, visible):
+        for artist in self._artists[index].get(lod, ()):
+            artist.set_visible(visible)
+
+    def visible_nodes(self):
+        """与当前视口相交的交叉口（布尔数组）"""
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        half = self.node_size / 2
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+        return (x + half >= x0) & (x - half <= x1) & (y + half >= y0) & (y - half <= y1)
+
+    def node_pixels(self):
+        """交叉口图形在屏幕上的直径（像素）"""
+        x0, x1 = self.ax.get_xlim()
+        return self.node_size * self.ax.bbox.width / max(abs(x1 - x0), 1e-12)
+
+    def update(self, *_):
+        """
+        按当前视口和缩放级别更新显示的图形（可直接作为坐标轴范围变化的回调）
+
+        返回:
+            当前显示的交叉口数量
+        """
+        visible = self.visible_nodes()
+        lod = level_of_detail(self.node_pixels())
+        for index in range(len(self.nodes)):
+            wanted = lod if visible[index] else None
+            shown = self._shown[index]
+            if wanted == shown:
+                continue
+            if shown is not None:
+                self._set_visible(index, shown, False)
+            if wanted is not None:
+                self._draw(index, wanted)
+                self._set_visible(index, wanted, True)
+            self._shown[index] = wanted
+        return int(visible.sum())
+
+    def connect(self):
+        """平移、缩放或调整窗口大小时自动调用 update"""
+        self._connections = [
+            self.ax.callbacks.connect('xlim_changed', self.update),
+            self.ax.callbacks.connect('ylim_changed', self.update),
+        ]
+        self._canvas_connection = self.ax.figure.canvas.mpl_connect('resize_event', self.update)
+
+    def disconnect(self):
+        for connection in self._connections:
+            self.ax.callbacks.disconnect(connection)
+        if self._connections:
+            self.ax.figure.canvas.mpl_disconnect(self._canvas_connection)
+        self._connections = []
+
+
+def _setup_axes(ax, view, viewport=None):
+    """
+    设置路网坐标轴（等比例、无坐标轴）
+    viewport 为 (x0, x1, y0, y1)，None 时显示全部交叉口；范围按坐标轴的宽高比向两侧扩展，保证完整显示
+    """
+    x0, x1, y0, y1 = viewport or view.extent()
+    center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+    width, height = abs(x1 - x0), abs(y1 - y0)
+    axes_ratio = ax.bbox.width / ax.bbox.height
+    if width / height < axes_ratio:
+        width = height * axes_ratio
+    else:
+        height = width / axes_ratio
+    ax.set_aspect('equal')
+    ax.set_xlim(center_x - width / 2, center_x + width / 2)
+    ax.set_ylim(center_y - height / 2, center_y + height / 2)
+    ax.set_axis_off()
+
+
+def network_figure(nodes, viewport=None, figure_size=NETWORK_FIGURE_SIZE, dpi=None, **view_kwargs):
+    """
+    无界面绘制路网图
+
+    参数:
+        nodes: NetworkNode 列表
+        viewport: 显示范围 (x0, x1, y0, y1)，None 时显示全部交叉口
+        figure_size: 图形尺寸（英寸）
+        dpi: 分辨率，None 表示使用 FIGURE_DPI（细节层级按该分辨率下的像素大小选择）
+        view_kwargs: 传给 NetworkView 的参数
+
+    返回:
+        (Figure, NetworkView)
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from drawing_utils import FIGURE_DPI
+
+    fig = Figure(figsize=figure_size, dpi=dpi or FIGURE_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    view = NetworkView(ax, nodes, **view_kwargs)
+    _setup_axes(ax, view, viewport)
+    view.update()
+    return fig, view
+
+
+def show_network(nodes, viewport=None, figure_size=NETWORK_FIGURE_SIZE, **view_kwargs):
+    """在交互窗口中显示路网图（可用工具栏平移、缩放）"""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=figure_size)
+    ax = fig.add_axes((0, 0, 1, 1))
+    view = NetworkView(ax, nodes, **view_kwargs)
+    _setup_axes(ax, view, viewport)
+    view.update()
+    view.connect()
+    plt.show()
+
+
+def parse_viewport(values):
+    """检查命令行给出的显示范围 (x0, x1, y0, y1)，范围为空时抛出 ValueError"""
+    values = tuple(float(value) for value in values)
+    if len(values) != 4 or values[0] == values[1] or values[2] == values[3]:
+        raise ValueError(f'显示范围应为 x0 x1 y0 y1: {values}')
+    return values
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='绘制路网/干线流量图 / Render a corridor or network view')
+    parser.add_argument('input', help='路网文件（每行 x, y, 数据文件） / Network file (x, y, data file per line)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='导出文件，默认与路网文件同名的 PNG / Output file')
+    parser.add_argument('--dpi', type=int, default=None, help='导出分辨率 / Output DPI')
+    # 四个独立的数值参数：负数（如 -500）不会被 argparse 当作选项
+    parser.add_argument('--viewport', type=float, nargs=4, default=None, metavar=('X0', 'X1', 'Y0', 'Y1'),
+                        help='显示范围，默认显示全部交叉口 / Visible range')
+    parser.add_argument('--node-size', type=float, default=None,
+                        help='交叉口图形直径（路网坐标单位） / Intersection diameter in network units')
+    parser.add_argument('--road-font-size', type=int, default=None, help='路名标注字号 / Road label font size')
+    parser.add_argument('--flow-font-size', type=int, default=None, help='流量标注字号 / Flow label font size')
+    parser.add_argument('--font', default=None, help='字体文件 / Font file')
+    parser.add_argument('--show', action='store_true', help='在窗口中显示（可平移、缩放） / Open an interactive window')
+    args = parser.parse_args(argv)
+
+    import render_engine
+
+    try:
+        nodes = load_network(args.input)
+        viewport = parse_viewport(args.viewport) if args.viewport else None
+    except (OSError, ValueError) as e:
+        print(f'无法读取路网 / Cannot load network: {e}', file=sys.stderr)
+        return 1
+    view_kwargs = {
+        'node_size': args.node_size,
+        'road_font_size': args.road_font_size,
+        'flow_font_size': args.flow_font_size,
+        'font_file': args.font,
+    }
+
+    if args.show:
+        show_network(nodes, viewport, **view_kwargs)
+        return 0
+
+    output = args.output or os.path.splitext(args.input)[0] + '.png'
+    format = render_engine.format_from_extension(output)
+    if format is None:
+        print(f'不支持的导出格式 / Unsupported format: {output}', file=sys.stderr)
+        return 2
+    try:
+        fig, view = network_figure(nodes, viewport, dpi=args.dpi, **view_kwargs)
+        render_engine.save_figure(fig, output, format=format, dpi=fig.dpi)
+    except Exception as e:
+        print(f'导出失败 / Export failed: {e}', file=sys.stderr)
+        return 1
+    print(f'{output}（显示 {view.update()}/{len(nodes)} 个交叉口）')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
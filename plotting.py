@@ -12,9 +12,18 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import re
 
+import profiling
+import export_worker
+
 # 抑制 matplotlib 字体警告
 warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib.font_manager')
 
+# 绘图窗口由 Tk 管理，关闭 pyplot 交互模式
+plt.ioff()
+
+# 后台导出进度的轮询间隔（毫秒）
+EXPORT_POLL_INTERVAL_MS = 100
+
 # 延迟导入其他模块
 def t(key, **kwargs):
     """翻译函数（延迟导入i18n）"""
@@ -24,13 +33,6 @@ def t(key, **kwargs):
     except:
         return key
 
-def convert_to_float_list(string_list):
-    """将字符串列表转换为浮点数列表"""
-    try:
-        return [float(x) if x.strip() else 0.0 for x in string_list]
-    except:
-        return [0.0] * len(string_list)
-
 def get_ui_utils():
     """获取ui_utils模块的函数和变量"""
     try:
@@ -83,43 +85,16 @@ def get_root():
     return None
 
 
-def plot_traffic_flow(table_instance):
-    """绘制交通流量图"""
-    # 检查 table_instance 是否有效
-    if table_instance is None:
-        messagebox.showerror(t('file_load_error'), '表格对象未找到')
-        return
-    
-    # 配置 matplotlib 使用项目字体文件（抑制字体警告）
+def _configure_plot_font():
+    """配置 matplotlib 使用项目字体文件（抑制字体警告）"""
     try:
         import ui_utils
         # 优先使用项目字体文件
         font_file = ui_utils.get_font_file()
         if font_file:
-            # 使用字体文件路径
-            plt.rcParams['font.family'] = 'sans-serif'
-            # 注册字体文件到 matplotlib
-            fm.fontManager.addfont(font_file)
-            # 获取字体名称
-            try:
-                from fontTools.ttLib import TTFont
-                font = TTFont(font_file)
-                name_table = font.get('name')
-                font_name = None
-                for record in name_table.names:
-                    if record.nameID == 6:  # PostScript name
-                        font_name = record.toUnicode()
-                        break
-                    elif record.nameID == 1 and font_name is None:  # Font Family name
-                        font_name = record.toUnicode()
-                font.close()
-                if font_name:
-                    plt.rcParams['font.sans-serif'] = [font_name, 'Arial', 'DejaVu Sans']
-                else:
-                    plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
-            except:
-                # 如果无法读取字体名称，使用默认设置
-                plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
+            # 注册字体文件并设置 rcParams（字体名称由 font_registry 解析一次并缓存）
+            import font_registry
+            font_registry.configure_matplotlib_font(font_file)
         else:
             # 如果没有字体文件，使用安全字体
             safe_font = ui_utils.get_safe_font_family()
@@ -127,6 +102,18 @@ def plot_traffic_flow(table_instance):
             plt.rcParams['font.sans-serif'] = [safe_font, 'Arial', 'DejaVu Sans']
     except:
         pass
+
+
+def plot_traffic_flow(table_instance):
+    """绘制交通流量图"""
+    # 检查 table_instance 是否有效
+    if table_instance is None:
+        messagebox.showerror(t('file_load_error'), '表格对象未找到')
+        return
+    
+    # 配置 matplotlib 使用项目字体文件（抑制字体警告）
+    with profiling.stage('font_setup'):
+        _configure_plot_font()
     
     # 获取绘图工具函数和常量
     drawing = get_drawing_utils()
@@ -145,24 +132,8 @@ def plot_traffic_flow(table_instance):
         return
     
     # 解包绘图工具
-    normalize_index = drawing['normalize_index']
-    draw_line_with_width = drawing['draw_line_with_width']
-    draw_arrow = drawing['draw_arrow']
-    draw_arc_with_width = drawing['draw_arc_with_width']
-    draw_turn_path_generic = drawing['draw_turn_path_generic']
-    draw_traffic_volume_labels = drawing['draw_traffic_volume_labels']
-    draw_text = drawing['draw_text']
-    CENTER_OFFSET = drawing['CENTER_OFFSET']
-    INNER_RADIUS_COEFF = drawing['INNER_RADIUS_COEFF']
-    OUTER_RADIUS_COEFF = drawing['OUTER_RADIUS_COEFF']
-    MIDDLE_RADIUS_COEFF = drawing['MIDDLE_RADIUS_COEFF']
-    NAME_LABEL_OFFSET = drawing['NAME_LABEL_OFFSET']
-    MAX_LINE_WIDTH = drawing['MAX_LINE_WIDTH']
-    PLOT_XLIM = drawing['PLOT_XLIM']
-    PLOT_YLIM = drawing['PLOT_YLIM']
     FIGURE_SIZE = drawing['FIGURE_SIZE']
     FIGURE_DPI = drawing['FIGURE_DPI']
-    ENTRY_COLORS = drawing['ENTRY_COLORS']
     DEFAULT_ROAD_LABEL_FONT_SIZE = drawing['DEFAULT_ROAD_LABEL_FONT_SIZE']
     DEFAULT_FLOW_LABEL_FONT_SIZE = drawing['DEFAULT_FLOW_LABEL_FONT_SIZE']
     
@@ -171,94 +142,38 @@ def plot_traffic_flow(table_instance):
     set_window_icon = ui_utils['set_window_icon']
     center_window = ui_utils['center_window']
     
-    # 获取表格数据
+    # 获取表格数据（类型化的交叉口数据，见 intersection 模块）
     try:
-        table_instance.get()
-        data = table_instance.data
+        with profiling.stage('table_get'):
+            intersection = table_instance.get()
         num_entries = table_instance.num_entries
     except (AttributeError, tk.TclError) as e:
         messagebox.showerror(t('file_load_error'), f'无法获取表格数据: {str(e)}')
         return
     
     # 验证数据完整性
-    required_keys = ['names', 'angles'] + [f'flow_{i}' for i in range(num_entries)]
-    if not data or not all(key in data for key in required_keys):
+    if intersection is None:
         messagebox.showerror(t('file_load_error'), t('data_incomplete'))
         return
-    
-    # 验证数据是否为空
-    if not any(data.get(key) for key in required_keys):
+    # 验证数据是否为空（所有流量都为空或为0时没有可绘制的内容）
+    if intersection.is_empty():
         messagebox.showerror(t('file_load_error'), t('data_empty'))
         return
     
     try:
-        # 转换数据
-        names = data['names']
-        angles = convert_to_float_list(data['angles'])
-        
-        # 获取所有流向数据（旧格式：flows[flow_idx][entry_idx]）
-        old_flows = []
-        for i in range(num_entries):
-            flow_key = f'flow_{i}'
-            old_flows.append(convert_to_float_list(data.get(flow_key, [])))
-        
-        # 确保所有列表长度一致
-        min_length = min(len(names), len(angles), *[len(f) for f in old_flows])
-        if min_length < num_entries:
-            messagebox.showerror(t('file_load_error'), t('data_insufficient', num=num_entries, current=min_length))
-            return
+        import render_engine
         
-        # 截取到正确的路数
-        names = names[:num_entries]
-        angles = angles[:num_entries]
-        # 如果进口名称为空，使用进口编号作为默认名称
-        for i in range(num_entries):
-            if not names[i] or names[i].strip() == '':
-                names[i] = f'进口{i+1}'
-        for i in range(num_entries):
-            old_flows[i] = old_flows[i][:num_entries] if len(old_flows[i]) >= num_entries else old_flows[i] + [0.0] * (num_entries - len(old_flows[i]))
+        # 复制绘图时的数据（之后表格的修改不影响本窗口的导出）
+        names = list(intersection.names)
+        angles = intersection.angles.tolist()
+        # 流向数据（旧格式：flows[flow_idx][entry_idx]）
+        old_flows = intersection.by_order.tolist()
         
         # 获取交通规则
-        traffic_rule = getattr(table_instance, 'traffic_rule', 'right')
+        traffic_rule = intersection.traffic_rule
         
-        # 重新组织为flows[entry_idx][exit_idx]格式（编号从1开始，内部索引从0开始）
-        # flows[entry_idx][exit_idx] 表示从entry_idx+1到exit_idx+1的流量
-        flows = [[0.0] * num_entries for _ in range(num_entries)]
-        for entry_idx in range(num_entries):  # entry_idx是0-based，对应进口编号entry_idx+1
-            for flow_idx in range(num_entries):  # flow_idx是0-based，对应流向顺序
-                # 根据交通规则计算出口编号
-                if traffic_rule == 'left':
-                    # 左行规则：从entry_idx+1开始，顺时针递增
-                    exit_num_1based = normalize_index((entry_idx + 1) + flow_idx, num_entries)
-                else:
-                    # 右行规则（默认）：从entry_idx+1开始，逆时针递减
-                    exit_num_1based = normalize_index((entry_idx + 1) - flow_idx, num_entries)
-                exit_idx = exit_num_1based - 1  # 转换为0-based索引
-                flows[entry_idx][exit_idx] = old_flows[flow_idx][entry_idx]
-        
-        # 计算各方向进口总量、出口总量
-        entry_total_volumes = [0.0] * num_entries
-        exit_total_volumes = [0.0] * num_entries
-        for entry_idx in range(num_entries):
-            # 进口总量：所有流向之和
-            entry_total_volumes[entry_idx] = sum(flows[entry_idx])
-            # 出口总量：从所有进口流向该出口的流量之和
-            for exit_idx in range(num_entries):
-                exit_total_volumes[exit_idx] += flows[entry_idx][exit_idx]
-        
-        # 计算最大交通量用于线宽归一化
-        max_volume = float('-inf')
-        for flow_list in flows:
-            if len(flow_list) > 0:
-                max_volume_in_list = max(flow_list)
-                if max_volume_in_list > max_volume:
-                    max_volume = max_volume_in_list
-        
-        # 防止除零错误
-        if max_volume <= 0:
-            max_volume = 1.0
-        
-        line_width_multiplier = MAX_LINE_WIDTH
+        # 整理为绘图数据：flows[entry_idx][exit_idx]、进出口总量和最大交通量
+        model = render_engine.prepare_intersection(names, angles, old_flows, num_entries, traffic_rule)
 
         # 从配置加载默认字号
         try:
@@ -271,291 +186,30 @@ def plot_traffic_flow(table_instance):
             flow_font_size = DEFAULT_FLOW_LABEL_FONT_SIZE
 
         # 限制字号范围
-        def clamp_font_size(size, default):
-            try:
-                size = int(size)
-            except:
-                return default
-            if size < 6:
-                return 6
-            if size > 30:
-                return 30
-            return size
-
-        road_font_size = clamp_font_size(road_font_size, DEFAULT_ROAD_LABEL_FONT_SIZE)
-        flow_font_size = clamp_font_size(flow_font_size, DEFAULT_FLOW_LABEL_FONT_SIZE)
+        road_font_size = render_engine.clamp_font_size(road_font_size, DEFAULT_ROAD_LABEL_FONT_SIZE)
+        flow_font_size = render_engine.clamp_font_size(flow_font_size, DEFAULT_FLOW_LABEL_FONT_SIZE)
 
         # 创建画布
         fig = plt.figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
         ax = fig.add_subplot(1, 1, 1)
         ax.set_aspect('equal')
 
-        def draw_diagram(current_road_font_size, current_flow_font_size):
-            """按指定字号绘制完整图形"""
-            ax.clear()
-            ax.set_aspect('equal')
-
-            # 绘制进口和出口流量线
-            # 左行规则下，进出口位置对调：进口在左侧，出口在右侧
-            for i in range(num_entries):
-                angle_rad = angles[i] * np.pi / 180
-                
-                if traffic_rule == 'left':
-                    # 左行规则：进口在左侧（+CENTER_OFFSET），出口在右侧（-CENTER_OFFSET）
-                    # 计算进口流量线坐标
-                    entry_inner_x = CENTER_OFFSET * np.sin(angle_rad) + INNER_RADIUS_COEFF * np.cos(angle_rad)
-                    entry_inner_y = INNER_RADIUS_COEFF * np.sin(angle_rad) - CENTER_OFFSET * np.cos(angle_rad)
-                    entry_outer_x = CENTER_OFFSET * np.sin(angle_rad) + OUTER_RADIUS_COEFF * np.cos(angle_rad)
-                    entry_outer_y = OUTER_RADIUS_COEFF * np.sin(angle_rad) - CENTER_OFFSET * np.cos(angle_rad)
-                    
-                    # 计算延长后的终点坐标（向外延长45单位）
-                    entry_direction = np.array([entry_outer_x - entry_inner_x, entry_outer_y - entry_inner_y])
-                    entry_direction_norm = np.linalg.norm(entry_direction)
-                    if entry_direction_norm > 1e-10:
-                        entry_direction_unit = entry_direction / entry_direction_norm
-                        entry_outer_extended_x = entry_outer_x + entry_direction_unit[0] * 45
-                        entry_outer_extended_y = entry_outer_y + entry_direction_unit[1] * 45
-                    else:
-                        entry_outer_extended_x = entry_outer_x
-                        entry_outer_extended_y = entry_outer_y
-                    
-                    entry_line_width = entry_total_volumes[i] * line_width_multiplier / max_volume
-                    draw_line_with_width(
-                        ax,
-                        start=(entry_inner_x, entry_inner_y),
-                        end=(entry_outer_extended_x, entry_outer_extended_y),
-                        width=entry_line_width,
-                        color=ENTRY_COLORS[i],
-                    )
-                    
-                    # 计算出口流量线坐标
-                    exit_inner_x = -CENTER_OFFSET * np.sin(angle_rad) + INNER_RADIUS_COEFF * np.cos(angle_rad)
-                    exit_inner_y = INNER_RADIUS_COEFF * np.sin(angle_rad) + CENTER_OFFSET * np.cos(angle_rad)
-                    exit_outer_x = -CENTER_OFFSET * np.sin(angle_rad) + OUTER_RADIUS_COEFF * np.cos(angle_rad)
-                    exit_outer_y = OUTER_RADIUS_COEFF * np.sin(angle_rad) + CENTER_OFFSET * np.cos(angle_rad)
-                else:
-                    # 右行规则（默认）：进口在右侧（-CENTER_OFFSET），出口在左侧（+CENTER_OFFSET）
-                    # 计算进口流量线坐标
-                    entry_inner_x = -CENTER_OFFSET * np.sin(angle_rad) + INNER_RADIUS_COEFF * np.cos(angle_rad)
-                    entry_inner_y = INNER_RADIUS_COEFF * np.sin(angle_rad) + CENTER_OFFSET * np.cos(angle_rad)
-                    entry_outer_x = -CENTER_OFFSET * np.sin(angle_rad) + OUTER_RADIUS_COEFF * np.cos(angle_rad)
-                    entry_outer_y = OUTER_RADIUS_COEFF * np.sin(angle_rad) + CENTER_OFFSET * np.cos(angle_rad)
-                    
-                    # 计算延长后的终点坐标（向外延长45单位）
-                    entry_direction = np.array([entry_outer_x - entry_inner_x, entry_outer_y - entry_inner_y])
-                    entry_direction_norm = np.linalg.norm(entry_direction)
-                    if entry_direction_norm > 1e-10:
-                        entry_direction_unit = entry_direction / entry_direction_norm
-                        entry_outer_extended_x = entry_outer_x + entry_direction_unit[0] * 45
-                        entry_outer_extended_y = entry_outer_y + entry_direction_unit[1] * 45
-                    else:
-                        entry_outer_extended_x = entry_outer_x
-                        entry_outer_extended_y = entry_outer_y
-                    
-                    entry_line_width = entry_total_volumes[i] * line_width_multiplier / max_volume
-                    draw_line_with_width(
-                        ax,
-                        start=(entry_inner_x, entry_inner_y),
-                        end=(entry_outer_extended_x, entry_outer_extended_y),
-                        width=entry_line_width,
-                        color=ENTRY_COLORS[i],
-                    )
-                    
-                    # 计算出口流量线坐标
-                    exit_inner_x = CENTER_OFFSET * np.sin(angle_rad) + INNER_RADIUS_COEFF * np.cos(angle_rad)
-                    exit_inner_y = INNER_RADIUS_COEFF * np.sin(angle_rad) - CENTER_OFFSET * np.cos(angle_rad)
-                    exit_outer_x = CENTER_OFFSET * np.sin(angle_rad) + OUTER_RADIUS_COEFF * np.cos(angle_rad)
-                    exit_outer_y = OUTER_RADIUS_COEFF * np.sin(angle_rad) - CENTER_OFFSET * np.cos(angle_rad)
-                
-                exit_line_width = exit_total_volumes[i] * line_width_multiplier / max_volume
-                draw_line_with_width(
-                    ax,
-                    start=(exit_inner_x, exit_inner_y),
-                    end=(exit_outer_x, exit_outer_y),
-                    width=exit_line_width,
-                    color=ENTRY_COLORS[i],
-                )
-                
-                # 在出口宽度条末端添加箭头
-                # 计算箭头方向向量（从exit_inner指向exit_outer）
-                exit_direction = np.array([exit_outer_x - exit_inner_x, exit_outer_y - exit_inner_y])
-                exit_direction_norm = np.linalg.norm(exit_direction)
-                if exit_direction_norm > 1e-10:
-                    exit_direction_unit = exit_direction / exit_direction_norm
-                    # 箭头起点：exit_outer
-                    # 箭头终点：exit_outer + 方向向量 * 45
-                    arrow_start = (exit_outer_x, exit_outer_y)
-                    arrow_end = (
-                        exit_outer_x + exit_direction_unit[0] * 45,
-                        exit_outer_y + exit_direction_unit[1] * 45,
-                    )
-                    # 箭头宽度：exit_line_width * 1.8
-                    arrow_width = exit_line_width * 1.8
-                    # 绘制箭头（颜色与出口宽度条一致）
-                    draw_arrow(ax, start=arrow_start, end=arrow_end, width=arrow_width, color=ENTRY_COLORS[i])
-                
-                # 标注进口名称、进口道总量、出口道总量
-                # 进口名称：只要进口总量或出口总量不为0就显示
-                if entry_total_volumes[i] + exit_total_volumes[i] != 0:
-                    # 进口名称沿方位角方向向外移动45单位
-                    name_x = (exit_outer_x + entry_outer_x) / 2 + (NAME_LABEL_OFFSET + 45) * np.cos(angle_rad)
-                    name_y = (exit_outer_y + entry_outer_y) / 2 + (NAME_LABEL_OFFSET + 45) * np.sin(angle_rad)
-                    name_angle = (angles[i] % 180 + 270) % 360
-                    draw_text(ax, names[i], current_road_font_size, (name_x, name_y), name_angle, "black")
-                
-                # 进口总量标注：只有当进口总量不为0时才显示
-                if entry_total_volumes[i] != 0:
-                    entry_label_x = (entry_inner_x + entry_outer_x) / 2
-                    entry_label_y = (entry_inner_y + entry_outer_y) / 2
-                    entry_label_angle = (angles[i] + 90) % 180 - 90
-                    draw_text(
-                        ax,
-                        str(int(entry_total_volumes[i])),
-                        current_flow_font_size,
-                        (entry_label_x, entry_label_y),
-                        entry_label_angle,
-                        "black",
-                    )
-                
-                # 出口总量标注：只有当出口总量不为0时才显示
-                if exit_total_volumes[i] != 0:
-                    exit_label_x = (exit_inner_x + exit_outer_x) / 2
-                    exit_label_y = (exit_inner_y + exit_outer_y) / 2
-                    exit_label_angle = (angles[i] + 90) % 180 - 90
-                    draw_text(
-                        ax,
-                        str(int(exit_total_volumes[i])),
-                        current_flow_font_size,
-                        (exit_label_x, exit_label_y),
-                        exit_label_angle,
-                        "black",
-                    )
-            
-            # 绘制掉头路径（流线X_X，即flows[entry_idx][entry_idx]）
-            for entry_idx in range(num_entries):
-                exit_idx = entry_idx  # 掉头：出口编号等于进口编号
-                if flows[entry_idx][exit_idx] != 0:
-                    entry_angle_rad = angles[entry_idx] * np.pi / 180
-                    volume_ratio = line_width_multiplier / max_volume
-                    # 获取交通规则
-                    traffic_rule_local = getattr(table_instance, 'traffic_rule', 'right')
-                    
-                    # 计算已绘制的前面流线的累积影响（在进口处，掉头是最左边的）
-                    previous_flows_sum_entry = 0.0  # 掉头是最左边的，前面没有流线
-                    # 计算已绘制的前面流线的累积影响（在出口处）
-                    exit_num = exit_idx + 1  # 出口编号（1-based）
-                    previous_flows_sum_exit = 0.0
-                    if traffic_rule_local == 'left':
-                        # 左行规则：在出口X处，从左到右依次是：流线X+1_X, 流线X+2_X, ..., 流线X_X
-                        # 掉头（流线X_X）是最右边的，所以前面应该有流线X+1_X, X+2_X, ..., 1_X
-                        for order in range(num_entries - 1):  # 掉头是最后一个，所以前面有num_entries-1个流线
-                            target_entry_num = normalize_index(exit_num + 1 + order, num_entries)
-                            target_entry_idx = target_entry_num - 1
-                            previous_flows_sum_exit += flows[target_entry_idx][exit_idx]
-                    else:
-                        # 右行规则：在出口X处，从左到右依次是：流线X-1_X, 流线X-2_X, ..., 流线X_X
-                        # 掉头（流线X_X）是最右边的，所以前面应该有流线X-1_X, X-2_X, ..., 1_X
-                        for order in range(num_entries - 1):  # 掉头是最后一个，所以前面有num_entries-1个流线
-                            target_entry_num = normalize_index(exit_num - 1 - order, num_entries)
-                            target_entry_idx = target_entry_num - 1
-                            previous_flows_sum_exit += flows[target_entry_idx][exit_idx]
-                    # 根据交通规则计算掉头路径的中心和半径
-                    if traffic_rule_local == 'left':
-                        # 左行规则：进口在左侧，出口在右侧，掉头路径中心需要调整
-                        center_x = INNER_RADIUS_COEFF * np.cos(entry_angle_rad) - volume_ratio * 0.25 * (entry_total_volumes[entry_idx] - exit_total_volumes[exit_idx]) * np.sin(entry_angle_rad)
-                        center_y = INNER_RADIUS_COEFF * np.sin(entry_angle_rad) + volume_ratio * 0.25 * (entry_total_volumes[entry_idx] - exit_total_volumes[exit_idx]) * np.cos(entry_angle_rad)
-                        arc_radius = CENTER_OFFSET - volume_ratio * ((entry_total_volumes[entry_idx] + exit_total_volumes[exit_idx]) / 2 - flows[entry_idx][exit_idx]) / 2
-                    else:
-                        # 右行规则（默认）
-                        center_x = INNER_RADIUS_COEFF * np.cos(entry_angle_rad) + volume_ratio * 0.25 * (entry_total_volumes[entry_idx] - exit_total_volumes[exit_idx]) * np.sin(entry_angle_rad)
-                        center_y = INNER_RADIUS_COEFF * np.sin(entry_angle_rad) - volume_ratio * 0.25 * (entry_total_volumes[entry_idx] - exit_total_volumes[exit_idx]) * np.cos(entry_angle_rad)
-                        arc_radius = CENTER_OFFSET - volume_ratio * ((entry_total_volumes[entry_idx] + exit_total_volumes[exit_idx]) / 2 - flows[entry_idx][exit_idx]) / 2
-                    u_turn_width = flows[entry_idx][exit_idx] * volume_ratio
-                    # 检查半径和宽度是否有效
-                    if arc_radius > 0 and u_turn_width > 0:
-                        # 掉头路径角度处理：由于中心位置已经根据交通规则对调，角度保持和右行规则一样即可
-                        # （算法里可能藏着一个负负得正，最后的效果就是不用改）
-                        draw_arc_with_width(
-                            ax,
-                            center=(center_x, center_y),
-                            radius=arc_radius,
-                            start_angle=angles[entry_idx] + 90,
-                            end_angle=angles[entry_idx] + 270,
-                            width=u_turn_width,
-                            color=ENTRY_COLORS[entry_idx % len(ENTRY_COLORS)],
-                        )
-            
-            # 绘制其他流向路径（流线X_Y，其中X != Y）
-            # 根据交通规则确定流线顺序
-            traffic_rule_local = getattr(table_instance, 'traffic_rule', 'right')
-            for entry_idx in range(num_entries):  # entry_idx是0-based，对应进口编号entry_idx+1
-                entry_num = entry_idx + 1  # 进口编号（1-based）
-                # 计算该进口的所有流向顺序
-                for flow_order in range(num_entries):  # flow_order表示在进口处的顺序（0是最左边）
-                    # 根据交通规则计算出口编号
-                    if traffic_rule_local == 'left':
-                        # 左行规则：从X开始顺时针递增：X, X+1, X+2, ..., 1
-                        exit_num = normalize_index(entry_num + flow_order, num_entries)
-                    else:
-                        # 右行规则：从X开始逆时针递减：X, X-1, X-2, ..., 1
-                        exit_num = normalize_index(entry_num - flow_order, num_entries)
-                    exit_idx = exit_num - 1  # 转换为0-based索引
-                    
-                    # 跳过掉头（已经在上面绘制了）
-                    if entry_idx == exit_idx:
-                        continue
-                    
-                    if flows[entry_idx][exit_idx] != 0:
-                        draw_turn_path_generic(
-                            ax,
-                            entry_idx,
-                            exit_idx,
-                            angles,
-                            angles,
-                            entry_total_volumes,
-                            exit_total_volumes,
-                            flows[entry_idx][exit_idx],
-                            line_width_multiplier,
-                            max_volume,
-                            ENTRY_COLORS[entry_idx % len(ENTRY_COLORS)],
-                            flows,
-                            num_entries,
-                            traffic_rule_local,
-                        )
-            
-            # 标注各流向交通量
-            # 根据交通规则确定流线顺序
-            traffic_rule_local = getattr(table_instance, 'traffic_rule', 'right')
-            for entry_idx in range(num_entries):
-                entry_num = entry_idx + 1  # 进口编号（1-based）
-                flow_volumes = []
-                for order in range(num_entries):
-                    # 根据交通规则计算出口编号
-                    if traffic_rule_local == 'left':
-                        # 左行规则：从X开始顺时针递增：X, X+1, X+2, ..., 1
-                        exit_num = normalize_index(entry_num + order, num_entries)
-                    else:
-                        # 右行规则：从X开始逆时针递减：X, X-1, X-2, ..., 1
-                        exit_num = normalize_index(entry_num - order, num_entries)
-                    exit_idx = exit_num - 1
-                    flow_volumes.append(flows[entry_idx][exit_idx])
-                draw_traffic_volume_labels(
-                    ax,
-                    entry_idx,
-                    angles[entry_idx],
-                    flow_volumes,
-                    num_entries,
-                    traffic_rule_local,
-                    flow_font_size=current_flow_font_size,
-                )
-            
-            plt.xlim(PLOT_XLIM[0], PLOT_XLIM[1])
-            plt.ylim(PLOT_YLIM[0], PLOT_YLIM[1])
-            plt.gca().set_axis_off()
-            plt.tight_layout()
-        
-        # 先按配置字号绘制一次
-        draw_diagram(road_font_size, flow_font_size)
+        # 绘图使用的字体（用作渲染缓存键的一部分，与 drawing_utils.draw_text 的默认字体一致）
+        try:
+            import ui_utils as ui_module
+            plot_font = ui_module.get_font_file() or ui_module.get_font_family()
+        except:
+            plot_font = None
+
+        # 先按配置字号绘制完整图形（几何图形只绘制这一次，之后字号变化只替换文字标注）
+        label_artists = render_engine.draw_intersection(ax, model, road_font_size, flow_font_size)
+        fig.tight_layout()
+
+        def update_labels(current_road_font_size, current_flow_font_size):
+            """按指定字号重新绘制文字标注（保留已绘制的几何图形）"""
+            for artist in label_artists:
+                artist.remove()
+            label_artists[:] = render_engine.draw_labels(ax, model, current_road_font_size, current_flow_font_size)
         
         # 创建新的tkinter窗口来显示图形
         plot_window = create_toplevel(root)
@@ -582,8 +236,11 @@ def plot_traffic_flow(table_instance):
         
         # 将matplotlib图形嵌入到tkinter窗口
         canvas = FigureCanvasTkAgg(fig, master=plot_window)
-        canvas.draw()
+        with profiling.stage('canvas_draw'):
+            canvas.draw()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+        # 输出本次绘图的性能分析结果（未开启时不做任何事）
+        profiling.flush(plot_title)
         
         # ===== 导出与字号控制工具栏 =====
         size_state = {
@@ -619,29 +276,137 @@ def plot_traffic_flow(table_instance):
             if filename:
                 try:
                     # 根据文件扩展名确定格式
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext == '.svg':
-                        format = 'svg'
-                    elif ext == '.pdf':
-                        format = 'pdf'
-                    elif ext == '.png':
-                        format = 'png'
-                    elif ext == '.jpg' or ext == '.jpeg':
-                        format = 'jpg'
-                    elif ext == '.tif' or ext == '.tiff':
-                        format = 'tiff'  # matplotlib使用'tiff'格式
-                    else:
+                    format = render_engine.format_from_extension(filename)
+                    if format is None:
+                        ext = os.path.splitext(filename)[1].lower()
                         messagebox.showerror(t('file_load_error'), t('export_format_error', ext=ext))
                         return
                     
-                    # 保存图形
-                    fig.savefig(filename, format=format, dpi=FIGURE_DPI, bbox_inches='tight', pad_inches=0.1)
-                    messagebox.showinfo(t('file_saved_success'), t('export_success', file=filename))
+                    # 相同内容导出过时直接使用渲染缓存中的结果
+                    import render_cache
+                    cache = render_cache.get_default_cache()
+                    if cache:
+                        # 字体按导出进程的方式确定，键与导出进程写入缓存时一致
+                        key = render_cache.make_key(model, format, FIGURE_DPI, size_state['road'],
+                                                    size_state['flow'], render_engine.resolve_font(plot_font))
+                        data = cache.get(key, format)
+                        if data is not None:
+                            with open(filename, 'wb') as f:
+                                f.write(data)
+                            messagebox.showinfo(t('file_saved_success'), t('export_success', file=filename))
+                            return
                 except Exception as e:
                     messagebox.showerror(t('file_load_error'), t('export_error', error=str(e)))
+                    return
+
+                start_export([(filename, format, FIGURE_DPI)])
+
+        # 按配置中的导出方案一次导出多种格式和分辨率（图形只绘制一次）
+        def export_profile_figure():
+            try:
+                import config
+                spec = config.load_config().get('export_profile', render_engine.DEFAULT_EXPORT_PROFILE)
+                targets = render_engine.parse_export_profile(spec, FIGURE_DPI)
+            except Exception as e:
+                messagebox.showerror(t('file_load_error'), t('export_error', error=str(e)))
+                return
+
+            if table_instance.file_name:
+                default_name = os.path.splitext(os.path.basename(table_instance.file_name))[0]
+            else:
+                default_name = t('export_default_filename')
+            filename = filedialog.asksaveasfilename(
+                initialfile=default_name,
+                title=t('btn_export_profile')
+            )
+            if not filename:
+                return
+            # 忽略用户输入的扩展名，各格式的扩展名由导出方案决定
+            if render_engine.format_from_extension(filename) is not None:
+                filename = os.path.splitext(filename)[0]
+            file_names = render_engine.profile_file_names(filename, targets)
+            start_export([(file_name, format, dpi)
+                          for file_name, (_, format, dpi) in zip(file_names, targets)])
+
+        def start_export(targets):
+            # 在后台进程中按当前数据和字号重新绘制并导出，绘图窗口保持响应
+            snapshot = export_worker.make_snapshot(names, angles, old_flows, traffic_rule,
+                                                   size_state['road'], size_state['flow'],
+                                                   plot_font, num_entries)
+            job = export_worker.ExportJob(snapshot, targets)
+            try:
+                job.start()
+            except Exception as e:
+                messagebox.showerror(t('file_load_error'), t('export_error', error=str(e)))
+                return
+            export_state['job'] = job
+            show_export_progress(job)
+            plot_window.after(EXPORT_POLL_INTERVAL_MS, poll_export)
+
+        # 后台导出的进度显示（导出期间显示在工具栏右侧，导出按钮暂时禁用）
+        export_state = {'job': None, 'widgets': []}
+        export_status_var = tk.StringVar()
+
+        def show_export_progress(job):
+            export_button.state(['disabled'])
+            export_profile_button.state(['disabled'])
+            cancel_button = ttk.Button(toolbar_frame, text=t('btn_cancel_export'), command=cancel_export)
+            cancel_button.pack(side=tk.RIGHT, padx=5, pady=5)
+            progress_bar = ttk.Progressbar(toolbar_frame, mode='indeterminate', length=120)
+            progress_bar.pack(side=tk.RIGHT, padx=5, pady=5)
+            progress_bar.start(15)
+            status_label = ttk.Label(toolbar_frame, textvariable=export_status_var)
+            status_label.pack(side=tk.RIGHT, padx=5, pady=5)
+            export_status_var.set(t('export_stage_render'))
+            export_state['widgets'] = [cancel_button, progress_bar, status_label]
+
+        def hide_export_progress():
+            export_state['job'] = None
+            for widget in export_state['widgets']:
+                try:
+                    widget.destroy()
+                except tk.TclError:
+                    pass
+            export_state['widgets'] = []
+            try:
+                export_button.state(['!disabled'])
+                export_profile_button.state(['!disabled'])
+            except tk.TclError:
+                pass
+
+        def poll_export():
+            job = export_state['job']
+            if job is None:
+                return
+            for kind, value in job.poll():
+                if kind == export_worker.MESSAGE_STAGE:
+                    formats = ', '.join(dict.fromkeys(format.upper() for _, format, _ in job.targets))
+                    export_status_var.set(t(f'export_stage_{value}', format=formats))
+                elif kind == export_worker.MESSAGE_DONE:
+                    hide_export_progress()
+                    messagebox.showinfo(t('file_saved_success'), t('export_success', file='\n'.join(value)),
+                                        parent=plot_window)
+                    return
+                elif kind == export_worker.MESSAGE_ERROR:
+                    hide_export_progress()
+                    messagebox.showerror(t('file_load_error'), t('export_error', error=value),
+                                         parent=plot_window)
+                    return
+            plot_window.after(EXPORT_POLL_INTERVAL_MS, poll_export)
+
+        def cancel_export():
+            job = export_state['job']
+            if job is None:
+                return
+            job.cancel()
+            hide_export_progress()
+            messagebox.showinfo(t('file_saved_success'), t('export_cancelled'), parent=plot_window)
         
         export_button = ttk.Button(toolbar_frame, text=t('btn_export'), command=export_figure)
         export_button.pack(side=tk.LEFT, padx=5, pady=5)
+        export_profile_button = ttk.Button(toolbar_frame, text=t('btn_export_profile'),
+                                           command=export_profile_figure)
+        export_profile_button.pack(side=tk.LEFT, padx=5, pady=5)
 
         # 数字输入校验：只允许整数或空字符串
         def validate_int(P):
@@ -697,15 +462,17 @@ def plot_traffic_flow(table_instance):
             new_road = DEFAULT_ROAD_LABEL_FONT_SIZE
             new_flow = DEFAULT_FLOW_LABEL_FONT_SIZE
 
+            changed = (new_road, new_flow) != (size_state['road'], size_state['flow'])
             size_state['road'] = new_road
             size_state['flow'] = new_flow
 
             road_var.set(str(new_road))
             flow_var.set(str(new_flow))
 
-            # 重绘
-            draw_diagram(new_road, new_flow)
-            canvas.draw_idle()
+            # 重绘文字标注（字号未变化时无需重绘）
+            if changed:
+                update_labels(new_road, new_flow)
+                canvas.draw_idle()
 
             # 将重置后的字号写回配置
             try:
@@ -729,12 +496,14 @@ def plot_traffic_flow(table_instance):
             if str(new_flow) != flow_var.get().strip():
                 flow_var.set(str(new_flow))
 
+            changed = (new_road, new_flow) != (size_state['road'], size_state['flow'])
             size_state['road'] = new_road
             size_state['flow'] = new_flow
 
-            # 重绘
-            draw_diagram(new_road, new_flow)
-            canvas.draw_idle()
+            # 重绘文字标注（字号未变化时无需重绘）
+            if changed:
+                update_labels(new_road, new_flow)
+                canvas.draw_idle()
 
             # 成功重绘后将配置写回文件
             try:
@@ -760,6 +529,10 @@ def plot_traffic_flow(table_instance):
         # 添加窗口关闭事件处理，确保清理资源
         def on_plot_window_close():
             """绘图窗口关闭时的清理函数"""
+            # 取消仍在进行的后台导出
+            if export_state['job'] is not None:
+                export_state['job'].cancel()
+                export_state['job'] = None
             try:
                 # 清理matplotlib资源
                 plt.close(fig)
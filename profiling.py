@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析模块（默认关闭）
+记录绘图各阶段（字体设置、表格读取、几何图形、文字、画布绘制、导出等）以及
+关键绘图函数的耗时和调用次数，写入 Chrome Trace 格式的 JSON 文件
+（可在 chrome://tracing 或 https://ui.perfetto.dev 中打开），并在控制台输出汇总。
+
+开启方式（任选其一）:
+    环境变量 TRAFFIC_FLOW_PROFILE=1（或设为 trace 文件路径）
+    配置文件 config.txt 中 profiling=on
+"""
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+# 开启性能分析的环境变量
+PROFILE_ENV_VAR = 'TRAFFIC_FLOW_PROFILE'
+# 默认 trace 文件名（与配置文件同目录）
+TRACE_FILE = 'profile_trace.json'
+# 单次 trace 最多记录的事件数（防止长时间运行时占用过多内存）
+MAX_TRACE_EVENTS = 200000
+
+_enabled = None  # None 表示尚未读取开关
+_lock = threading.Lock()
+_stats = {}  # {名称: [调用次数, 总耗时(秒)]}
+_events = []  # Chrome Trace 事件列表
+_origin = time.perf_counter()
+
+
+def is_enabled():
+    """是否开启性能分析（首次调用时读取环境变量和配置文件）"""
+    global _enabled
+    if _enabled is None:
+        value = os.environ.get(PROFILE_ENV_VAR, '').strip()
+        if value:
+            _enabled = value.lower() not in ('0', 'off', 'false', 'no')
+        else:
+            try:
+                import config
+                _enabled = bool(config.load_config().get('profiling', False))
+            except:
+                _enabled = False
+    return _enabled
+
+
+def set_enabled(enabled):
+    """在运行时开启或关闭性能分析"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _record(name, start, elapsed):
+    """记录一次调用（start、elapsed 单位为秒）"""
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+        if len(_events) < MAX_TRACE_EVENTS:
+            _events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': round((start - _origin) * 1e6, 1),
+                'dur': round(elapsed * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+
+@contextmanager
+def stage(name):
+    """
+    记录一个阶段的耗时（未开启时几乎没有开销）
+
+    用法:
+        with profiling.stage('canvas_draw'):
+            canvas.draw()
+    """
+    if not is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """函数装饰器：记录每次调用的耗时和调用次数（名称默认为函数名）"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(label, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def get_summary():
+    """
+    获取汇总结果
+
+    返回:
+        [(名称, 调用次数, 总耗时ms, 平均耗时ms), ...]，按总耗时从大到小排序
+    """
+    with _lock:
+        items = [(name, calls, total * 1000, total * 1000 / calls) for name, (calls, total) in _stats.items()]
+    return sorted(items, key=lambda item: item[2], reverse=True)
+
+
+def reset():
+    """清空已记录的数据"""
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+def get_trace_path():
+    """trace 文件路径：环境变量为路径时使用该路径，否则为配置文件目录下的 profile_trace.json"""
+    value = os.environ.get(PROFILE_ENV_VAR, '').strip()
+    if value and value.lower() not in ('1', 'on', 'true', 'yes', '0', 'off', 'false', 'no'):
+        return value
+    try:
+        import config
+        base_path = os.path.dirname(config.get_config_path())
+    except:
+        base_path = os.getcwd()
+    return os.path.join(base_path, TRACE_FILE)
+
+
+def flush(title=None, file=None):
+    """
+    写出 trace 文件并在控制台输出汇总，然后清空记录（未开启或无记录时不做任何事）
+
+    参数:
+        title: 汇总标题（如数据文件名）
+        file: 汇总输出流，默认 sys.stdout
+    返回:
+        trace 文件路径；未写出时返回 None
+    """
+    if not is_enabled():
+        return None
+    summary = get_summary()
+    if not summary:
+        return None
+    with _lock:
+        events = list(_events)
+    trace_path = get_trace_path()
+    try:
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    except Exception as e:
+        print(f'写入性能分析文件失败: {e}')
+        trace_path = None
+
+    file = file or sys.stdout
+    print(f"[profile] {title or ''}".rstrip(), file=file)
+    print(f"{'stage':32s} {'calls':>7s} {'total ms':>10s} {'avg ms':>9s}", file=file)
+    for name, calls, total_ms, avg_ms in summary:
+        print(f'{name:32s} {calls:7d} {total_ms:10.2f} {avg_ms:9.3f}', file=file)
+    if trace_path:
+        print(f'[profile] trace: {trace_path}', file=file)
+    reset()
+    return trace_path
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+渲染结果磁盘缓存模块
+以规范化后的绘图输入（进口名称、方位角、流量矩阵、交通规则、字号、字体、导出格式和分辨率）
+加上绘图样式（ENTRY_COLORS、几何常量）和程序/matplotlib 版本计算内容哈希，
+缓存导出的 SVG/PNG/PDF 字节。相同的交叉口再次导出时直接返回缓存，不再经过 matplotlib。
+缓存目录有总大小上限，超出时按最近使用时间（文件修改时间）淘汰。
+
+关闭缓存: 环境变量 TRAFFIC_FLOW_RENDER_CACHE=0（设为目录路径则使用该目录）
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+# 缓存目录名（位于当前用户的缓存目录中，见 config.get_cache_dir）
+RENDER_CACHE_DIR = 'render_cache'
+# 缓存总大小上限（字节）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 缓存键格式版本（键的组成变化时递增，旧缓存自动失效）
+CACHE_KEY_VERSION = 2
+# 控制缓存的环境变量
+RENDER_CACHE_ENV_VAR = 'TRAFFIC_FLOW_RENDER_CACHE'
+# 程序版本信息文件（与 update_checker 读取的文件相同）
+VERSION_INFO_FILE = 'version_info.txt'
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def app_version():
+    """
+    从 version_info.txt 读取程序版本号（如 '2.4.0'），读取失败时返回 None
+    不导入 update_checker，命令行和批量导出不加载网络相关模块
+    """
+    base_path = getattr(sys, '_MEIPASS', None) or os.path.dirname(os.path.abspath(__file__))
+    try:
+        with open(os.path.join(base_path, VERSION_INFO_FILE), 'r', encoding='utf-8') as f:
+            match = re.search(r'filevers=\((\d+),\s*(\d+),\s*(\d+)', f.read())
+    except OSError:
+        return None
+    return '.'.join(match.groups()) if match else None
+
+
+@lru_cache(maxsize=1)
+def style_fingerprint():
+    """影响绘图结果的样式常量和版本号（进程内只计算一次）"""
+    import matplotlib
+    import drawing_utils
+
+    constants = {
+        name: getattr(drawing_utils, name)
+        for name in (
+            'INNER_RADIUS_COEFF', 'OUTER_RADIUS_COEFF', 'CENTER_OFFSET', 'ROAD_WIDTH_OFFSET',
+            'MIDDLE_RADIUS_COEFF', 'FLOW_LABEL_SPACING', 'NAME_LABEL_OFFSET', 'MAX_LINE_WIDTH',
+            'PLOT_XLIM', 'PLOT_YLIM',
+            'FIGURE_SIZE', 'FIGURE_DPI', 'ENTRY_COLORS', 'ARC_CHORD_TOLERANCE',
+            'GENERATED_COLOR_HUE_START', 'GENERATED_COLOR_SATURATION', 'GENERATED_COLOR_VALUE',
+            'MIN_FLOW_LABEL_SCALE',
+        )
+        if hasattr(drawing_utils, name)
+    }
+    return {
+        'key_version': CACHE_KEY_VERSION,
+        'app_version': app_version(),
+        'matplotlib': matplotlib.__version__,
+        'constants': json.loads(json.dumps(constants, default=float)),
+    }
+
+
+def _font_identity(font):
+    """字体标识：字体文件取 (路径, 修改时间, 大小)，其他（字体名称等）取字符串"""
+    if font and isinstance(font, str) and os.path.isfile(font):
+        stat = os.stat(font)
+        return [os.path.abspath(font), stat.st_mtime, stat.st_size]
+    return None if font is None else str(font)
+
+
+def make_key(model, format, dpi, road_font_size, flow_font_size, font=None, merge_patches=True):
+    """
+    计算渲染结果的缓存键
+
+    参数:
+        model: render_engine.prepare_intersection() 返回的数据（已规范化的名称、角度和流量矩阵）
+        format: 导出格式（matplotlib 格式名）
+        dpi: 导出分辨率
+        road_font_size / flow_font_size: 已限制范围的字号
+        font: 字体文件路径或字体名称
+        merge_patches: 是否合并图形（影响矢量格式的输出）
+
+    返回:
+        十六进制 SHA-256 字符串
+    """
+    payload = {
+        'names': [str(name) for name in model['names']],
+        'angles': [float(angle) for angle in model['angles']],
+        'flows': np.asarray(model['flows'], dtype=float).tolist(),
+        'traffic_rule': model['traffic_rule'],
+        'max_volume': float(model['max_volume']),
+        'format': format,
+        'dpi': float(dpi),
+        'road_font_size': int(road_font_size),
+        'flow_font_size': int(flow_font_size),
+        'font': _font_identity(font),
+        'merge_patches': bool(merge_patches),
+        'style': style_fingerprint(),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """
+    内容寻址的渲染结果缓存（每个条目一个文件，文件修改时间作为最近使用时间）
+
+    缓存总大小在首次写入时扫描一次目录，之后按写入的字节数累加；只有累计值超过上限时
+    才重新扫描并淘汰，批量写入不会每次都遍历整个缓存目录。多个进程同时写入时各自累加，
+    累计值可能偏小，超出上限的部分在下一次淘汰时一并处理。
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total = None  # 缓存总大小的累计值（字节），None 表示尚未扫描
+        self._lock = threading.Lock()
+
+    def _path(self, key, format):
+        # 按键的前两位分子目录，避免单个目录文件过多
+        return os.path.join(self.directory, key[:2], f'{key}.{format}')
+
+    def get(self, key, format):
+        """读取缓存，未命中时返回 None；命中时刷新最近使用时间"""
+        path = self._path(key, format)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, format, data):
+        """写入缓存（先写临时文件再替换，多进程同时写入也是安全的），超出上限时淘汰旧条目"""
+        path = self._path(key, format)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced_size = os.path.getsize(path)
+            except OSError:
+                replaced_size = 0
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return False
+        with self._lock:
+            if self._total is None:
+                self._total = self.size()
+            else:
+                self._total += len(data) - replaced_size
+            over_limit = self._total > self.max_bytes
+        if over_limit:
+            self.evict()
+        return True
+
+    def _entries(self):
+        """列出缓存条目 [(最近使用时间, 大小, 路径), ...]"""
+        entries = []
+        try:
+            subdirs = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for subdir in subdirs:
+            subdir_path = os.path.join(self.directory, subdir)
+            if not os.path.isdir(subdir_path):
+                continue
+            for name in os.listdir(subdir_path):
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(subdir_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """缓存总大小（字节）"""
+        return sum(entry[1] for entry in self._entries())
+
+    def evict(self):
+        """总大小超过上限时，按最近使用时间从旧到新删除条目"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(entry[1] for entry in entries)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._total = total
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total = None
+
+
+def get_default_cache():
+    """
+    获取默认缓存（当前用户缓存目录中的 render_cache 文件夹，不写入程序目录）
+
+    返回:
+        RenderCache；通过环境变量关闭时返回 None
+    """
+    global _default_cache
+    value = os.environ.get(RENDER_CACHE_ENV_VAR, '').strip()
+    if value.lower() in ('0', 'off', 'false', 'no'):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            if value and value.lower() not in ('1', 'on', 'true', 'yes'):
+                directory = value
+            else:
+                import config
+                directory = os.path.join(config.get_cache_dir(), RENDER_CACHE_DIR)
+            _default_cache = RenderCache(directory)
+        return _default_cache
@@ -0,0 +1,743 @@
+# -*- coding: utf-8 -*-
+"""
+无界面渲染引擎模块
+不依赖 Tk 窗口、消息框和工具栏，直接由流量数据生成 matplotlib Figure 或图片字节，
+供批量导出、命令行和服务器端（无显示环境）调用；绘图窗口也复用这里的绘制逻辑。
+"""
+import io
+import os
+import sys
+import pickle
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+from matplotlib.patches import PathPatch
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import drawing_utils
+import flow_model
+import profiling
+from drawing_utils import (
+    draw_arc_with_width,
+    draw_turn_path_generic,
+    draw_traffic_volume_labels,
+    draw_text,
+    CENTER_OFFSET,
+    INNER_RADIUS_COEFF,
+    OUTER_RADIUS_COEFF,
+    NAME_LABEL_OFFSET,
+    MAX_LINE_WIDTH,
+    PLOT_XLIM,
+    PLOT_YLIM,
+    FIGURE_SIZE,
+    FIGURE_DPI,
+    DEFAULT_ROAD_LABEL_FONT_SIZE,
+    DEFAULT_FLOW_LABEL_FONT_SIZE,
+)
+
+# 支持的导出格式（扩展名 -> matplotlib 格式名）
+EXPORT_FORMATS = {
+    '.svg': 'svg',
+    '.pdf': 'pdf',
+    '.png': 'png',
+    '.jpg': 'jpg',
+    '.jpeg': 'jpg',
+    '.tif': 'tiff',
+    '.tiff': 'tiff',
+}
+
+# 矢量格式（与分辨率无关，直接由同一个图形导出）
+VECTOR_FORMATS = ('svg', 'pdf')
+
+# 默认导出方案：SVG + 300 DPI PNG + PDF（格式[@分辨率]，逗号分隔）
+DEFAULT_EXPORT_PROFILE = 'svg,png@300,pdf'
+
+# 进口流量线延伸到外圆之外的长度、出口箭头的长度（数据单位）
+ROAD_STUB_EXTENSION = 45
+# 出口箭头底边宽度与出口流量线宽度之比
+ARROW_WIDTH_RATIO = 1.8
+# 每个进口的流量线图形（进口流量线、出口流量线各4个顶点，出口箭头3个顶点，均为逆时针并闭合）
+ROAD_STUB_CODES = np.array(([Path.MOVETO] + [Path.LINETO] * 3 + [Path.CLOSEPOLY]) * 2
+                           + [Path.MOVETO] + [Path.LINETO] * 2 + [Path.CLOSEPOLY], dtype=Path.code_type)
+
+# 字号范围（与绘图窗口和配置文件的校验保持一致）
+MIN_FONT_SIZE = 6
+MAX_FONT_SIZE = 30
+
+
+def clamp_font_size(size, default):
+    """限制字号范围，无法解析时返回默认值"""
+    try:
+        size = int(size)
+    except:
+        return default
+    if size < MIN_FONT_SIZE:
+        return MIN_FONT_SIZE
+    if size > MAX_FONT_SIZE:
+        return MAX_FONT_SIZE
+    return size
+
+
+def format_from_extension(file_name):
+    """根据文件扩展名获取 matplotlib 导出格式，不支持时返回 None"""
+    ext = os.path.splitext(file_name)[1].lower()
+    return EXPORT_FORMATS.get(ext)
+
+
+def parse_export_profile(spec, default_dpi=FIGURE_DPI):
+    """
+    解析导出方案，如 'svg,png@300,pdf'（未指定分辨率时使用 default_dpi）
+
+    返回:
+        [(扩展名, matplotlib 格式名, 分辨率), ...]；格式或分辨率无效时抛出 ValueError
+    """
+    targets = []
+    for item in str(spec).split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        ext, _, dpi = item.partition('@')
+        ext = ext.strip().lstrip('.')
+        format = format_from_extension(f'output.{ext}')
+        if format is None:
+            raise ValueError(f'不支持的导出格式: {ext}')
+        try:
+            dpi = int(dpi) if dpi.strip() else default_dpi
+        except ValueError:
+            raise ValueError(f'无效的分辨率: {item}')
+        if dpi <= 0:
+            raise ValueError(f'无效的分辨率: {item}')
+        if (ext, format, dpi) not in targets:
+            targets.append((ext, format, dpi))
+    if not targets:
+        raise ValueError('导出方案为空')
+    return targets
+
+
+def profile_file_names(base_path, targets):
+    """
+    导出方案中各文件的路径：base_path.扩展名；同一扩展名出现多次时加上分辨率，如 base_path_300dpi.png
+
+    参数:
+        base_path: 不含扩展名的文件路径
+        targets: parse_export_profile() 的结果
+    """
+    ext_counts = {}
+    for ext, _, _ in targets:
+        ext_counts[ext] = ext_counts.get(ext, 0) + 1
+    return [
+        f'{base_path}_{dpi}dpi.{ext}' if ext_counts[ext] > 1 else f'{base_path}.{ext}'
+        for ext, _, dpi in targets
+    ]
+
+
+def find_font_file():
+    """
+    查找绘图用字体文件（不依赖 Tk）
+    优先使用项目 fonts 文件夹中的 HarmonyOS Sans Regular，其次是其他项目字体，
+    最后回退到 matplotlib 默认的无衬线字体文件
+    """
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+
+    fonts_dir = os.path.join(base_path, 'fonts')
+    if os.path.isdir(fonts_dir):
+        font_files = sorted(
+            os.path.join(fonts_dir, f) for f in os.listdir(fonts_dir)
+            if f.lower().endswith(('.ttf', '.otf', '.ttc'))
+        )
+        for font_path in font_files:
+            name = os.path.basename(font_path).lower()
+            if 'harmonyos' in name and 'sans' in name and 'medium' not in name and 'bold' not in name:
+                return font_path
+        if font_files:
+            return font_files[0]
+
+    try:
+        return fm.findfont(fm.FontProperties(family=['sans-serif']))
+    except:
+        return None
+
+
+def resolve_font(font=None):
+    """
+    确定绘图实际使用的字体：指定了字体文件路径或字体名称时原样使用，否则为 find_font_file() 的结果
+
+    绘制和渲染缓存键（render_cache.make_key）都应使用它的结果，
+    绘图窗口和导出进程对同一设置得到相同的键，可以互相命中缓存。
+    """
+    return font or find_font_file()
+
+
+@profiling.timed('prepare_intersection')
+def prepare_intersection(names, angles, old_flows, num_entries, traffic_rule='right', max_volume=None):
+    """
+    将表格/文件格式的数据整理为绘图所需的数据
+
+    参数:
+        names: 进口名称列表
+        angles: 进口方位角列表（浮点数）
+        old_flows: 流向数据（旧格式：old_flows[flow_idx][entry_idx]）
+        num_entries: 交叉口路数
+        traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+        max_volume: 线宽归一化使用的最大交通量，None 时取本图的最大流向流量
+                    （多张图使用同一比例尺时传入它们的共同最大值）
+
+    返回:
+        dict，包含 names、angles、flows（NumPy 数组 flows[entry_idx][exit_idx]）、
+        entry_total_volumes、exit_total_volumes、max_volume、lane_offsets、num_entries、traffic_rule
+    """
+    names = list(names[:num_entries])
+    angles = [float(a) for a in angles[:num_entries]]
+    # 如果进口名称为空，使用进口编号作为默认名称
+    for i in range(num_entries):
+        if not names[i] or str(names[i]).strip() == '':
+            names[i] = f'进口{i+1}'
+    by_order = np.zeros((num_entries, num_entries))
+    for flow_idx in range(num_entries):
+        row = np.asarray(old_flows[flow_idx][:num_entries], dtype=float)
+        by_order[flow_idx, :len(row)] = row
+
+    # 重新组织为flows[entry_idx][exit_idx]格式（flows[entry_idx][exit_idx] 表示从entry_idx+1到exit_idx+1的流量），
+    # 并用轴向求和计算各方向进口总量、出口总量，以及用于线宽归一化的最大交通量
+    flows = flow_model.build_flow_matrix(by_order, traffic_rule)
+    entry_total_volumes, exit_total_volumes, own_max_volume = flow_model.compute_totals(flows)
+    max_volume = float(own_max_volume if max_volume is None or max_volume <= 0 else max_volume)
+    # 预先计算所有流线在进口/出口处的车道排列偏移，绘制时查表
+    lane_offsets = flow_model.compute_lane_offsets(flows, traffic_rule)
+
+    return {
+        'names': names,
+        'angles': angles,
+        'flows': flows,
+        'entry_total_volumes': entry_total_volumes,
+        'exit_total_volumes': exit_total_volumes,
+        'max_volume': max_volume,
+        'lane_offsets': lane_offsets,
+        'num_entries': num_entries,
+        'traffic_rule': traffic_rule,
+    }
+
+
+def _road_endpoints(angle, traffic_rule='right'):
+    """
+    计算某一方位角道路的进口/出口流量线端点
+
+    返回:
+        (entry_inner, entry_outer, exit_inner, exit_outer)，均为 (x, y) 数组
+    """
+    angle_rad = angle * np.pi / 180
+    # 左行规则下，进出口位置对调：进口在左侧（+CENTER_OFFSET），出口在右侧（-CENTER_OFFSET）
+    # 右行规则（默认）：进口在右侧（-CENTER_OFFSET），出口在左侧（+CENTER_OFFSET）
+    entry_side = 1 if traffic_rule == 'left' else -1
+    exit_side = -entry_side
+    cos_a = np.cos(angle_rad)
+    sin_a = np.sin(angle_rad)
+
+    def point(side, radius):
+        return np.array([side * CENTER_OFFSET * sin_a + radius * cos_a,
+                         radius * sin_a - side * CENTER_OFFSET * cos_a])
+
+    return (point(entry_side, INNER_RADIUS_COEFF), point(entry_side, OUTER_RADIUS_COEFF),
+            point(exit_side, INNER_RADIUS_COEFF), point(exit_side, OUTER_RADIUS_COEFF))
+
+
+@lru_cache(maxsize=128)
+def road_stub_layout(angles, traffic_rule='right'):
+    """
+    预计算各进口的进口/出口流量线和出口箭头的形状（只取决于方位角和交通规则）
+
+    流量线和箭头的顶点都是 base + 宽度 * 单位位移，宽度变化时不需要重新计算方向和法线，
+    见 road_stub_vertices。
+
+    参数:
+        angles: 各进口方位角（元组，用作缓存的键）
+        traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+
+    返回:
+        只读数组 (base, entry_unit, exit_unit)，形如 (N, len(ROAD_STUB_CODES), 2)：
+        base 为宽度为0时的顶点，entry_unit / exit_unit 为进口/出口流量线宽度每增加1时各顶点的位移
+    """
+    num_entries = len(angles)
+    num_vertices = len(ROAD_STUB_CODES)
+    base = np.zeros((num_entries, num_vertices, 2))
+    entry_unit = np.zeros_like(base)
+    exit_unit = np.zeros_like(base)
+    for i, angle in enumerate(angles):
+        entry_inner, entry_outer, exit_inner, exit_outer = _road_endpoints(angle, traffic_rule)
+        # 进口流量线向外延长 ROAD_STUB_EXTENSION；出口箭头从出口外端沿出口方向延伸同样长度
+        entry_direction = (entry_outer - entry_inner) / np.linalg.norm(entry_outer - entry_inner)
+        exit_direction = (exit_outer - exit_inner) / np.linalg.norm(exit_outer - exit_inner)
+        entry_end = entry_outer + entry_direction * ROAD_STUB_EXTENSION
+        arrow_tip = exit_outer + exit_direction * ROAD_STUB_EXTENSION
+        entry_normal = np.array([-entry_direction[1], entry_direction[0]]) / 2
+        exit_normal = np.array([-exit_direction[1], exit_direction[0]]) / 2
+
+        # 宽度条（与 draw_line_with_width 相同）：起点右侧、终点右侧、终点左侧、起点左侧
+        base[i, 0:5] = [entry_inner, entry_end, entry_end, entry_inner, entry_inner]
+        entry_unit[i, 0:5] = [-entry_normal, -entry_normal, entry_normal, entry_normal, -entry_normal]
+        base[i, 5:10] = [exit_inner, exit_outer, exit_outer, exit_inner, exit_inner]
+        exit_unit[i, 5:10] = [-exit_normal, -exit_normal, exit_normal, exit_normal, -exit_normal]
+        # 箭头（与 draw_arrow 相同的三角形，按逆时针排列）
+        arrow_normal = exit_normal * ARROW_WIDTH_RATIO
+        base[i, 10:14] = [exit_outer, arrow_tip, exit_outer, exit_outer]
+        exit_unit[i, 10:14] = [-arrow_normal, (0, 0), arrow_normal, -arrow_normal]
+    for array in (base, entry_unit, exit_unit):
+        array.setflags(write=False)
+    return base, entry_unit, exit_unit
+
+
+def road_stub_vertices(model):
+    """
+    按本图的进口/出口总量计算各进口流量线和箭头的顶点
+
+    返回:
+        形如 (N, len(ROAD_STUB_CODES), 2) 的数组，第 i 行与 ROAD_STUB_CODES 组成第 i 个进口的复合路径
+    """
+    base, entry_unit, exit_unit = road_stub_layout(tuple(model['angles']), model['traffic_rule'])
+    scale = MAX_LINE_WIDTH / model['max_volume']
+    entry_widths = np.asarray(model['entry_total_volumes'], dtype=float) * scale
+    exit_widths = np.asarray(model['exit_total_volumes'], dtype=float) * scale
+    return base + entry_widths[:, None, None] * entry_unit + exit_widths[:, None, None] * exit_unit
+
+
+@profiling.timed('geometry')
+def draw_geometry(ax, model, merge_patches=True, include_turns=True, include_stubs=True, reuse=None):
+    """
+    绘制交叉口的几何图形（进口/出口流量线、箭头、掉头和转向路径），不含文字标注
+
+    参数:
+        ax: matplotlib轴对象
+        model: prepare_intersection() 返回的数据
+        merge_patches: 为 True 时将连续同色图形合并为复合路径（见 drawing_utils.PatchCollector），
+                       为 False 时每个图形单独添加为一个 patch
+        include_turns: 为 False 时只绘制进口/出口流量线和箭头（路网远景的简化图形，见 network_view）
+        include_stubs: 为 False 时不绘制进口/出口流量线和箭头（动画中这些图形只创建一次、
+                       逐帧只更新宽度，见 animation_export）
+        reuse: 上一次返回的图形列表（仅 merge_patches 为 True 时有效），复用这些 patch 只替换路径
+
+    返回:
+        本次添加到轴上的图形列表
+    """
+    num_entries = model['num_entries']
+    target = drawing_utils.PatchCollector() if merge_patches else ax
+    first_patch = len(ax.patches)
+    colors = drawing_utils.entry_colors(num_entries)
+
+    # 绘制进口和出口流量线（出口流量线末端带箭头），每个进口一个复合路径
+    if include_stubs:
+        for color, vertices in zip(colors, road_stub_vertices(model)):
+            target.add_patch(PathPatch(Path(vertices, ROAD_STUB_CODES), edgecolor=color, facecolor=color, lw=0))
+
+    if include_turns:
+        _draw_turn_paths(target, model, colors)
+
+    if merge_patches:
+        # 轴范围固定（见 draw_intersection），不需要按图形更新数据范围
+        return target.flush(ax, update_limits=False, reuse=reuse)
+    return list(ax.patches[first_patch:])
+
+
+def _draw_turn_paths(target, model, colors):
+    """绘制掉头路径和其他转向路径（见 draw_geometry）"""
+    angles = model['angles']
+    flows = model['flows']
+    entry_total_volumes = model['entry_total_volumes']
+    exit_total_volumes = model['exit_total_volumes']
+    max_volume = model['max_volume']
+    num_entries = model['num_entries']
+    traffic_rule = model['traffic_rule']
+    line_width_multiplier = MAX_LINE_WIDTH
+
+    # 绘制掉头路径（流线X_X，即flows[entry_idx][entry_idx]）
+    volume_ratio = line_width_multiplier / max_volume
+    for entry_idx in range(num_entries):
+        exit_idx = entry_idx  # 掉头：出口编号等于进口编号
+        if flows[entry_idx][exit_idx] == 0:
+            continue
+        entry_angle_rad = angles[entry_idx] * np.pi / 180
+        # 根据交通规则计算掉头路径的中心和半径
+        # 左行规则：进口在左侧，出口在右侧，掉头路径中心向另一侧偏移
+        side = -1 if traffic_rule == 'left' else 1
+        volume_diff = entry_total_volumes[entry_idx] - exit_total_volumes[exit_idx]
+        center_x = INNER_RADIUS_COEFF * np.cos(entry_angle_rad) + side * volume_ratio * 0.25 * volume_diff * np.sin(entry_angle_rad)
+        center_y = INNER_RADIUS_COEFF * np.sin(entry_angle_rad) - side * volume_ratio * 0.25 * volume_diff * np.cos(entry_angle_rad)
+        arc_radius = CENTER_OFFSET - volume_ratio * ((entry_total_volumes[entry_idx] + exit_total_volumes[exit_idx]) / 2 - flows[entry_idx][exit_idx]) / 2
+        u_turn_width = flows[entry_idx][exit_idx] * volume_ratio
+        # 检查半径和宽度是否有效
+        if arc_radius > 0 and u_turn_width > 0:
+            # 掉头路径角度处理：由于中心位置已经根据交通规则对调，角度保持和右行规则一样即可
+            draw_arc_with_width(
+                target,
+                center=(center_x, center_y),
+                radius=arc_radius,
+                start_angle=angles[entry_idx] + 90,
+                end_angle=angles[entry_idx] + 270,
+                width=u_turn_width,
+                color=colors[entry_idx],
+            )
+
+    # 绘制其他流向路径（流线X_Y，其中X != Y）
+    for entry_idx in range(num_entries):  # entry_idx是0-based，对应进口编号entry_idx+1
+        # 按在进口处的顺序（0是最左边）遍历：左行规则从X开始顺时针递增，右行规则从X开始逆时针递减
+        for exit_idx in flow_model.exit_index_table(num_entries, traffic_rule)[entry_idx]:
+            # 跳过掉头（已经在上面绘制了）
+            if entry_idx == exit_idx:
+                continue
+
+            if flows[entry_idx][exit_idx] != 0:
+                draw_turn_path_generic(
+                    target,
+                    entry_idx,
+                    exit_idx,
+                    angles,
+                    angles,
+                    entry_total_volumes,
+                    exit_total_volumes,
+                    flows[entry_idx][exit_idx],
+                    line_width_multiplier,
+                    max_volume,
+                    colors[entry_idx],
+                    flows,
+                    num_entries,
+                    traffic_rule,
+                    lane_offsets=model['lane_offsets'],
+                )
+
+
+@profiling.timed('labels')
+def draw_labels(ax, model, road_font_size=DEFAULT_ROAD_LABEL_FONT_SIZE,
+                flow_font_size=DEFAULT_FLOW_LABEL_FONT_SIZE, fontname=None, merge_patches=True,
+                include_names=True, reuse=None):
+    """
+    绘制交叉口的文字标注（进口名称、进口/出口总量、各流向交通量）
+
+    参数:
+        ax: matplotlib轴对象
+        model: prepare_intersection() 返回的数据
+        road_font_size: 路名标注字号
+        flow_font_size: 流量标注字号
+        fontname: 字体文件路径或字体名称，None 表示使用全局字体设置
+        merge_patches: 为 True 时将所有文字字形合并为一个复合路径
+        include_names: 为 False 时不绘制进口名称（动画中名称只绘制一次，见 draw_name_labels）
+        reuse: 上一次返回的图形列表（仅 merge_patches 为 True 时有效），复用这些 patch 只替换字形路径
+
+    返回:
+        本次添加到轴上的标注图形列表（字号变化时可直接移除后重绘，几何图形不受影响）
+    """
+    names = model['names']
+    angles = model['angles']
+    flows = model['flows']
+    entry_total_volumes = model['entry_total_volumes']
+    exit_total_volumes = model['exit_total_volumes']
+    num_entries = model['num_entries']
+    traffic_rule = model['traffic_rule']
+
+    target = drawing_utils.PatchCollector(normalize_orientation=False) if merge_patches else ax
+    first_patch = len(ax.patches)
+
+    for i in range(num_entries):
+        angle_rad = angles[i] * np.pi / 180
+        entry_inner, entry_outer, exit_inner, exit_outer = _road_endpoints(angles[i], traffic_rule)
+
+        # 进口名称：只要进口总量或出口总量不为0就显示（沿方位角方向向外移动45单位）
+        if include_names and entry_total_volumes[i] + exit_total_volumes[i] != 0:
+            name_x = (exit_outer[0] + entry_outer[0]) / 2 + (NAME_LABEL_OFFSET + 45) * np.cos(angle_rad)
+            name_y = (exit_outer[1] + entry_outer[1]) / 2 + (NAME_LABEL_OFFSET + 45) * np.sin(angle_rad)
+            name_angle = (angles[i] % 180 + 270) % 360
+            draw_text(target, names[i], road_font_size, (name_x, name_y), name_angle, "black", fontname=fontname)
+
+        # 进口总量标注：只有当进口总量不为0时才显示
+        if entry_total_volumes[i] != 0:
+            entry_label_angle = (angles[i] + 90) % 180 - 90
+            draw_text(target, str(int(entry_total_volumes[i])), flow_font_size,
+                      (entry_inner + entry_outer) / 2, entry_label_angle, "black", fontname=fontname)
+
+        # 出口总量标注：只有当出口总量不为0时才显示
+        if exit_total_volumes[i] != 0:
+            exit_label_angle = (angles[i] + 90) % 180 - 90
+            draw_text(target, str(int(exit_total_volumes[i])), flow_font_size,
+                      (exit_inner + exit_outer) / 2, exit_label_angle, "black", fontname=fontname)
+
+    # 标注各流向交通量（按流线顺序取出该进口的各流向流量；路数多时按相邻进口的间距收紧排列）
+    exit_indices = flow_model.exit_index_table(num_entries, traffic_rule)
+    label_widths = drawing_utils.flow_label_widths(angles)
+    for entry_idx in range(num_entries):
+        flow_volumes = [flows[entry_idx][exit_idx] for exit_idx in exit_indices[entry_idx]]
+        draw_traffic_volume_labels(
+            target,
+            entry_idx,
+            angles[entry_idx],
+            flow_volumes,
+            num_entries,
+            traffic_rule,
+            flow_font_size=flow_font_size,
+            fontname=fontname,
+            max_width=label_widths[entry_idx],
+        )
+
+    if merge_patches:
+        # 轴范围固定，不需要按标注更新数据范围
+        return target.flush(ax, update_limits=False, reuse=reuse)
+    return list(ax.patches[first_patch:])
+
+
+def draw_name_labels(ax, model, road_font_size=DEFAULT_ROAD_LABEL_FONT_SIZE, fontname=None,
+                     merge_patches=True):
+    """
+    只绘制进口名称（位置只取决于方位角，动画的各帧共用）
+
+    返回:
+        本次添加到轴上的标注图形列表
+    """
+    angles = model['angles']
+    target = drawing_utils.PatchCollector(normalize_orientation=False) if merge_patches else ax
+    first_patch = len(ax.patches)
+    for i in range(model['num_entries']):
+        angle_rad = angles[i] * np.pi / 180
+        _, entry_outer, _, exit_outer = _road_endpoints(angles[i], model['traffic_rule'])
+        name_x = (exit_outer[0] + entry_outer[0]) / 2 + (NAME_LABEL_OFFSET + 45) * np.cos(angle_rad)
+        name_y = (exit_outer[1] + entry_outer[1]) / 2 + (NAME_LABEL_OFFSET + 45) * np.sin(angle_rad)
+        name_angle = (angles[i] % 180 + 270) % 360
+        draw_text(target, model['names'][i], road_font_size, (name_x, name_y), name_angle, "black",
+                  fontname=fontname)
+    if merge_patches:
+        return target.flush(ax, update_limits=False)
+    return list(ax.patches[first_patch:])
+
+
+def draw_intersection(ax, model, road_font_size=DEFAULT_ROAD_LABEL_FONT_SIZE,
+                      flow_font_size=DEFAULT_FLOW_LABEL_FONT_SIZE, fontname=None, merge_patches=True):
+    """
+    在指定轴上绘制完整的交叉口流量流向图（先绘制几何图形，再在其上绘制文字标注）
+
+    参数:
+        ax: matplotlib轴对象
+        model: prepare_intersection() 返回的数据
+        road_font_size: 路名标注字号
+        flow_font_size: 流量标注字号
+        fontname: 字体文件路径或字体名称，None 表示使用全局字体设置
+        merge_patches: 是否将同色图形和文字合并为复合路径（见 draw_geometry / draw_labels）
+
+    返回:
+        标注图形列表（见 draw_labels）
+    """
+    ax.set_aspect('equal')
+    draw_geometry(ax, model, merge_patches=merge_patches)
+    label_artists = draw_labels(ax, model, road_font_size, flow_font_size, fontname=fontname,
+                                merge_patches=merge_patches)
+    ax.set_xlim(PLOT_XLIM[0], PLOT_XLIM[1])
+    ax.set_ylim(PLOT_YLIM[0], PLOT_YLIM[1])
+    ax.set_axis_off()
+    return label_artists
+
+
+def render_figure(names, angles, old_flows, traffic_rule='right',
+                  road_font_size=DEFAULT_ROAD_LABEL_FONT_SIZE,
+                  flow_font_size=DEFAULT_FLOW_LABEL_FONT_SIZE,
+                  font_file=None, num_entries=None, merge_patches=True):
+    """
+    无界面绘制交叉口流量流向图
+
+    参数:
+        names: 进口名称列表
+        angles: 进口方位角列表
+        old_flows: 流向数据（与数据文件一致：old_flows[flow_idx][entry_idx]）
+        traffic_rule: 交通规则，'right'（右行）或'left'（左行）
+        road_font_size: 路名标注字号
+        flow_font_size: 流量标注字号
+        font_file: 字体文件路径，None 时自动查找（不依赖 Tk）
+        num_entries: 交叉口路数，None 时取 names 的长度
+        merge_patches: 是否将同色图形合并为复合路径（减少绘制次数和导出文件体积）
+
+    返回:
+        matplotlib Figure（已绑定 Agg 画布，不进入 pyplot 的全局图形管理）
+    """
+    if num_entries is None:
+        num_entries = len(names)
+    font_file = resolve_font(font_file)
+
+    model = prepare_intersection(names, angles, old_flows, num_entries, traffic_rule)
+    road_font_size = clamp_font_size(road_font_size, DEFAULT_ROAD_LABEL_FONT_SIZE)
+    flow_font_size = clamp_font_size(flow_font_size, DEFAULT_FLOW_LABEL_FONT_SIZE)
+    return figure_from_model(model, road_font_size, flow_font_size, font_file, merge_patches)
+
+
+def figure_from_model(model, road_font_size, flow_font_size, font_file, merge_patches=True):
+    """由 prepare_intersection() 的结果创建 Agg 画布上的 Figure（字号需已限制范围）"""
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    draw_intersection(ax, model, road_font_size, flow_font_size, fontname=font_file,
+                      merge_patches=merge_patches)
+    fig.tight_layout()
+    return fig
+
+
+@profiling.timed('savefig')
+def save_figure(fig, target, format='svg', dpi=FIGURE_DPI):
+    """按绘图窗口导出时的参数保存图形（target 可以是文件路径或文件对象）"""
+    fig.savefig(target, format=format, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+
+
+def figure_to_bytes(fig, format='svg', dpi=FIGURE_DPI):
+    """将图形导出为字节内容"""
+    buffer = io.BytesIO()
+    save_figure(fig, buffer, format=format, dpi=dpi)
+    return buffer.getvalue()
+
+
+def _encode_raster(png_data, format, dpi):
+    """将 PNG 数据转换为同分辨率的其他位图格式（与 matplotlib 的 jpg/tiff 导出参数一致）"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png_data))
+    buffer = io.BytesIO()
+    if format == 'jpg':
+        image.convert('RGB').save(buffer, format='JPEG', dpi=(dpi, dpi))
+    elif format == 'tiff':
+        image.save(buffer, format='TIFF', compression='tiff_lzw', dpi=(dpi, dpi))
+    else:
+        raise ValueError(f'不支持的位图格式: {format}')
+    return buffer.getvalue()
+
+
+def _rasterize(fig, dpi, formats):
+    """
+    按一个分辨率栅格化图形，同一分辨率的多种位图格式只绘制一次
+
+    参数:
+        fig: Figure 或 pickle 后的 Figure（在工作进程中执行时）
+    返回:
+        {格式名: 字节内容}
+    """
+    if isinstance(fig, bytes):
+        fig = pickle.loads(fig)
+    png_data = figure_to_bytes(fig, format='png', dpi=dpi)
+    return {format: png_data if format == 'png' else _encode_raster(png_data, format, dpi)
+            for format in formats}
+
+
+def export_targets(fig, targets, max_workers=None):
+    """
+    由同一个已排版的图形导出多种格式和分辨率
+
+    矢量格式在当前进程中依次导出（共用图形中的路径数据）；位图按分辨率分组，
+    同一分辨率只栅格化一次，并在工作进程中与矢量导出并行执行。
+
+    参数:
+        fig: 已绑定 Agg 画布的 Figure（见 figure_from_model）
+        targets: [(格式名, 分辨率), ...]
+        max_workers: 栅格化工作进程数，None 表示按分辨率组数和CPU核数决定，0 表示不使用工作进程
+
+    返回:
+        {(格式名, 分辨率): 字节内容}
+    """
+    vector_targets = [(format, dpi) for format, dpi in targets if format in VECTOR_FORMATS]
+    raster_groups = {}
+    for format, dpi in targets:
+        if format not in VECTOR_FORMATS:
+            raster_groups.setdefault(dpi, []).append(format)
+
+    if max_workers is None:
+        # 主进程负责矢量导出时少用一个核
+        cpu_count = os.cpu_count() or 1
+        max_workers = min(len(raster_groups), cpu_count - 1 if vector_targets else cpu_count)
+    # 至少有两项可以同时进行的工作（矢量导出和栅格化，或多个分辨率）时才启动工作进程
+    parallel = bool(raster_groups) and max_workers >= 1 and len(raster_groups) + bool(vector_targets) > 1
+
+    outputs = {}
+    if not parallel:
+        for format, dpi in vector_targets:
+            outputs[(format, dpi)] = figure_to_bytes(fig, format=format, dpi=dpi)
+        for dpi, formats in raster_groups.items():
+            for format, data in _rasterize(fig, dpi, formats).items():
+                outputs[(format, dpi)] = data
+        return outputs
+
+    fig_data = pickle.dumps(fig)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {dpi: executor.submit(_rasterize, fig_data, dpi, formats)
+                   for dpi, formats in raster_groups.items()}
+        for format, dpi in vector_targets:
+            outputs[(format, dpi)] = figure_to_bytes(fig, format=format, dpi=dpi)
+        for dpi, future in futures.items():
+            for format, data in future.result().items():
+                outputs[(format, dpi)] = data
+    return outputs
+
+
+def render_targets(names, angles, old_flows, traffic_rule='right', targets=(('svg', FIGURE_DPI),),
+                   road_font_size=DEFAULT_ROAD_LABEL_FONT_SIZE,
+                   flow_font_size=DEFAULT_FLOW_LABEL_FONT_SIZE,
+                   font_file=None, num_entries=None, merge_patches=True, cache=None, max_workers=None):
+    """
+    无界面绘制一次图形并导出为多种格式和分辨率（优先读取渲染缓存，未命中的部分见 export_targets）
+
+    参数:
+        targets: [(格式名, 分辨率), ...]，如 [('svg', 100), ('png', 300), ('pdf', 100)]
+        cache: render_cache.RenderCache；None 使用默认缓存，False 不使用缓存
+        max_workers: 栅格化工作进程数（见 export_targets）
+        其余参数同 render_figure
+
+    返回:
+        {(格式名, 分辨率): 字节内容}
+    """
+    import render_cache
+
+    if cache is None:
+        cache = render_cache.get_default_cache()
+    if num_entries is None:
+        num_entries = len(names)
+    font_file = resolve_font(font_file)
+
+    model = prepare_intersection(names, angles, old_flows, num_entries, traffic_rule)
+    road_font_size = clamp_font_size(road_font_size, DEFAULT_ROAD_LABEL_FONT_SIZE)
+    flow_font_size = clamp_font_size(flow_font_size, DEFAULT_FLOW_LABEL_FONT_SIZE)
+
+    outputs = {}
+    keys = {}
+    missing = []
+    for format, dpi in targets:
+        if cache:
+            key = render_cache.make_key(model, format, dpi, road_font_size, flow_font_size,
+                                        font_file, merge_patches)
+            data = cache.get(key, format)
+            if data is not None:
+                outputs[(format, dpi)] = data
+                continue
+            keys[(format, dpi)] = key
+        missing.append((format, dpi))
+
+    if missing:
+        fig = figure_from_model(model, road_font_size, flow_font_size, font_file, merge_patches)
+        for target, data in export_targets(fig, missing, max_workers).items():
+            if cache:
+                cache.put(keys[target], target[0], data)
+            outputs[target] = data
+    return outputs
+
+
+def render_formats(names, angles, old_flows, traffic_rule='right', formats=('svg',), dpi=FIGURE_DPI, **kwargs):
+    """
+    无界面绘制并以同一分辨率导出为多种格式（见 render_targets，其余参数相同）
+
+    返回:
+        {格式名: 字节内容}
+    """
+    outputs = render_targets(names, angles, old_flows, traffic_rule=traffic_rule,
+                             targets=[(format, dpi) for format in formats], **kwargs)
+    return {format: outputs[(format, dpi)] for format in formats}
+
+
+def render_to_bytes(names, angles, old_flows, traffic_rule='right', format='svg', dpi=FIGURE_DPI, **kwargs):
+    """无界面绘制并直接返回导出文件的字节内容（经过渲染缓存，其余参数同 render_formats）"""
+    outputs = render_formats(names, angles, old_flows, traffic_rule=traffic_rule, formats=(format,),
+                             dpi=dpi, **kwargs)
+    return outputs[format]
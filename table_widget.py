@@ -4,6 +4,8 @@ import tkinter as tk
 from tkinter import ttk
 import re
 
+from intersection import Intersection, parse_number, format_number
+
 # 延迟导入i18n模块，避免循环依赖
 def t(key, **kwargs):
     """翻译函数（延迟导入i18n）"""
@@ -25,6 +27,19 @@ def normalize_angle(angle):
     except (ValueError, TypeError):
         return angle
 
+def format_angle(value):
+    """
+    归一化方位角文本
+
+    返回:
+        (归一化角度, 显示文本)；无法解析时为 (0.0, 原文本)
+    """
+    try:
+        normalized = float(normalize_angle(value))
+        return normalized, format_number(normalized)
+    except (ValueError, TypeError, OverflowError):
+        return 0.0, str(value)
+
 def save_config():
     """保存配置（延迟导入config模块）"""
     try:
@@ -50,22 +65,15 @@ class Table(tk.Frame):
         self._widgets = []
         self.row_labels = []  # 保存行标题引用，用于语言切换
         self.file_name = None
+        self.flow_series = None  # 多时段数据（flow_series.FlowSeries），从多时段文件加载时设置
         self.is_modified = False
         
-        # 初始化数据结构：names, angles, flow_0, flow_1, ..., flow_{N-1}
-        # raw_data: 存储用户输入的原始数据（未归一化、未排序）
-        # data: 存储处理后的数据（归一化、排序后），用于显示和绘制
-        self.raw_data = {
-            'names': [],
-            'angles': []
-        }
-        self.data = {
-            'names': [],
-            'angles': []
-        }
-        for i in range(num_entries):
-            self.raw_data[f'flow_{i}'] = []
-            self.data[f'flow_{i}'] = []
+        # 表格数据（类型化的交叉口数据，行顺序与表格一致），输入框修改后由 get() 增量同步
+        # 输入框列顺序：进口名称、方位角、流线0..N-1（对应 by_order[flow_idx, entry_idx]）
+        self.intersection = Intersection.empty(num_entries, traffic_rule)
+        self._vars = []  # 输入框的文本变量，_vars[row][column]
+        self._dirty = set()  # 上次同步后修改过的单元格 (row, column)
+        self._syncing = False  # 程序写入输入框时不记为修改
         
         # 生成表头
         headings = [t('entry_number'), t('entry_name'), t('angle')]
@@ -361,8 +369,13 @@ class Table(tk.Frame):
                     pass
             direction.grid(row=row+3, column=0, padx=5, pady=5, sticky='w')  # row+3因为表头在row=3
             self.row_labels.append(direction)  # 保存行标题引用，用于语言切换
+            row_vars = []
             for column in range(1, columns):
-                entry = ttk.Entry(self, width=10)
+                # 输入框内容变化（键入、粘贴或程序修改）时记录单元格，get() 只同步这些单元格
+                var = tk.StringVar(self)
+                var.trace_add('write', lambda *args, r=row - 1, c=column - 1: self._on_cell_write(r, c))
+                row_vars.append(var)
+                entry = ttk.Entry(self, width=10, textvariable=var)
                 entry.bind('<KeyRelease>', self.mark_modified)
                 # 数据框对齐：与表头保持一致，使用相同的padx和sticky
                 entry.grid(row=row+3, column=column, padx=5, pady=5, sticky='w')  # row+3因为表头在row=3
@@ -372,6 +385,7 @@ class Table(tk.Frame):
                     entry.insert(0, str(int(default_angle)) if default_angle == int(default_angle) else str(default_angle))
                 current_row.append(entry)
             self._widgets.append(current_row)
+            self._vars.append(row_vars)
     
     def on_rule_change(self):
         """交通规则改变时的回调函数"""
@@ -645,156 +659,126 @@ class Table(tk.Frame):
         except Exception as e:
             print(f"更新表格语言时出错: {e}")
 
+    def _on_cell_write(self, row, column):
+        """输入框内容变化时记录单元格"""
+        if not self._syncing:
+            self._dirty.add((row, column))
+
+    def _set_cell(self, row, column, value):
+        """程序写入单元格（内容相同时不写入，不记为修改）"""
+        var = self._vars[row][column]
+        try:
+            if var.get() == value:
+                return
+            self._syncing = True
+            try:
+                var.set(value)
+            finally:
+                self._syncing = False
+        except tk.TclError:
+            # 输入框已被销毁
+            pass
+
     def sort_by_angle(self):
-        """根据归一化后的角度对所有进口数据进行排序，并更新UI显示"""
-        if not self.data or 'angles' not in self.data or len(self.data['angles']) == 0:
+        """根据归一化后的角度对所有进口数据进行排序（稳定排序），并只改写位置变化的行"""
+        order = self.intersection.angle_order()
+        moved = [row for row, source in enumerate(order) if row != source]
+        if not moved:
             return
-        
-        # 获取所有数据列
-        keys = list(self.data.keys())
-        num_entries = len(self.data['angles'])
-        
-        # 创建包含所有数据的元组列表，每个元组代表一行数据
-        # 元组格式：(归一化角度, 原始索引, names值, angles值, flow_0值, flow_1值, ...)
-        data_rows = []
-        for i in range(num_entries):
+        self.intersection.reorder(order)
+        # 多时段数据与表格保持相同的进口顺序，保存时时段块与路名、方位角一一对应
+        if self.flow_series is not None:
+            self.flow_series = self.flow_series.reorder_entries(order)
+        texts = {}
+        for row in moved:
             try:
-                angle = float(self.data['angles'][i])
-                normalized_angle = normalize_angle(angle)
-            except (ValueError, TypeError):
-                normalized_angle = 0.0
-            
-            row_data = [normalized_angle]  # 第一个元素是归一化角度，用于排序
-            row_data.append(i)  # 第二个元素是原始索引
-            # 添加所有列的值
-            for key in keys:
-                if i < len(self.data[key]):
-                    row_data.append(self.data[key][i])
-                else:
-                    row_data.append('')
-            data_rows.append(row_data)
-        
-        # 根据归一化角度排序
-        data_rows.sort(key=lambda x: x[0])
-        
-        # 重新组织排序后的数据
-        for key in keys:
-            self.data[key] = []
-        
-        for row_data in data_rows:
-            # row_data格式: [归一化角度, 原始索引, names值, angles值, flow_0值, flow_1值, ...]
-            # 跳过前两个元素（归一化角度和原始索引），从索引2开始是实际数据
-            for idx, key in enumerate(keys):
-                if idx + 2 < len(row_data):
-                    self.data[key].append(row_data[idx + 2])
-                else:
-                    self.data[key].append('')
-        
-        # 更新UI显示（显示归一化后的角度）
-        keys = list(self.data.keys())
-        num_rows = min(len(self._widgets), len(self.data[keys[0]]) if keys else 0)
-        for row in range(num_rows):
-            for i, widget in enumerate(self._widgets[row]):
-                if i < len(keys):
-                    widget.delete(0, tk.END)
-                    value = self.data[keys[i]][row] if row < len(self.data[keys[i]]) else ''
-                    # 如果是角度列（索引为2），显示归一化后的值
-                    if i == 2 and value:
-                        try:
-                            normalized = normalize_angle(value)
-                            value = str(int(normalized)) if normalized == int(normalized) else str(normalized)
-                        except:
-                            pass
-                    widget.insert(0, str(value))
+                texts[row] = [var.get() for var in self._vars[row]]
+            except tk.TclError:
+                return
+        for row in moved:
+            for column, value in enumerate(texts[order[row]]):
+                self._set_cell(row, column, value)
 
-    def set_data(self, data):
-        # 清空字典
-        for key in self.data:
-            self.data[key].clear()
-        for key in self.raw_data:
-            self.raw_data[key].clear()
+    def set_intersection(self, intersection, flow_series=None):
+        """
+        显示交叉口数据（方位角归一化，进口按方位角排序）
 
-        # 保存原始数据（用于文件保存）- 保持用户输入的原始角度值和顺序
-        for key in data:
-            if key in self.raw_data:
-                if isinstance(data[key], list):
-                    self.raw_data[key] = [str(v) for v in data[key]]
-                else:
-                    self.raw_data[key] = [str(data[key])]
-        
-        # 设置处理后的数据（归一化角度）
-        keys = list(data.keys())
-        for key in keys:
-            if key in self.data:
-                if key == 'angles':
-                    # 归一化角度
-                    normalized_angles = []
-                    for angle in data[key]:
-                        try:
-                            normalized = normalize_angle(angle)
-                            normalized_angles.append(str(int(normalized)) if normalized == int(normalized) else str(normalized))
-                        except:
-                            normalized_angles.append(str(angle))
-                    self.data[key] = normalized_angles
-                else:
-                    if isinstance(data[key], list):
-                        self.data[key] = [str(v) for v in data[key]]
-                    else:
-                        self.data[key] = [str(data[key])]
-        
-        # 排序数据
-        self.sort_by_angle()
+        参数:
+            intersection: Intersection，路数与表格一致；之后由表格持有并修改
+            flow_series: 多时段数据（flow_series.FlowSeries），与 intersection 的进口顺序一致，按相同顺序重排
+        """
+        intersection.normalize_angles()
+        order = intersection.angle_order()
+        intersection.reorder(order)
+        self.intersection = intersection
+        self.flow_series = flow_series.reorder_entries(order) if flow_series is not None else None
+        for row in range(min(len(self._vars), intersection.num_entries)):
+            self._set_cell(row, 0, intersection.names[row])
+            self._set_cell(row, 1, format_number(intersection.angles[row]))
+            for flow_idx in range(intersection.num_entries):
+                self._set_cell(row, flow_idx + 2, format_number(intersection.by_order[flow_idx, row]))
+        self._dirty.clear()
         
         # 从文件加载数据后，清除修改标记
         self.is_modified = False
 
     def get(self):
-        keys = list(self.data.keys())
-        # 清空字典
-        for key in self.data:
-            self.data[key].clear()
-        for key in self.raw_data:
-            self.raw_data[key].clear()
-
-        # 从UI获取数据（用户输入的值，可能是归一化后的，也可能是新的原始值）
-        for row in self._widgets:
-            for i, widget in enumerate(row):
-                if i < len(keys):
-                    try:
-                        # 检查 widget 是否仍然有效（没有被销毁）
-                        widget.winfo_exists()
-                        value = widget.get()
-                    except (tk.TclError, AttributeError):
-                        # 如果 widget 已被销毁，跳过或使用空值
-                        value = ""
-                    
-                    # 保存到raw_data（用户输入的值作为原始值）
-                    if keys[i] in self.raw_data:
-                        self.raw_data[keys[i]].append(value)
-                    # 如果是角度列，归一化后保存到data；否则直接保存
-                    if keys[i] == 'angles':
-                        try:
-                            normalized = normalize_angle(value)
-                            normalized_str = str(int(normalized)) if normalized == int(normalized) else str(normalized)
-                            self.data[keys[i]].append(normalized_str)
-                        except:
-                            self.data[keys[i]].append(value)
-                    else:
-                        self.data[keys[i]].append(value)
+        """
+        将输入框的修改同步到 intersection 并返回它
+        只读取上次同步后修改过的单元格；方位角归一化后的值变化时才重新排序
+        """
+        intersection = self.intersection
+        if intersection.traffic_rule != self.traffic_rule:
+            intersection.set_traffic_rule(self.traffic_rule)
+        if not self._dirty:
+            return intersection
+        dirty, self._dirty = self._dirty, set()
+        resort = False
+        for row, column in dirty:
+            try:
+                value = self._vars[row][column].get()
+            except tk.TclError:
+                # 如果 widget 已被销毁，使用空值
+                value = ''
+            if column == 0:
+                intersection.set_name(row, value)
+            elif column == 1:
+                # 方位角归一化后保存，并显示归一化后的值
+                angle, text = format_angle(value)
+                if angle != intersection.angles[row]:
+                    intersection.set_angle(row, angle)
+                    resort = True
+                self._set_cell(row, column, text)
+            else:
+                intersection.set_flow(column - 2, row, parse_number(value))
         
         # 排序数据（基于归一化后的角度）
-        self.sort_by_angle()
+        if resort:
+            self.sort_by_angle()
+        return intersection
+
 
+    def format_lines(self):
+        """
+        转换为数据文件中的路名、方位角和流量行
+        按输入框中的文本保存：空值和无法解析的值原样保留（不写成0），方位角为归一化后显示的值
+
+        返回:
+            行列表（不含换行符）
+        """
+        # 先同步输入框的修改（方位角归一化并排序）
+        self.get()
+        texts = []
+        for row in self._vars:
+            try:
+                texts.append([var.get() for var in row])
+            except tk.TclError:
+                texts.append([''] * len(row))
+        return [','.join(row[column] for row in texts) for column in range(self.num_entries + 2)]
 
     def save_to_file(self):
         if self.file_name:
-            # 先更新原始数据（从UI获取最新值）
-            self.get()
-            # 使用原始数据保存（保持用户输入的原始角度值和顺序）
             with open(self.file_name, 'w', encoding='utf-8') as file:
-                for key, values in self.raw_data.items():
-                    file.write(','.join(values) + '\n')
+                file.write('\n'.join(self.format_lines()) + '\n')
         else:
             print(t('file_no_save_target'))
-
-
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设置
+测试不创建 Tk 窗口：表格用 StringVar 的替代对象构造，只测试数据同步、排序和保存逻辑。
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+class FakeVar:
+    """代替 tk.StringVar：set 时调用写入回调（与 trace_add('write') 一致）"""
+
+    def __init__(self, callback):
+        self.value = ''
+        self.callback = callback
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        self.callback()
+
+
+def make_table(num_entries, traffic_rule='right'):
+    """不创建界面组件的 table_widget.Table"""
+    import table_widget
+    from intersection import Intersection
+
+    table = object.__new__(table_widget.Table)
+    table.num_entries = num_entries
+    table.traffic_rule = traffic_rule
+    table.is_modified = False
+    table.file_name = None
+    table.flow_series = None
+    table.intersection = Intersection.empty(num_entries, traffic_rule)
+    table._dirty = set()
+    table._syncing = False
+    table._vars = [[FakeVar(lambda row=row, column=column: table._on_cell_write(row, column))
+                    for column in range(num_entries + 2)]
+                   for row in range(num_entries)]
+    return table
+
+
+@pytest.fixture
+def sample_file():
+    """返回仓库中测试数据文件的路径，如 sample_file(4) -> 测试数据_4路.txt"""
+    return lambda num_entries: os.path.join(ROOT_DIR, f'测试数据_{num_entries}路.txt')
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""动画逐帧绘制：复用图形后的帧与单独绘制的帧一致"""
+import numpy as np
+import pytest
+
+import animation_export
+import drawing_utils
+import render_engine
+
+
+def _renderer(frames, num_entries):
+    names = [f'路{i}' for i in range(num_entries)]
+    angles = list(np.arange(num_entries) * 360 / num_entries + 10)
+    return animation_export.FrameRenderer(names, angles, frames, [f'P{i}' for i in range(len(frames))],
+                                          max_volume=animation_export.global_max_volume(frames), dpi=40)
+
+
+@pytest.mark.parametrize('num_entries', [3, 5])
+def test_reused_artists_match_fresh_render(num_entries):
+    rng = np.random.default_rng(num_entries)
+    frames = rng.integers(0, 400, size=(4, num_entries, num_entries)).astype(float)
+    frames[1] = 0
+    frames[2, :, 0] = 0
+    renderer = _renderer(frames, num_entries)
+    stub_paths = list(renderer._stub_paths)
+    for index in range(len(frames)):
+        data = renderer.render(index)
+        assert data == _renderer(frames, num_entries).render(index)
+    # 流量线只创建一次，之后只改写顶点
+    assert renderer._stub_paths == stub_paths
+    assert all(path in [patch.get_path() for patch in renderer.ax.patches] for path in stub_paths)
+
+
+def test_road_stub_vertices_match_band_drawing():
+    model = render_engine.prepare_intersection(['东', '北', '西', '南'], [0, 75, 180, 270],
+                                               np.arange(16).reshape(4, 4) + 1, 4, 'left')
+    vertices = render_engine.road_stub_vertices(model)
+    collector = drawing_utils.PatchCollector(normalize_orientation=False)
+    for i, angle in enumerate(model['angles']):
+        entry_inner, entry_outer, exit_inner, exit_outer = render_engine._road_endpoints(angle, 'left')
+        entry_end = entry_outer + (entry_outer - entry_inner) / np.linalg.norm(entry_outer - entry_inner) * 45
+        arrow_tip = exit_outer + (exit_outer - exit_inner) / np.linalg.norm(exit_outer - exit_inner) * 45
+        entry_width = model['entry_total_volumes'][i] * drawing_utils.MAX_LINE_WIDTH / model['max_volume']
+        exit_width = model['exit_total_volumes'][i] * drawing_utils.MAX_LINE_WIDTH / model['max_volume']
+        drawing_utils.draw_line_with_width(collector, entry_inner, entry_end, entry_width, 'red')
+        drawing_utils.draw_line_with_width(collector, exit_inner, exit_outer, exit_width, 'red')
+        drawing_utils.draw_arrow(collector, exit_outer, arrow_tip, exit_width * 1.8, 'red')
+        expected = [path.vertices[:-1] for path in collector._runs.pop()[1]]
+        assert len(expected) == 3
+        actual = [vertices[i, 0:4], vertices[i, 5:9], vertices[i, 10:13]]
+        for polygon, reference in zip(actual, expected):
+            assert sorted(map(tuple, np.round(polygon, 9))) == sorted(map(tuple, np.round(reference, 9)))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""配置缓存、合并写入和外部修改检测的测试"""
+import os
+import time
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    """配置文件放在临时目录，内存状态每个测试重新开始；定时器默认不会在测试中触发"""
+    path = str(tmp_path / config.CONFIG_FILE)
+    monkeypatch.setattr(config, 'get_config_path', lambda: path)
+    monkeypatch.setattr(config, '_state', {'path': None, 'config': None, 'stamp': None, 'dirty': False, 'timer': None})
+    monkeypatch.setattr(config, 'SAVE_DELAY_SECONDS', 60)
+    yield path
+    config.flush_config()
+
+
+def _count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(config, name)
+
+    def wrapper(*args):
+        calls.append(args)
+        return original(*args)
+    monkeypatch.setattr(config, name, wrapper)
+    return calls
+
+
+def test_save_flush_load_round_trip(config_path):
+    assert config.load_config() == config.default_config()
+    config.save_config(road_label_font_size=20, flow_label_font_size=9)
+    assert not os.path.exists(config_path)  # 合并写入前不写文件
+    assert config.load_config()['road_label_font_size'] == 20
+
+    config.flush_config()
+    assert not os.path.exists(config_path + '.tmp')
+    parsed = config._parse_config(config_path)
+    assert parsed == config.load_config()
+    assert (parsed['road_label_font_size'], parsed['flow_label_font_size']) == (20, 9)
+
+
+def test_repeated_saves_write_once(config_path, monkeypatch):
+    writes = _count_calls(monkeypatch, '_format_config')
+    for size in range(10, 30):
+        config.save_config(road_label_font_size=size)
+    config.flush_config()
+    config.flush_config()
+    assert len(writes) == 1
+    assert config._parse_config(config_path)['road_label_font_size'] == 29
+
+    # 内容未变化时不再写入
+    config.save_config(road_label_font_size=29)
+    config.flush_config()
+    assert len(writes) == 1
+
+
+def test_load_is_cached_until_file_changes(config_path, monkeypatch):
+    config.save_config(flow_label_font_size=14)
+    config.flush_config()
+    parses = _count_calls(monkeypatch, '_parse_config')
+    for _ in range(10):
+        assert config.load_config()['flow_label_font_size'] == 14
+    assert parses == []
+
+    with open(config_path, 'a', encoding='utf-8') as f:
+        f.write('flow_label_font_size=16\n')
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert config.load_config()['flow_label_font_size'] == 16
+    assert len(parses) == 1
+
+
+def test_timer_writes_after_delay(config_path, monkeypatch):
+    monkeypatch.setattr(config, 'SAVE_DELAY_SECONDS', 0.05)
+    config.save_config(road_label_font_size=18)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(config_path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert config._parse_config(config_path)['road_label_font_size'] == 18
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""流量档案：导入 -> 读取的往返测试和导入时的一致性检查"""
+import numpy as np
+import pytest
+
+import count_archive
+from flow_series import FlowSeries
+from intersection import Intersection
+
+
+def _write_periods(path, interval, num_periods=4):
+    """写一个3路多时段数据文件，返回写入的 by_order 张量"""
+    periods = np.arange(num_periods * 9, dtype=float).reshape(num_periods, 3, 3) + 1
+    series = FlowSeries(periods, interval_minutes=interval)
+    inter = Intersection(['东', '北', '西'], [0, 90, 180], periods.sum(axis=0))
+    lines = ['本交叉口为3路交叉口，实行右行通行规则'] + inter.format_lines() + series.format_lines()
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return periods
+
+
+def test_import_round_trip(tmp_path, sample_file):
+    periods = _write_periods(tmp_path / '多时段.txt', 15)
+    archive_path = str(tmp_path / 'counts.tfa')
+    assert count_archive.import_files(archive_path, [sample_file(4), str(tmp_path / '多时段.txt')]) == 2
+
+    archive = count_archive.CountArchive(archive_path)
+    assert archive.keys() == ['测试数据_4路', '多时段']
+    assert archive.meta['interval_minutes'] == 15
+    np.testing.assert_array_equal(archive.flows('多时段'), periods)
+    np.testing.assert_array_equal(archive.flows('多时段', 1, 3), periods[1:3])
+    assert archive.series('多时段').interval_minutes == 15
+
+
+def test_import_rejects_duplicate_keys(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    _write_periods(tmp_path / 'a' / '路口.txt', 15)
+    _write_periods(tmp_path / 'b' / '路口.txt', 15)
+    with pytest.raises(ValueError, match='路口'):
+        count_archive.import_files(str(tmp_path / 'counts.tfa'),
+                                   [str(tmp_path / 'a' / '路口.txt'), str(tmp_path / 'b' / '路口.txt')])
+
+
+def test_import_rejects_interval_mismatch(tmp_path):
+    _write_periods(tmp_path / '十五分钟.txt', 15)
+    _write_periods(tmp_path / '五分钟.txt', 5)
+    with pytest.raises(ValueError, match='时段长度'):
+        count_archive.import_files(str(tmp_path / 'counts.tfa'),
+                                   [str(tmp_path / '十五分钟.txt'), str(tmp_path / '五分钟.txt')])
+
+
+def test_writer_checks_before_writing(tmp_path):
+    archive_path = str(tmp_path / 'counts.tfa')
+    by_order = np.ones((2, 3, 3))
+    with count_archive.ArchiveWriter(archive_path, interval_minutes=15) as writer:
+        writer.add_intersection('A', ['东', '北', '西'], [0, 90, 180], by_order, interval_minutes=15)
+        with pytest.raises(ValueError):
+            writer.add_intersection('A', ['东', '北', '西'], [0, 90, 180], by_order)
+        with pytest.raises(ValueError):
+            writer.add_intersection('B', ['东', '北', '西'], [0, 90, 180], by_order, interval_minutes=5)
+    archive = count_archive.CountArchive(archive_path)
+    assert archive.keys() == ['A']
+    assert archive.meta['num_records'] == 2
+
+
+def test_failed_import_keeps_existing_archive(tmp_path, sample_file):
+    archive_path = str(tmp_path / 'counts.tfa')
+    count_archive.import_files(archive_path, [sample_file(5)])
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    _write_periods(tmp_path / 'a' / 'x.txt', 15)
+    _write_periods(tmp_path / 'b' / 'x.txt', 15)
+
+    code = count_archive.main(['import', archive_path, sample_file(6),
+                               str(tmp_path / 'a' / 'x.txt'), str(tmp_path / 'b' / 'x.txt')])
+    assert code == 1
+    assert count_archive.CountArchive(archive_path).keys() == ['测试数据_5路']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a', 'b', 'counts.tfa']
+
+
+def test_successful_import_replaces_archive(tmp_path, sample_file):
+    archive_path = str(tmp_path / 'counts.tfa')
+    count_archive.import_files(archive_path, [sample_file(5)])
+    count_archive.import_files(archive_path, [sample_file(3), sample_file(4)])
+    assert count_archive.CountArchive(archive_path).keys() == ['测试数据_3路', '测试数据_4路']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['counts.tfa']
+
+
+def test_writer_rejects_unsorted_times_and_foreign_directory(tmp_path):
+    with count_archive.ArchiveWriter(str(tmp_path / 'counts.tfa')) as writer:
+        for times in ([0, 2, 1], [0, 1, 1]):
+            with pytest.raises(ValueError, match='升序'):
+                writer.add_intersection('A', ['东', '北', '西'], [0, 90, 180], np.ones((3, 3, 3)), times)
+
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'notes.txt').write_text('keep', encoding='utf-8')
+    with pytest.raises(ValueError):
+        count_archive.ArchiveWriter(str(tmp_path / 'docs'))
+    assert (tmp_path / 'docs' / 'notes.txt').read_text(encoding='utf-8') == 'keep'
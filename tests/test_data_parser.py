@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""数据文件解析：编码检测和单次遍历解析的测试"""
+import codecs
+
+import numpy as np
+import pytest
+
+import data_parser
+
+
+def _read_sample(sample_file, num_entries):
+    with open(sample_file(num_entries), 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'gbk', 'gb18030', 'utf-16', 'utf-32'])
+def test_encodings_parse_identically(tmp_path, sample_file, encoding):
+    text = _read_sample(sample_file, 4)
+    expected = data_parser.parse_intersection_lines(text.splitlines())
+    path = tmp_path / f'{encoding}.txt'
+    path.write_bytes(text.encode(encoding))
+
+    record = data_parser.parse_intersection_file(str(path))
+    assert record.names == expected.names
+    assert record.angles == expected.angles
+    np.testing.assert_array_equal(record.flows, expected.flows)
+
+
+def test_sniff_ignores_character_cut_at_sample_end():
+    # 样本末尾截断一个 GBK 双字节字符不算解码失败，不会退到 latin1
+    text = '路口' + 'a' * (data_parser.SNIFF_BYTES - 5) + '路' * 10
+    raw = text.encode('gbk')
+    assert raw[data_parser.SNIFF_BYTES - 1:data_parser.SNIFF_BYTES + 1] == '路'.encode('gbk')
+    assert data_parser.detect_encoding(raw) == 'gbk'
+    assert data_parser.detect_encoding(codecs.BOM_UTF8 + b'abc') == 'utf-8-sig'
+
+
+def test_decode_falls_back_when_sample_is_ambiguous():
+    # 样本内只有 ASCII 时按 utf-8 试探，整体解码失败后改用后面的候选编码
+    text = 'a' * data_parser.SNIFF_BYTES + '路口'
+    assert data_parser.decode_data(text.encode('gbk')) == text
+
+
+@pytest.mark.parametrize('num_entries', [3, 4, 5, 6])
+def test_record_matches_string_parser(sample_file, num_entries):
+    lines = data_parser.read_data_lines(sample_file(num_entries))
+    count, traffic_rule, data = data_parser.parse_data_lines(lines)
+    record = data_parser.parse_intersection_file(sample_file(num_entries))
+
+    assert (record.num_entries, record.traffic_rule) == (count, traffic_rule)
+    assert record.names == data['names']
+    assert record.angles == data_parser.convert_to_float_list(data['angles'])
+    expected = [data_parser.convert_to_float_list(data[f'flow_{i}']) for i in range(count)]
+    np.testing.assert_array_equal(record.flows, expected)
+    assert record.series is None
+
+
+def test_short_rows_invalid_values_and_rule():
+    lines = [
+        '本交叉口为3路交叉口，实行左行通行规则',
+        'names: 东,北',
+        'angles: 0,abc,180,270',
+        'flow_0: 1,,3',
+        'flow_2: 7',
+        'flow_5: 9,9,9',
+    ]
+    record = data_parser.parse_intersection_lines(lines)
+    assert record.traffic_rule == 'left'
+    assert record.names == ['东', '北', '0']
+    assert record.angles == [0.0, 0.0, 180.0]
+    np.testing.assert_array_equal(record.flows, [[1, 0, 3], [0, 0, 0], [7, 0, 0]])
+
+
+def test_legacy_and_undeclared_layouts():
+    legacy = ['names: a,b,c,d', 'angles: 0,90,180,270', 'u_turns: 1,2,3,4', 'left_turns: 5,6,7,8']
+    record = data_parser.parse_intersection_lines(legacy)
+    assert record.num_entries == 4
+    np.testing.assert_array_equal(record.flows[:2], [[1, 2, 3, 4], [5, 6, 7, 8]])
+
+    undeclared = ['a,b,c', '0,120,240', '1,2,3']
+    record = data_parser.parse_intersection_lines(undeclared)
+    assert (record.num_entries, record.names) == (3, ['a', 'b', 'c'])
+    np.testing.assert_array_equal(record.flows[0], [1, 2, 3])
+
+
+def test_unparseable_input(tmp_path):
+    assert data_parser.parse_intersection_lines([]) is None
+    assert data_parser.parse_intersection_lines(['本交叉口为2路交叉口', 'a,b']) is None
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert data_parser.parse_intersection_file(str(path)) is None
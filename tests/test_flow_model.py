@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""flow_model 与原有逐元素循环实现的一致性测试"""
+import numpy as np
+import pytest
+
+import flow_model
+from drawing_utils import normalize_index
+
+LEG_COUNTS = range(3, 13)
+RULES = ('right', 'left')
+
+
+def _exit_num(entry_num, order, num_entries, traffic_rule):
+    """原实现：流向顺序 → 出口编号（1-based）"""
+    if traffic_rule == 'left':
+        return normalize_index(entry_num + order, num_entries)
+    return normalize_index(entry_num - order, num_entries)
+
+
+def _exit_lane_entry_num(exit_num, order, num_entries, traffic_rule):
+    """原实现：出口处第 order 条流线的进口编号（1-based）"""
+    if traffic_rule == 'left':
+        return normalize_index(exit_num + 1 + order, num_entries)
+    return normalize_index(exit_num - 1 - order, num_entries)
+
+
+def loop_flow_matrix(by_order, traffic_rule):
+    """原 plot_traffic_flow 中构建 flows[entry_idx][exit_idx] 的嵌套循环"""
+    num_entries = len(by_order)
+    flows = [[0.0] * num_entries for _ in range(num_entries)]
+    for entry_idx in range(num_entries):
+        for flow_idx in range(num_entries):
+            exit_idx = _exit_num(entry_idx + 1, flow_idx, num_entries, traffic_rule) - 1
+            flows[entry_idx][exit_idx] = float(by_order[flow_idx][entry_idx])
+    return flows
+
+
+def loop_totals(flows):
+    """原实现：进口总量、出口总量和最大交通量"""
+    num_entries = len(flows)
+    entry_total_volumes = [sum(row) for row in flows]
+    exit_total_volumes = [sum(flows[i][j] for i in range(num_entries)) for j in range(num_entries)]
+    max_volume = max(max(row) for row in flows)
+    if max_volume <= 0:
+        max_volume = 1.0
+    return entry_total_volumes, exit_total_volumes, max_volume
+
+
+def loop_lane_offsets(flows, entry_index, exit_index, traffic_rule):
+    """原 draw_turn_path_generic 中逐条流线扫描的进口/出口累积流量"""
+    num_entries = len(flows)
+    entry_num, exit_num = entry_index + 1, exit_index + 1
+    entry_order = next(order for order in range(num_entries)
+                       if _exit_num(entry_num, order, num_entries, traffic_rule) == exit_num)
+    exit_order = next(order for order in range(num_entries)
+                      if _exit_lane_entry_num(exit_num, order, num_entries, traffic_rule) == entry_num)
+    previous_entry = sum(flows[entry_index][_exit_num(entry_num, order, num_entries, traffic_rule) - 1]
+                         for order in range(entry_order))
+    previous_exit = sum(flows[_exit_lane_entry_num(exit_num, order, num_entries, traffic_rule) - 1][exit_index]
+                        for order in range(exit_order + 1, num_entries))
+    return previous_entry, previous_exit
+
+
+def _random_by_order(num_entries, seed):
+    rng = np.random.default_rng(seed)
+    by_order = rng.integers(0, 500, size=(num_entries, num_entries)).astype(float)
+    by_order[rng.random(by_order.shape) < 0.2] = 0
+    return by_order
+
+
+@pytest.mark.parametrize('traffic_rule', RULES)
+@pytest.mark.parametrize('num_entries', LEG_COUNTS)
+def test_flow_matrix_and_totals_match_loops(num_entries, traffic_rule):
+    by_order = _random_by_order(num_entries, num_entries)
+    flows = flow_model.build_flow_matrix(by_order, traffic_rule)
+    expected = loop_flow_matrix(by_order.tolist(), traffic_rule)
+    np.testing.assert_array_equal(flows, expected)
+    np.testing.assert_array_equal(flow_model.to_order_layout(flows, traffic_rule), by_order)
+
+    entry_totals, exit_totals, max_volume = flow_model.compute_totals(flows)
+    expected_entry, expected_exit, expected_max = loop_totals(expected)
+    np.testing.assert_allclose(entry_totals, expected_entry)
+    np.testing.assert_allclose(exit_totals, expected_exit)
+    assert max_volume == expected_max
+
+
+@pytest.mark.parametrize('traffic_rule', RULES)
+@pytest.mark.parametrize('num_entries', LEG_COUNTS)
+def test_lane_offsets_match_loops(num_entries, traffic_rule):
+    flows = flow_model.build_flow_matrix(_random_by_order(num_entries, 100 + num_entries), traffic_rule)
+    entry_previous, exit_previous = flow_model.compute_lane_offsets(flows, traffic_rule)
+    for entry_index in range(num_entries):
+        for exit_index in range(num_entries):
+            expected = loop_lane_offsets(flows.tolist(), entry_index, exit_index, traffic_rule)
+            assert entry_previous[entry_index, exit_index] == pytest.approx(expected[0])
+            assert exit_previous[entry_index, exit_index] == pytest.approx(expected[1])
+
+
+def test_batch_matches_single():
+    batch = np.stack([_random_by_order(5, seed) for seed in range(4)])
+    flows = flow_model.build_flow_matrix(batch, 'left')
+    entry_previous, exit_previous = flow_model.compute_lane_offsets(flows, 'left')
+    _, _, max_volume = flow_model.compute_totals(flows)
+    for idx, by_order in enumerate(batch):
+        single = flow_model.build_flow_matrix(by_order, 'left')
+        np.testing.assert_array_equal(flows[idx], single)
+        np.testing.assert_allclose(entry_previous[idx], flow_model.compute_lane_offsets(single, 'left')[0])
+        np.testing.assert_allclose(exit_previous[idx], flow_model.compute_lane_offsets(single, 'left')[1])
+        assert max_volume[idx] == flow_model.compute_totals(single)[2]
+
+
+def test_zero_flows_use_unit_max_volume():
+    assert flow_model.compute_totals(np.zeros((4, 4)))[2] == 1.0
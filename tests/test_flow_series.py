@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""多时段流量：时段块文本 -> 解析 -> 文本的往返测试"""
+import numpy as np
+
+import data_parser
+from flow_series import FlowSeries
+from intersection import Intersection
+
+
+def _round_trip(series):
+    """写成3路数据文件的文本行后重新解析，返回解析得到的 FlowSeries"""
+    inter = Intersection(['东', '北', '西'], [0, 90, 180], series.by_order.sum(axis=0))
+    lines = ['本交叉口为3路交叉口，实行右行通行规则'] + inter.format_lines() + series.format_lines()
+    return data_parser.parse_intersection_lines(lines).series
+
+
+def test_format_lines_keeps_full_precision():
+    periods = np.zeros((2, 3, 3))
+    periods[0, 0] = [1234567, 0.1, 2.5]
+    periods[1, 2] = [1 / 3, 1e-7, 123456789012]
+    series = FlowSeries(periods, ['07:00-07:15', '07:15-07:30'], 15)
+
+    lines = series.format_lines()
+    assert lines[0] == 'interval: 15'
+    assert lines[2] == 'flow_0: 1234567,0.1,2.5'
+
+    loaded = _round_trip(series)
+    assert loaded.labels == series.labels
+    assert loaded.interval_minutes == 15
+    np.testing.assert_array_equal(loaded.by_order, periods)
+    assert loaded.format_lines() == lines
+
+
+def test_fractional_interval_round_trip():
+    series = FlowSeries(np.ones((4, 3, 3)), interval_minutes=7.5)
+    assert series.format_lines()[0] == 'interval: 7.5'
+    assert _round_trip(series).interval_minutes == 7.5
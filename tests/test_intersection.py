@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""交叉口数据模型：解析 -> 格式化 -> 解析往返，表格编辑与保存"""
+import numpy as np
+import pytest
+
+import data_parser
+import file_operations
+from intersection import Intersection, parse_number, format_number
+
+from conftest import make_table
+
+
+@pytest.mark.parametrize('num_entries', [3, 4, 5, 6])
+def test_sample_file_roundtrip(num_entries, sample_file):
+    record = data_parser.parse_intersection_file(sample_file(num_entries))
+    inter = Intersection.from_record(record)
+    lines = [f'本交叉口为{num_entries}路交叉口，实行右行通行规则'] + inter.format_lines()
+    again = data_parser.parse_intersection_lines(lines)
+    assert again.names == record.names
+    assert np.array_equal(again.angles, record.angles)
+    assert np.array_equal(again.flows, record.flows)
+
+
+def test_number_helpers():
+    assert parse_number('12.5') == 12.5
+    assert parse_number('') == 0.0
+    assert parse_number('abc') == 0.0
+    assert format_number(300.0) == '300'
+    assert format_number(12.5) == '12.5'
+
+
+def test_angle_order_is_stable_and_reorders_flows():
+    inter = Intersection(['a', 'b', 'c'], [370, 10, -90], [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    order = inter.angle_order()
+    assert order.tolist() == [0, 1, 2]
+    inter.normalize_angles()
+    inter.reorder([2, 0, 1])
+    assert inter.names == ['c', 'a', 'b']
+    assert inter.angles.tolist() == [270, 10, 10]
+    assert inter.by_order.tolist() == [[3, 1, 2], [6, 4, 5], [9, 7, 8]]
+
+
+def _fill(table, rows):
+    for row, values in enumerate(rows):
+        for column, value in enumerate(values):
+            table._vars[row][column].set(value)
+
+
+def test_table_edits_sync_and_sort():
+    table = make_table(3)
+    _fill(table, [['北', '90', '1', '2', '3'],
+                  ['东', '360', '4', '5', '6'],
+                  ['西', '180', '7', '8', '9']])
+    inter = table.get()
+    assert inter.names == ['东', '北', '西']
+    assert inter.angles.tolist() == [0, 90, 180]
+    # by_order[flow_idx, entry_idx]：第 flow_idx 个流量列，各进口一列
+    assert inter.by_order[:, 0].tolist() == [4, 5, 6]
+    assert [row[1].get() for row in table._vars] == ['0', '90', '180']
+
+
+def test_save_keeps_cell_text(tmp_path):
+    table = make_table(3)
+    _fill(table, [['北', '90', '', 'abc', '3'],
+                  ['东', '0', '4', '5', '6'],
+                  ['西', 'x', '7', '8', '9']])
+    inter = table.get()
+    # 绘图使用的数值中，空值和无效值为0
+    assert inter.names == ['东', '西', '北']
+    assert inter.by_order[:, 2].tolist() == [0, 0, 3]
+
+    path = tmp_path / 'saved.txt'
+    file_operations.write_data_file(str(path), table)
+    lines = path.read_text(encoding='utf-8').splitlines()
+    # 无效方位角按0度排序（稳定排序，排在原来的0度之后），文本原样保存
+    assert lines[1:] == ['东,西,北', '0,x,90', '4,7,', '5,8,abc', '6,9,3']
+
+
+def test_plot_rejects_table_without_flows(monkeypatch):
+    plotting = pytest.importorskip('plotting')
+    errors = []
+    monkeypatch.setattr(plotting.messagebox, 'showerror', lambda title, message: errors.append(message))
+    monkeypatch.setattr(plotting, 'get_root', lambda: object())
+    table = make_table(3)
+    _fill(table, [['北', '90', '', '', ''],
+                  ['东', '0', '0', 'abc', ''],
+                  ['西', '180', '', '', '']])
+    assert table.get().is_empty()
+
+    plotting.plot_traffic_flow(table)
+    assert errors == [plotting.t('data_empty')]
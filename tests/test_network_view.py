@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""路网视图命令行参数测试"""
+import pytest
+
+import network_view
+
+
+def _write_network(tmp_path, sample_file):
+    path = tmp_path / '干线.txt'
+    path.write_text(f'0, 0, {sample_file(4)}\n1000, 0, {sample_file(3)}\n', encoding='utf-8')
+    return path
+
+
+def test_viewport_accepts_negative_values(tmp_path, sample_file, monkeypatch):
+    monkeypatch.setenv('TRAFFIC_FLOW_RENDER_CACHE', '0')
+    network = _write_network(tmp_path, sample_file)
+    output = tmp_path / '局部.png'
+    code = network_view.main([str(network), '-o', str(output), '--dpi', '50',
+                              '--viewport', '-500', '500', '-300', '300'])
+    assert code == 0
+    assert output.stat().st_size > 0
+
+
+def test_empty_viewport_is_rejected(tmp_path, sample_file):
+    network = _write_network(tmp_path, sample_file)
+    assert network_view.main([str(network), '--viewport', '1', '1', '0', '2']) == 1
+    with pytest.raises(ValueError):
+        network_view.parse_viewport([0, 1, 2])
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""渲染缓存：缓存键、读写、淘汰和累计大小"""
+import os
+
+import render_cache
+import render_engine
+from intersection import Intersection
+
+
+def _model(by_order=None, traffic_rule='right'):
+    inter = Intersection(['A', 'B', 'C', 'D'], [0, 90, 180, 270],
+                         by_order if by_order is not None else [[10, 20, 30, 40]] * 4)
+    return render_engine.prepare_intersection(inter.names, inter.angles, inter.by_order, 4, traffic_rule)
+
+
+def test_key_is_stable_and_covers_inputs():
+    key = render_cache.make_key(_model(), 'svg', 100, 15, 12)
+    assert key == render_cache.make_key(_model(), 'svg', 100, 15, 12)
+    assert key != render_cache.make_key(_model(), 'png', 100, 15, 12)
+    assert key != render_cache.make_key(_model(), 'svg', 300, 15, 12)
+    assert key != render_cache.make_key(_model(), 'svg', 100, 16, 12)
+    assert key != render_cache.make_key(_model(traffic_rule='left'), 'svg', 100, 15, 12)
+    assert key != render_cache.make_key(_model([[10, 20, 30, 41]] * 4), 'svg', 100, 15, 12)
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = render_cache.RenderCache(str(tmp_path))
+    assert cache.get('ab' * 32, 'svg') is None
+    assert cache.put('ab' * 32, 'svg', b'<svg/>')
+    assert cache.get('ab' * 32, 'svg') == b'<svg/>'
+    assert cache.size() == len(b'<svg/>')
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = render_cache.RenderCache(str(tmp_path), max_bytes=250)
+    keys = [f'{i:02d}' * 32 for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, 'png', b'x' * 100)
+        path = cache._path(key, 'png')
+        os.utime(path, (1000 + age, 1000 + age))
+    # 第3次写入后超过上限，最早使用的条目被删除
+    assert cache.get(keys[0], 'png') is None
+    assert cache.get(keys[1], 'png') is not None
+    assert cache.get(keys[2], 'png') is not None
+    assert cache.size() <= 250
+
+
+def test_put_scans_directory_only_when_needed(tmp_path, monkeypatch):
+    cache = render_cache.RenderCache(str(tmp_path), max_bytes=10 * 1024)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or entries())
+
+    for i in range(50):
+        cache.put(f'{i:064x}', 'svg', b'x' * 100)
+    assert len(scans) == 1
+    # 覆盖已有条目时不重复计入大小
+    cache.put(f'{0:064x}', 'svg', b'x' * 100)
+    assert cache._total == cache.size() == 50 * 100
+
+    for i in range(50, 120):
+        cache.put(f'{i:064x}', 'svg', b'x' * 100)
+    assert cache.size() <= 10 * 1024
+    assert cache._total == cache.size()
+
+
+def test_render_uses_cache(tmp_path):
+    cache = render_cache.RenderCache(str(tmp_path))
+    inter = Intersection(['A', 'B', 'C'], [0, 120, 240], [[10, 20, 30]] * 3)
+    first = render_engine.render_to_bytes(inter.names, inter.angles, inter.by_order, format='svg', cache=cache)
+    assert cache.size() == len(first)
+    second = render_engine.render_to_bytes(inter.names, inter.angles, inter.by_order, format='svg', cache=cache)
+    assert first == second
+
+
+def test_export_process_entries_match_window_keys(tmp_path, monkeypatch):
+    import queue
+
+    import export_worker
+
+    cache = render_cache.RenderCache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(render_cache, 'get_default_cache', lambda: cache)
+    inter = Intersection(['A', 'B', 'C'], [0, 120, 240], [[10, 20, 30]] * 3)
+    # 没有配置字体时（plot_font 为 None），导出进程写入的缓存也要能被绘图窗口按同样的设置找到
+    snapshot = export_worker.make_snapshot(inter.names, inter.angles, inter.by_order.tolist(), 'right',
+                                           15, 12, None, 3)
+    messages = queue.Queue()
+    output = str(tmp_path / 'out.svg')
+    export_worker._export_process(snapshot, [(output, 'svg', 100)], messages)
+    assert messages.queue[-1][0] == export_worker.MESSAGE_DONE
+
+    model = render_engine.prepare_intersection(inter.names, inter.angles, inter.by_order, 3, 'right')
+    key = render_cache.make_key(model, 'svg', 100, 15, 12, render_engine.resolve_font(None))
+    with open(output, 'rb') as f:
+        assert cache.get(key, 'svg') == f.read()
@@ -6,7 +6,7 @@ import platform
 import tkinter as tk
 from tkinter import ttk
 from tkinter import font as tkfont
-import matplotlib.font_manager as fm
+import font_registry
 
 # Windows API 用于临时加载字体
 if platform.system() == 'Windows':
@@ -45,6 +45,7 @@ _harmonyos_font_file = None  # HarmonyOS Sans Regular 字体文件路径（主
 _harmonyos_medium_font_file = None  # HarmonyOS Sans Medium 字体文件路径（用于标题、按钮等）
 _inter_font_file = None  # Inter 字体文件路径（用于英文和数字）
 _harmonyos_font_file = None  # HarmonyOS Sans 字体文件路径（主字体）
+_tk_font_checks = {}  # Tkinter 字体可用性验证结果缓存 {字体族: 是否可用}
 
 def load_font_to_system(font_path):
     """
@@ -79,6 +80,20 @@ def load_font_to_system(font_path):
     
     return False
 
+def _is_tk_font_available(font_family):
+    """验证 Tkinter 能否使用该字体族（结果按字体族缓存，避免重复创建测试字体）"""
+    if font_family in _tk_font_checks:
+        return _tk_font_checks[font_family]
+    try:
+        test_font = tkfont.Font(family=font_family, size=10)
+        actual = test_font.actual().get('family', '')
+        available = font_family in actual or actual in font_family
+    except:
+        # Tk 尚未初始化时不缓存，下次再验证
+        return False
+    _tk_font_checks[font_family] = available
+    return available
+
 def get_font_family():
     """
     获取主字体族名称（优先使用 HarmonyOS Sans）
@@ -88,53 +103,15 @@ def get_font_family():
     
     # 优先使用 HarmonyOS Sans
     if _harmonyos_font_file and os.path.exists(_harmonyos_font_file):
-        try:
-            from fontTools.ttLib import TTFont
-            font = TTFont(_harmonyos_font_file)
-            name_table = font.get('name')
-            font_family = None
-            # 优先使用 Font Family name (nameID=1)
-            for record in name_table.names:
-                if record.nameID == 1:  # Font Family name
-                    font_family = record.toUnicode()
-                    break
-            # 如果没有找到，尝试 PostScript name
-            if not font_family:
-                for record in name_table.names:
-                    if record.nameID == 6:  # PostScript name
-                        font_family = record.toUnicode()
-                        break
-            font.close()
-            if font_family:
-                # 验证字体是否可用
-                try:
-                    test_font = tkfont.Font(family=font_family, size=10)
-                    actual = test_font.actual()
-                    if font_family in actual.get('family', '') or actual.get('family', '') in font_family:
-                        return font_family
-                except:
-                    pass
-        except:
-            pass
+        font_family = font_registry.get_family_name(_harmonyos_font_file, prefer='family')
+        if font_family and _is_tk_font_available(font_family):
+            return font_family
     
     # 如果没有 HarmonyOS Sans，使用其他自定义字体
     if _custom_font_file and os.path.exists(_custom_font_file):
-        try:
-            from fontTools.ttLib import TTFont
-            font = TTFont(_custom_font_file)
-            name_table = font.get('name')
-            font_family = None
-            for record in name_table.names:
-                if record.nameID == 1:  # Font Family name
-                    font_family = record.toUnicode()
-                    break
-                elif record.nameID == 6 and font_family is None:  # PostScript name
-                    font_family = record.toUnicode()
-            font.close()
-            if font_family:
-                return font_family
-        except:
-            pass
+        font_family = font_registry.get_family_name(_custom_font_file, prefer='family')
+        if font_family:
+            return font_family
     
     # 如果无法从字体文件获取，使用 GUI_FONT_FAMILY 或安全字体
     if GUI_FONT_FAMILY:
@@ -150,34 +127,9 @@ def get_font_family_medium():
     
     # 优先使用 HarmonyOS Sans Medium
     if _harmonyos_medium_font_file and os.path.exists(_harmonyos_medium_font_file):
-        try:
-            from fontTools.ttLib import TTFont
-            font = TTFont(_harmonyos_medium_font_file)
-            name_table = font.get('name')
-            font_family = None
-            # 优先使用 Font Family name (nameID=1)
-            for record in name_table.names:
-                if record.nameID == 1:  # Font Family name
-                    font_family = record.toUnicode()
-                    break
-            # 如果没有找到，尝试 PostScript name
-            if not font_family:
-                for record in name_table.names:
-                    if record.nameID == 6:  # PostScript name
-                        font_family = record.toUnicode()
-                        break
-            font.close()
-            if font_family:
-                # 验证字体是否可用
-                try:
-                    test_font = tkfont.Font(family=font_family, size=10)
-                    actual = test_font.actual()
-                    if font_family in actual.get('family', '') or actual.get('family', '') in font_family:
-                        return font_family
-                except:
-                    pass
-        except:
-            pass
+        font_family = font_registry.get_family_name(_harmonyos_medium_font_file, prefer='family')
+        if font_family and _is_tk_font_available(font_family):
+            return font_family
     
     # 如果 Medium 不可用，返回 Regular（主字体）
     return get_font_family()
@@ -472,21 +424,7 @@ def setup_modern_style(root):
     if os.path.exists(ui_font_path):
         # 如果是字体文件路径，尝试读取字体信息获取字体名称
         try:
-            # 方法1: 使用 fontTools 读取字体信息（如果可用）
-            try:
-                from fontTools.ttLib import TTFont
-                font = TTFont(ui_font_path)
-                name_table = font.get('name')
-                for record in name_table.names:
-                    if record.nameID == 6:  # PostScript name
-                        font_family = record.toUnicode()
-                        break
-                    elif record.nameID == 1 and font_family is None:  # Font Family name
-                        font_family = record.toUnicode()
-                font.close()
-            except (ImportError, Exception):
-                # 如果没有 fontTools，无法从字体文件获取字体名称
-                pass
+            font_family = font_registry.get_family_name(ui_font_path, prefer='postscript')
             
             # 如果无法从字体文件获取字体名称，回退到系统字体
             if not font_family:
@@ -731,6 +669,7 @@ def find_chinese_font():
     
     # 如果找不到，尝试使用 matplotlib 的字体管理器查找
     try:
+        import matplotlib.font_manager as fm
         fonts = [f.name for f in fm.fontManager.ttflist if 'hei' in f.name.lower() or 'song' in f.name.lower() or 'sim' in f.name.lower()]
         if fonts:
             # 返回第一个找到的字体名称，让 matplotlib 自动查找
@@ -741,16 +680,30 @@ def find_chinese_font():
     # 如果都找不到，返回 None，使用默认字体
     return None
 
-# 获取字体路径或名称（用于matplotlib绘图）
-font_path = find_chinese_font()
-if font_path and os.path.exists(font_path):
-    font = fm.FontProperties(fname=font_path, size=12)
-elif font_path:
-    # 如果是字体名称而不是路径
-    font = fm.FontProperties(family=font_path, size=12)
-else:
-    # 使用默认字体
-    font = fm.FontProperties(size=12)
+def _create_chinese_font():
+    """查找中文字体并创建 FontProperties（用于matplotlib绘图）"""
+    import matplotlib.font_manager as fm
+    font_path = find_chinese_font()
+    if font_path and os.path.exists(font_path):
+        font = fm.FontProperties(fname=font_path, size=12)
+    elif font_path:
+        # 如果是字体名称而不是路径
+        font = fm.FontProperties(family=font_path, size=12)
+    else:
+        # 使用默认字体
+        font = fm.FontProperties(size=12)
+    return font_path, font
+
+def __getattr__(name):
+    """
+    模块属性 font_path / font 在首次访问时才查找字体并创建
+    （避免导入本模块时加载 matplotlib 和扫描系统字体，加快启动）
+    """
+    if name in ('font_path', 'font'):
+        global font_path, font
+        font_path, font = _create_chinese_font()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def adjust_window_size(window, keep_position=False):
     """调整窗口大小以适应内容，并居中显示（如果 keep_position=True，则保持当前位置）"""